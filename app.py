@@ -1,8 +1,8 @@
 import streamlit as st
-import pandas as pd
+import streamlit.components.v1 as components
 import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
+import io
+import os
 import time
 from datetime import datetime
 import threading
@@ -10,6 +10,19 @@ import threading
 from utils.network_scanner import NetworkScanner
 from utils.ping_monitor import PingMonitor
 from utils.speed_tester import InternetSpeedTester
+from utils.timeseries_store import TimeSeriesStore
+from utils.collector_service import CollectorClient, build_snapshot
+from utils.service_scanner import PORT_SETS
+from utils.charts import build_device_figure, build_sparkline_figure, get_speed_text, paginate
+from utils.metrics import UI_RENDER_SECONDS, MetricsServer
+from utils.alerting import AlertEngine, FileSink, WebhookSink
+from utils.interfaces import select_interfaces
+from utils.sla import EXPORT_COLUMNS, report_rows, rows_to_csv
+from utils.startup import PROFILE, lazy_import
+
+# Dependențe grele încărcate la prima utilizare (tabele și graficul de viteză)
+pd = lazy_import('pandas')
+plotly_subplots = lazy_import('plotly.subplots')
 
 # Configurare pagină
 st.set_page_config(
@@ -19,37 +32,79 @@ st.set_page_config(
 )
 
 # Inițializare clase
+@st.cache_resource
+def get_store():
+    with PROFILE.step('init', 'TimeSeriesStore'):
+        return TimeSeriesStore(os.environ.get('NETWORK_MONITOR_DB', 'data/network_monitor.db'))
+
 @st.cache_resource
 def get_scanner():
-    return NetworkScanner()
+    with PROFILE.step('init', 'NetworkScanner'):
+        scanner = NetworkScanner()
+    if os.environ.get('NETWORK_MONITOR_PASSIVE'):
+        scanner.start_passive(os.environ.get('NETWORK_MONITOR_PASSIVE_IFACE'))
+    return scanner
+
+@st.cache_resource
+def get_alert_engine():
+    sinks = []
+    if os.environ.get('NETWORK_MONITOR_ALERTS_FILE'):
+        sinks.append(FileSink(os.environ['NETWORK_MONITOR_ALERTS_FILE']))
+    if os.environ.get('NETWORK_MONITOR_ALERT_WEBHOOK'):
+        sinks.append(WebhookSink(os.environ['NETWORK_MONITOR_ALERT_WEBHOOK']))
+    return AlertEngine(sinks=sinks)
 
 @st.cache_resource
 def get_ping_monitor():
-    return PingMonitor()
+    # O oră de istoric la cadența de 2 secunde (~14 octeți per eșantion)
+    with PROFILE.step('init', 'PingMonitor'):
+        monitor = PingMonitor(max_history=1800, store=get_store())
+    # Agregările SLA pe 30 de zile supraviețuiesc repornirii dashboard-ului
+    sla_state = os.environ.get('NETWORK_MONITOR_SLA_STATE', 'data/sla.npz')
+    monitor.sla.load(sla_state)
+    monitor.sla.start_autosave(sla_state)
+    monitor.add_listener(get_alert_engine())
+    # Dispozitivele apărute după pornire intră în monitorizare fără restart
+    get_scanner().inventory.subscribe(monitor.apply_inventory_events)
+    return monitor
 
 @st.cache_resource
 def get_speed_tester():
-    return InternetSpeedTester()
+    with PROFILE.step('init', 'InternetSpeedTester'):
+        return InternetSpeedTester(store=get_store(),
+                                   throughput_url=os.environ.get('NETWORK_MONITOR_THROUGHPUT_URL'))
 
-def main():
-    st.title("🌐 Network Monitor - Monitorizare Rețea Locală și Internet")
-    
-    # Inițializare
+@st.cache_resource
+def get_collector_client():
+    return CollectorClient.from_address(os.environ.get('NETWORK_MONITOR_COLLECTOR', '127.0.0.1:8765'))
+
+@st.cache_resource
+def get_metrics_server():
+    # Endpoint /metrics pentru procesul Streamlit (0 = dezactivat)
+    port = int(os.environ.get('NETWORK_MONITOR_METRICS_PORT', '9106'))
+    if not port:
+        return None
+    try:
+        server = MetricsServer(port=port)
+    except OSError as e:
+        print(f"Metrics server error: {e}")
+        return None
+    server.start()
+    return server
+
+def collect_local_state():
+    """Colectare în procesul Streamlit, când nu rulează un colector separat"""
     scanner = get_scanner()
     ping_monitor = get_ping_monitor()
     speed_tester = get_speed_tester()
-    
-    # Sidebar
-    st.sidebar.header("Configurare")
-    auto_refresh = st.sidebar.checkbox("Auto-refresh dispozitive", value=True)
-    refresh_interval = st.sidebar.slider("Interval refresh (secunde)", 30, 300, 60)
-    
+
     # Butoane control
     col1, col2, col3 = st.sidebar.columns(3)
     
     with col1:
         if st.button("Scan Now"):
-            st.rerun()
+            # Rezultatele vechi rămân vizibile până termină scanarea din fundal
+            scanner.invalidate_cache()
     
     with col2:
         if st.button("Start Monitor"):
@@ -61,6 +116,66 @@ def main():
         if st.button("Stop Monitor"):
             ping_monitor.stop_monitoring()
             speed_tester.stop_continuous_test()
+
+    # Scanare dispozitive
+    with st.spinner("Scanare rețea..."):
+        # Obține rețelele locale automat (toate interfețele selectate)
+        chosen = None
+        interfaces = scanner.get_interfaces()
+        if len(interfaces) > 1:
+            names = [i['name'] for i in interfaces]
+            default = [i['name'] for i in select_interfaces(interfaces)]
+            chosen = st.sidebar.multiselect("Interfețe scanate", names, default=default) or None
+        network_range = scanner.get_local_network(chosen)
+
+        # Din cache; scanarea completă rulează doar la prima afișare
+        progress = st.empty()
+        found = []
+
+        def show_progress(device):
+            found.append(device)
+            progress.caption(f"🔍 {len(found)} dispozitive găsite până acum (ultimul: {device['ip']})")
+
+        devices = scanner.get_devices(network_range, on_device=show_progress)
+        progress.empty()
+
+    return build_snapshot(scanner, ping_monitor, speed_tester, network_range, devices,
+                          alerts=get_alert_engine())
+
+def schedule_refresh(seconds: int):
+    """Cere o nouă rulare după `seconds` secunde fără a ține ocupat un thread de script per tab"""
+    try:
+        from streamlit_autorefresh import st_autorefresh
+    except ImportError:
+        # Fără componentă: reîncărcare din browser (sesiunea se recreează, dar serverul nu așteaptă)
+        components.html(f"<script>setTimeout(() => window.parent.location.reload(), {int(seconds * 1000)});</script>",
+                        height=0)
+        return
+    st_autorefresh(interval=int(seconds * 1000), key='auto_refresh')
+
+def format_uptime(uptime) -> str:
+    return f"{uptime:.2f}%" if uptime is not None else 'N/A'
+
+def main():
+    render_started = time.perf_counter()
+    get_metrics_server()
+    st.title("🌐 Network Monitor - Monitorizare Rețea Locală și Internet")
+    
+    # Sidebar
+    st.sidebar.header("Configurare")
+    auto_refresh = st.sidebar.checkbox("Auto-refresh dispozitive", value=True)
+    refresh_interval = st.sidebar.slider("Interval refresh (secunde)", 30, 300, 60)
+    
+    # Dacă rulează colectorul (collector.py), dashboard-ul doar citește starea publicată
+    state = get_collector_client().snapshot()
+    viewer = bool(state)
+    if viewer:
+        st.sidebar.success("✓ Conectat la colector - mod vizualizare")
+    else:
+        state = collect_local_state()
+    
+    devices = state['devices']
+    hosts = state['hosts']
     
     # Tabs
     tab1, tab2, tab3 = st.tabs(["📋 Dispozitive Rețea", "📊 Monitor Rețea", "🌐 Viteza Internet"])
@@ -68,16 +183,11 @@ def main():
     with tab1:
         st.header("Dispozitive din Rețea")
         
-        # Scanare dispozitive
-        with st.spinner("Scanare rețea..."):
-            # Obține rețeaua locală automat
-            network_range = scanner.get_local_network()
-    
-            # Afișează rețeaua care va fi scanată
-            st.info(f"🔍 Scanare rețea: {network_range}")
-    
-            # Execută scanarea
-            devices = scanner.scan_network(network_range)
+        # Afișează rețeaua scanată
+        st.info(f"🔍 Scanare rețea: {state['network']} ({state['scan_method']})")
+        
+        if state['refreshing']:
+            st.caption("🔄 Se reîmprospătează lista de dispozitive în fundal...")
         
         if devices:
             # Creează DataFrame pentru afișare
@@ -88,6 +198,7 @@ def main():
                     'Hostname': device['hostname'],
                     'MAC Address': device['mac'],
                     'Vendor': device['vendor'],
+                    'Interface': device.get('interface', 'N/A'),
                     'Status': device['status']
                 })
             
@@ -101,128 +212,164 @@ def main():
             with col2:
                 up_devices = len([d for d in devices if d['status'] == 'up'])
                 st.metric("Dispozitive Active", up_devices)
+
+            changes = state.get('changes', [])
+            if changes:
+                with st.expander(f"🕓 Modificări recente ({len(changes)})"):
+                    labels = {'joined': '🟢 a apărut', 'left': '🔴 nu mai răspunde',
+                              'ip_changed': '🔀 IP schimbat', 'updated': '✏️ actualizat', 'removed': '➖ scos'}
+                    for event in changes:
+                        when = datetime.fromtimestamp(event['timestamp']).strftime('%H:%M:%S')
+                        detail = ''
+                        if event['type'] == 'ip_changed':
+                            detail = f" (de la {event['old_ip']})"
+                        elif event['type'] == 'updated':
+                            detail = ' (' + ', '.join(f"{k}: {v}" for k, v in event['changes'].items()) + ')'
+                        st.caption(f"{when} {event['ip']} {labels.get(event['type'], event['type'])}{detail}")
+
+            with st.expander("🔌 Servicii deschise"):
+                port_set = st.selectbox("Porturi", list(PORT_SETS), index=0)
+                grab_banners = st.checkbox("Citește banner-ele serviciilor", value=False)
+                if st.button("Scanează serviciile"):
+                    table = st.empty()
+                    rows = []
+                    # Rezultatele apar per host, pe măsură ce se termină scanarea lui
+                    for result in get_scanner().stream_services(devices, port_set, grab_banners):
+                        for port, info in sorted(result['open'].items()):
+                            rows.append({'IP': result['ip'], 'Port': port, 'Serviciu': info['service'],
+                                         'RTT (ms)': info['rtt'], 'Banner': info['banner'] or ''})
+                        table.dataframe(pd.DataFrame(rows), use_container_width=True)
+                    if not rows:
+                        st.info("Nu s-au găsit servicii deschise")
         else:
             st.warning("Nu s-au găsit dispozitive în rețea")
     
     with tab2:
         st.header("Monitorizare Rețea în Timp Real")
         
-        if not ping_monitor.ping_data:
+        for alert in state.get('alerts', []):
+            name = hosts.get(alert['host'], {}).get('hostname', alert['host'])
+            since = datetime.fromtimestamp(alert['since']).strftime('%H:%M:%S')
+            text = f"🔔 {name} ({alert['host']}): {alert['message']} - valoare {alert['value']} (din {since})"
+            if alert['severity'] == 'critical':
+                st.error(text)
+            else:
+                st.warning(text)
+        
+        if not hosts:
             st.info("Porniți monitorizarea din sidebar pentru a vedea datele")
         else:
-            # Creează graficul pentru dispozitive
-            fig = go.Figure()
-            
-            # Culori pentru status
-            status_colors = {
-                'excellent': '#00ff00',  # Verde - 1000 Mbps
-                'good': '#ffff00',       # Galben - 100 Mbps  
-                'fair': '#ffa500',       # Portocaliu - 10 Mbps
-                'slow': '#ff0000',       # Roșu - Probleme
-                'down': '#8b0000',       # Roșu închis - Down
-                'unknown': '#808080'     # Gri - Unknown
-            }
-            
-            # Adaugă dispozitivele pe grafic
-            y_positions = {}
-            current_y = 0
-            
-            for ip, data in ping_monitor.ping_data.items():
-                hostname = data['hostname']
-                y_positions[ip] = current_y
-                
-                # Adaugă hostname în stânga
-                fig.add_trace(go.Scatter(
-                    x=[-10],
-                    y=[current_y],
-                    mode='text',
-                    text=[f"<b>{hostname}</b><br>{ip}"],
-                    textposition="middle right",
-                    showlegend=False,
-                    hoverinfo='none'
-                ))
-                
-                # Adaugă linia punctată spre dreapta
-                if data['history']:
-                    latest = list(data['history'])[-1]
-                    color = status_colors.get(data['status'], '#808080')
-                    
-                    # Linie principală
-                    fig.add_trace(go.Scatter(
-                        x=[0, 100],
-                        y=[current_y, current_y],
-                        mode='lines',
-                        line=dict(dash='dot', color=color, width=3),
-                        showlegend=False,
-                        hoverinfo='none'
-                    ))
-                    
-                    # Marker cu viteza
-                    speed_text = self.get_speed_text(data['status'])
-                    fig.add_trace(go.Scatter(
-                        x=[100],
-                        y=[current_y],
-                        mode='markers+text',
-                        marker=dict(size=15, color=color),
-                        text=[speed_text],
-                        textposition="middle right",
-                        showlegend=False,
-                        name=f"{hostname} - {speed_text}"
-                    ))
-                
-                current_y += 1
-            
-            # Configurează layout
-            fig.update_layout(
-                title="Monitorizare Dispozitive Rețea",
-                xaxis=dict(
-                    range=[-50, 150],
-                    showgrid=False,
-                    zeroline=False,
-                    showticklabels=False,
-                    title=""
-                ),
-                yaxis=dict(
-                    range=[-1, current_y],
-                    showgrid=False,
-                    zeroline=False,
-                    showticklabels=False,
-                    title=""
-                ),
-                plot_bgcolor='white',
-                height=400 + (len(ping_monitor.ping_data) * 30),
-                showlegend=True
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
+            # Paginare: figura are înălțime fixă indiferent de numărul total de host-uri
+            col_filter, col_size, col_page = st.columns([3, 1, 1])
+            with col_filter:
+                query = st.text_input("Filtru host/IP", "")
+            with col_size:
+                page_size = st.selectbox("Host-uri per pagină", [25, 50, 100], index=1)
+            _, pages = paginate(hosts, 0, page_size, query)
+            with col_page:
+                page = st.number_input(f"Pagina (din {pages})", min_value=1, max_value=pages, value=1) - 1
+            page_hosts, _ = paginate(hosts, page, page_size, query)
+
+            st.plotly_chart(build_device_figure(page_hosts), use_container_width=True)
+            st.plotly_chart(build_sparkline_figure(page_hosts), use_container_width=True)
             
             # Tabel cu status curent
             st.subheader("Status Curent Dispozitive")
             status_data = []
-            for ip, data in ping_monitor.ping_data.items():
-                if data['history']:
-                    latest = list(data['history'])[-1]
+            sla = state.get('sla', {})
+            sla_day = sla.get('1d', {}).get('hosts', {})
+            sla_month = sla.get('30d', {}).get('hosts', {})
+            # Statistici pe ultimele 5 minute, calculate o singură dată per snapshot
+            for ip, data in hosts.items():
+                latest = data['latest']
+                if latest:
+                    host_stats = data['stats']
                     status_data.append({
                         'Hostname': data['hostname'],
                         'IP': ip,
                         'Status': data['status'].upper(),
                         'Response Time': f"{latest['response_time']} ms" if latest['response_time'] else 'N/A',
                         'Packet Loss': 'DA' if latest['packet_loss'] else 'NU',
-                        'Viteza Estimata': self.get_speed_text(data['status'])
+                        'Avg (5m)': f"{host_stats['avg']} ms" if host_stats.get('avg') is not None else 'N/A',
+                        'P95 (5m)': f"{host_stats['p95']} ms" if host_stats.get('p95') is not None else 'N/A',
+                        'Uptime (5m)': f"{host_stats['uptime']:.1f}%" if host_stats.get('uptime') is not None else 'N/A',
+                        'Uptime (24h)': format_uptime(sla_day.get(ip, {}).get('uptime')),
+                        'Uptime (30z)': format_uptime(sla_month.get(ip, {}).get('uptime')),
+                        'Viteza Estimata': get_speed_text(data['status'])
                     })
             
             if status_data:
                 status_df = pd.DataFrame(status_data)
                 st.dataframe(status_df, use_container_width=True)
+
+            if sla:
+                with st.expander("📈 SLA / disponibilitate"):
+                    windows = {'Ultima oră': '1h', 'Ultimele 24 ore': '1d', 'Ultimele 30 zile': '30d'}
+                    window = windows[st.selectbox("Fereastra SLA", list(windows), index=1)]
+                    report = sla[window]
+                    fleet = report['fleet']
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("Uptime flotă", format_uptime(fleet['uptime']))
+                    with col2:
+                        st.metric("P95 RTT", f"{fleet['p95']} ms" if fleet['p95'] is not None else 'N/A')
+                    with col3:
+                        st.metric("Pierderi", f"{fleet['loss_rate'] * 100:.2f}%" if fleet['loss_rate'] is not None else 'N/A')
+                    with col4:
+                        st.metric("MTTR", f"{fleet['mttr']:.0f} s" if fleet['mttr'] is not None else 'N/A',
+                                  help=f"{fleet['outages']:g} pene închise, {fleet['hosts_down']} host-uri căzute acum")
+                    rows = report_rows(report)
+                    st.dataframe(pd.DataFrame(rows[1:], columns=list(EXPORT_COLUMNS)), use_container_width=True)
+                    col_csv, col_parquet = st.columns(2)
+                    with col_csv:
+                        st.download_button("Export CSV", rows_to_csv(rows), f"sla-{window}.csv", "text/csv")
+                    with col_parquet:
+                        try:
+                            buffer = io.BytesIO()
+                            pd.DataFrame(rows, columns=list(EXPORT_COLUMNS)).to_parquet(buffer, index=False)
+                            st.download_button("Export Parquet", buffer.getvalue(), f"sla-{window}.parquet",
+                                               "application/octet-stream")
+                        except ImportError:
+                            st.caption("Exportul Parquet necesită pyarrow")
+
+            # Istoric pe termen lung din stocarea persistentă (agregări)
+            with st.expander("Istoric pe termen lung"):
+                windows = {'Ultima oră': 3600, 'Ultimele 24 ore': 86400, 'Ultimele 7 zile': 7 * 86400}
+                window_label = st.selectbox("Interval", list(windows))
+                if viewer:
+                    # În modul vizualizare istoricul vine de la colector, fără a deschide SQLite local
+                    summary = get_collector_client().summary(windows[window_label]) or {}
+                else:
+                    summary = get_store().summary(time.time() - windows[window_label])
+                history_data = [{
+                    'IP': ip,
+                    'Eșantioane': row['samples'],
+                    'Avg (ms)': round(row['avg'], 2) if row['avg'] is not None else None,
+                    'Min (ms)': round(row['min'], 2) if row['min'] is not None else None,
+                    'Max (ms)': round(row['max'], 2) if row['max'] is not None else None,
+                    'Pierderi (%)': round(row['loss_rate'] * 100, 2) if row['loss_rate'] is not None else None
+                } for ip, row in summary.items()]
+                if history_data:
+                    st.dataframe(pd.DataFrame(history_data), use_container_width=True)
+                else:
+                    st.info("Nu există încă date salvate pentru acest interval")
     
     with tab3:
         st.header("Viteza Internet în Timp Real")
         
-        if not speed_tester.speed_data:
+        speed_status = state['speed_status']
+        if speed_status['testing']:
+            st.caption("⏳ Test de viteză în desfășurare (proces separat)...")
+        elif speed_status['continuous'] and speed_status['next_test_at']:
+            st.caption(f"⏱ Următorul test la {datetime.fromtimestamp(speed_status['next_test_at']):%H:%M:%S}")
+        if speed_status['last_error']:
+            st.warning(f"⚠ Ultimul test a eșuat: {speed_status['last_error']}")
+        
+        if not state['speed']:
             st.info("Porniți monitorizarea pentru a vedea viteza internetului")
         else:
             # Creează grafice pentru viteza internet
-            speed_list = list(speed_tester.speed_data)
+            speed_list = state['speed']
             
             if speed_list:
                 # DataFrame pentru date
@@ -231,7 +378,7 @@ def main():
                 df_speed = df_speed.sort_values('timestamp')
                 
                 # Grafic viteze
-                fig_speed = make_subplots(
+                fig_speed = plotly_subplots.make_subplots(
                     rows=2, cols=1,
                     subplot_titles=('Viteza Download/Upload (Mbps)', 'Ping (ms)'),
                     vertical_spacing=0.1
@@ -269,22 +416,14 @@ def main():
                 with col3:
                     st.metric("Ping", f"{latest['ping']:.2f} ms")
     
-    # Auto-refresh
-    if auto_refresh:
-        time.sleep(refresh_interval)
-        st.rerun()
+    UI_RENDER_SECONDS.observe(time.perf_counter() - render_started)
+
+    with st.sidebar.expander("⏱ Profil pornire"):
+        st.text(PROFILE.format())
 
-def get_speed_text(status):
-    """Returnează textul pentru viteza estimată"""
-    speed_map = {
-        'excellent': '1000 Mbps',
-        'good': '100 Mbps', 
-        'fair': '10 Mbps',
-        'slow': '<10 Mbps',
-        'down': 'DOWN',
-        'unknown': 'UNKNOWN'
-    }
-    return speed_map.get(status, 'UNKNOWN')
+    # Auto-refresh: temporizatorul rulează în browser, scriptul se termină imediat
+    if auto_refresh:
+        schedule_refresh(refresh_interval)
 
 if __name__ == "__main__":
     main()
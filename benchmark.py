@@ -0,0 +1,349 @@
+import argparse
+import ipaddress
+import json
+import multiprocessing
+import os
+import selectors
+import socket
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from utils.arp_sweep import ArpSweeper
+from utils.charts import build_device_figure, build_sparkline_figure, fleet_sparklines, paginate
+from utils.distributed import DistributedPingMonitor, ProbeWorker
+from utils.live_api import LiveApiServer, LiveFeed
+from utils.nmap_stream import parse_nmap_xml
+from utils.passive_discovery import PassiveDiscovery, write_pcap
+from utils.ping_monitor import PingMonitor
+from utils.service_scanner import ServiceScanner
+from utils.simulation import LoopbackServices, SimulatedNetwork, TraceReplayer
+from utils.sla import SLA_WINDOWS, SlaAggregator
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark Network Monitor pe rețele simulate")
+    parser.add_argument('--hosts', type=int, nargs='+', default=[10, 100, 1000, 10000],
+                        help="Dimensiunile rețelelor simulate")
+    parser.add_argument('--duration', type=float, default=5.0, help="Secunde de probe per dimensiune")
+    parser.add_argument('--interval', type=float, default=1.0, help="Intervalul de probe per host")
+    parser.add_argument('--rtt', type=float, default=5.0, help="RTT mediu simulat (ms)")
+    parser.add_argument('--jitter', type=float, default=2.0, help="Deviația RTT (ms)")
+    parser.add_argument('--loss', type=float, default=0.01, help="Rata de pierderi")
+    parser.add_argument('--distribution', default='lognormal',
+                        choices=['lognormal', 'normal', 'uniform', 'constant'])
+    parser.add_argument('--max-history', type=int, default=300, help="Eșantioane per host (memorie)")
+    parser.add_argument('--scan-rate', type=float, default=20000, help="Pachete/s pentru sweep-ul simulat")
+    parser.add_argument('--service-hosts', type=int, default=1000,
+                        help="Host-uri loopback (maxim) pentru scanarea de servicii")
+    parser.add_argument('--page-size', type=int, default=50, help="Host-uri per pagină în grafice")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Măsoară și modul distribuit cu N procese worker (0 = doar local)")
+    parser.add_argument('--subscribers', type=int, default=0,
+                        help="Măsoară și fluxul SSE cu N clienți conectați (0 = fără)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--replay', help="Redă o urmă JSON Lines înregistrată (collector.py --record-trace)")
+    parser.add_argument('--replay-db', help="Redă eșantioanele brute dintr-o bază TimeSeriesStore")
+    parser.add_argument('--since', type=float, default=3600, help="Secunde de istoric pentru --replay-db")
+    parser.add_argument('--speed', type=float, default=60.0, help="Factorul de accelerare la redare")
+    parser.add_argument('--json', action='store_true', help="Rezultatele ca JSON")
+    return parser.parse_args()
+
+def bench_probes(network: SimulatedNetwork, duration: float, interval: float) -> Dict:
+    """Throughput-ul ciclului de probe și abaterea planificatorului față de cadența cerută"""
+    sockets = []
+
+    def sock_factory():
+        sock, raw = network.sock_factory()
+        sockets.append(sock)
+        return sock, raw
+
+    # Fără jitter și backoff: abaterea măsurată este doar eroarea planificatorului
+    monitor = PingMonitor(max_history=64, interval=interval, sock_factory=sock_factory, jitter=0, backoff=False)
+    started = time.monotonic()
+    monitor.start_monitoring([{'ip': ip, 'hostname': ip} for ip in network.hosts])
+    time.sleep(duration)
+    sent_at = {ip: list(times) for ip, times in sockets[0].sent_at.items()}
+    monitor.stop_monitoring()
+
+    # Throughput pe cicluri complete, fără primul ciclu (fazele host-urilor încă se așază)
+    cycles = max(1, int((duration - interval) / interval))
+    window_start = started + interval
+    window_end = window_start + cycles * interval
+    sent = sum(1 for times in sent_at.values() for t in times if window_start <= t < window_end)
+
+    gaps = np.concatenate([np.diff(times) for times in sent_at.values() if len(times) > 1] or [[]])
+    lag = np.abs(gaps - interval) * 1000
+    return {
+        'probes_per_s': round(sent / (cycles * interval), 1),
+        'expected_per_s': round(len(network.hosts) / interval, 1),
+        'lag_p50_ms': round(float(np.percentile(lag, 50)), 2) if len(lag) else None,
+        'lag_p99_ms': round(float(np.percentile(lag, 99)), 2) if len(lag) else None,
+    }
+
+def _simulated_worker(address: Tuple[str, int], worker_id: str, count: int, kwargs: Dict):
+    # Fiecare proces regenerează aceeași rețea simulată din seed
+    network = SimulatedNetwork.generate(count, **kwargs)
+    ProbeWorker(address, worker_id, batch_interval=0.2, sock_factory=network.sock_factory).run()
+
+def bench_distributed(network: SimulatedNetwork, workers: int, duration: float, interval: float,
+                      network_kwargs: Dict) -> Dict:
+    """Rezultate agregate la coordonator cu N workeri și timpul de rebalansare după căderea unuia"""
+    arrivals = {}
+    monitor = DistributedPingMonitor(port=0, max_history=64, interval=interval, use_icmp_engine=False)
+    monitor.add_listener(lambda host, *_: arrivals.__setitem__(host, time.monotonic()))
+    received = []
+    monitor.add_listener(lambda *_: received.append(time.monotonic()))
+    address = ('127.0.0.1', monitor.coordinator.port)
+    processes = [multiprocessing.Process(target=_simulated_worker, daemon=True,
+                                         args=(address, f'worker-{i}', len(network.hosts), network_kwargs))
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+    deadline = time.monotonic() + 10
+    while len(monitor.coordinator.workers()) < workers and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    monitor.start_monitoring([{'ip': ip, 'hostname': ip} for ip in network.hosts])
+    time.sleep(duration)
+    window_end = time.monotonic()
+    window_start = window_end - max(interval, duration - interval)
+    rate = sum(1 for t in received if window_start <= t < window_end) / (window_end - window_start)
+
+    # Oprește brusc un worker: shard-ul lui trebuie preluat de ceilalți
+    with monitor.coordinator._lock:
+        orphaned = list(monitor.coordinator._workers['worker-0'].hosts)
+    killed_at = time.monotonic()
+    processes[0].kill()
+    rebalance = None
+    while time.monotonic() - killed_at < 10 * interval + 5:
+        if all(arrivals.get(host, 0) > killed_at for host in orphaned):
+            rebalance = time.monotonic() - killed_at
+            break
+        time.sleep(0.01)
+
+    monitor.stop_monitoring()
+    monitor.close()
+    for process in processes:
+        process.kill()
+        process.join(timeout=1)
+    return {'workers': workers, 'dist_probes_per_s': round(rate, 1),
+            'rebalance_s': round(rebalance, 2) if rebalance is not None else None}
+
+def _sse_clients(port: int, count: int, duration: float, results):
+    # Clienții rulează în alt proces: CPU-ul măsurat în colector este doar cel al serverului
+    selector = selectors.DefaultSelector()
+    for _ in range(count):
+        sock = socket.create_connection(('127.0.0.1', port))
+        sock.sendall(b'GET /api/stream?types=samples,status HTTP/1.1\r\nHost: bench\r\n\r\n')
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ)
+    received = events = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        for key, _mask in selector.select(0.1):
+            try:
+                data = key.fileobj.recv(1 << 16)
+            except BlockingIOError:
+                continue
+            received += len(data)
+            events += data.count(b'\nevent: ')
+    for key in list(selector.get_map().values()):
+        key.fileobj.close()
+    results.put({'bytes': received, 'events': events})
+
+def bench_live_api(network: SimulatedNetwork, subscribers: int, duration: float, interval: float) -> Dict:
+    """CPU-ul procesului cu probe și N abonați SSE, plus volumul livrat fiecărui abonat"""
+    monitor = PingMonitor(max_history=64, interval=interval, sock_factory=network.sock_factory)
+    feed = LiveFeed(monitor, batch_interval=1.0)
+    api = LiveApiServer(feed, port=0, max_subscribers=subscribers + 10)
+    api.start()
+    monitor.start_monitoring([{'ip': ip, 'hostname': ip} for ip in network.hosts])
+    results = multiprocessing.Queue()
+    clients = multiprocessing.Process(target=_sse_clients, args=(api.port, subscribers, duration + 1, results))
+    clients.start()
+    deadline = time.monotonic() + 10
+    while feed.subscribers < subscribers and time.monotonic() < deadline:
+        time.sleep(0.05)
+    cpu_started, started = time.process_time(), time.monotonic()
+    time.sleep(duration)
+    cpu = (time.process_time() - cpu_started) / (time.monotonic() - started)
+    delivered = results.get(timeout=duration + 10)
+    clients.join(timeout=2)
+    resyncs = sum(s.resyncs for s in feed._subscribers)
+    monitor.stop_monitoring()
+    api.stop()
+    return {'sse_clients': subscribers, 'sse_cpu_pct': round(cpu * 100, 1),
+            'sse_kb_per_client_s': round(delivered['bytes'] / subscribers / (duration + 1) / 1024, 1),
+            'sse_resyncs': resyncs}
+
+def bench_memory(network: SimulatedNetwork, max_history: int) -> Tuple[Dict, PingMonitor]:
+    """Memoria per host cu istoricul plin (ring buffer-ele NumPy + ping_data)"""
+    hosts = list(network.hosts)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    monitor = PingMonitor(max_history=max_history, use_icmp_engine=False)
+    now = time.time()
+    for ip in hosts:
+        monitor._init_host(ip, ip)
+    models = network.hosts
+    for i in range(max_history):
+        ts = now - (max_history - i)
+        for ip in hosts:
+            rtt = models[ip].sample()
+            status = 'down' if rtt is None else monitor.determine_speed_status(rtt)
+            monitor.history_store.append(ip, ts, rtt, status, rtt is None)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return {'bytes_per_host': int(used / len(hosts))}, monitor
+
+def bench_scan(network: SimulatedNetwork, rate: float) -> Dict:
+    """Durata unui sweep complet al rețelei simulate"""
+    sweeper = ArpSweeper(network.arp_transport, rate=rate, timeout=0.2, retries=0)
+    started = time.perf_counter()
+    found = sum(1 for _ in sweeper.sweep(network.network_range()))
+    return {'scan_s': round(time.perf_counter() - started, 3), 'found': found}
+
+def bench_services(count: int) -> Dict:
+    """Scanarea de servicii pe loopback: 2 listeneri (unul cu banner) și 2 porturi închise per host"""
+    services = LoopbackServices(['SSH-2.0-bench', None], closed=2).start()
+    # Toată rețeaua 127.0.0.0/8 este loopback; listenerii răspund doar pe 127.0.0.1
+    first = int(ipaddress.ip_address('127.0.0.1'))
+    ips = [str(ipaddress.ip_address(first + i)) for i in range(count)]
+    scanner = ServiceScanner(services.open_ports + services.closed_ports, grab_banners=True, banner_timeout=0.5)
+    try:
+        started = time.perf_counter()
+        found = sum(len(result['open']) for result in scanner.stream(ips))
+        elapsed = time.perf_counter() - started
+    finally:
+        services.close()
+    return {'svc_probes_s': int(count * len(scanner.ports) / elapsed), 'svc_open': found}
+
+def bench_passive(network: SimulatedNetwork) -> Dict:
+    """Viteza de ingestie a unei capturi pasive (ARP/DHCP/mDNS) a întregii rețele"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'capture.pcap')
+        write_pcap(path, network.capture_frames())
+        found = set()
+        stats = PassiveDiscovery(lambda device: found.add(device['ip'])).replay_pcap(path)
+    return {'passive_fps': int(stats['frames_per_s']), 'passive_found': len(found)}
+
+def bench_nmap_xml(network: SimulatedNetwork) -> Dict:
+    """Parsarea incrementală a unei ieșiri nmap -oX pentru toată rețeaua (cu porturi deschise)"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'scan.xml')
+        with open(path, 'wb') as f:
+            network.write_nmap_xml(f, open_ports=(22, 80, 443))
+        tracemalloc.start()
+        started = time.perf_counter()
+        found = sum(1 for _ in parse_nmap_xml(path))
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {'nmap_xml_hosts_s': int(found / max(elapsed, 1e-9)), 'nmap_xml_peak_kb': round(peak / 1024, 1)}
+
+def bench_sla(network: SimulatedNetwork, samples: int = 200000) -> Dict:
+    """Ingestia agregatorului SLA și durata rapoartelor pe 1h/1d/30d pentru toată flota"""
+    hosts = list(network.hosts)
+    per_host = max(20, samples // len(hosts))
+    now = time.time()
+    # Eșantioanele acoperă 30 de zile, ca rapoartele să atingă toate bucket-urile
+    times = np.linspace(now - SLA_WINDOWS['30d'], now, per_host)
+    sla = SlaAggregator()
+    started = time.perf_counter()
+    for ts in times:
+        for ip in hosts:
+            rtt = network.hosts[ip].sample()
+            sla(ip, ts, rtt, '', rtt is None)
+    sla.flush()
+    ingest = time.perf_counter() - started
+    row = {'sla_samples_s': int(per_host * len(hosts) / ingest),
+           'sla_bytes_per_host': int(sla.memory_usage() / len(hosts))}
+    for window in SLA_WINDOWS:
+        started = time.perf_counter()
+        sla.report(window, now=now)
+        row[f'sla_{window}_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return row
+
+def bench_figures(monitor: PingMonitor, page_size: int) -> Dict:
+    """Timpul de construire a datelor și figurilor pentru o pagină de dashboard"""
+    ips = list(monitor.ping_data)
+    started = time.perf_counter()
+    timestamps, rtts = monitor.history_store.series_matrix(ips, 300)
+    sparklines = fleet_sparklines(ips, timestamps, rtts, 40)
+    prepared = time.perf_counter()
+    hosts = {ip: {'hostname': ip, 'status': monitor.ping_data[ip]['status'],
+                  'latest': monitor.get_latest(ip), 'sparkline': sparklines[ip]} for ip in ips}
+    page_hosts, _pages = paginate(hosts, 0, page_size)
+    build_device_figure(page_hosts).to_dict()
+    build_sparkline_figure(page_hosts).to_dict()
+    finished = time.perf_counter()
+    return {'sparklines_ms': round((prepared - started) * 1000, 1),
+            'figures_ms': round((finished - prepared) * 1000, 1)}
+
+def run_replay(args) -> Dict:
+    if args.replay:
+        replayer = TraceReplayer.from_file(args.replay, speed=args.speed)
+    else:
+        from utils.timeseries_store import TimeSeriesStore
+        store = TimeSeriesStore(args.replay_db)
+        replayer = TraceReplayer.from_store(store, time.time() - args.since, speed=args.speed)
+        store.close()
+    monitor = PingMonitor(max_history=args.max_history, use_icmp_engine=False)
+    for host in replayer.hosts:
+        monitor._init_host(host, host)
+    result = replayer.replay(monitor.record_result)
+    result['hosts'] = len(replayer.hosts)
+    return result
+
+def print_table(rows: List[Dict]):
+    columns = list(rows[0])
+    widths = {c: max(len(c), *(len(str(r.get(c))) for r in rows)) for c in columns}
+    print('  '.join(c.rjust(widths[c]) for c in columns))
+    for row in rows:
+        print('  '.join(str(row.get(c)).rjust(widths[c]) for c in columns))
+
+def main():
+    args = parse_args()
+    if args.replay or args.replay_db:
+        result = run_replay(args)
+        print(json.dumps(result) if args.json else
+              f"Redare: {result['samples']} probe, {result['hosts']} host-uri în {result['elapsed']:.2f}s "
+              f"({result['rate']:.0f} probe/s, lag p99 {result['lag_p99_ms']:.2f} ms)")
+        return
+
+    # Prima construire de figuri include importurile plotly - nu o măsurăm
+    build_device_figure([]).to_dict()
+
+    rows = []
+    for count in args.hosts:
+        network_kwargs = dict(mean=args.rtt, jitter=args.jitter, loss=args.loss,
+                              distribution=args.distribution, seed=args.seed)
+        network = SimulatedNetwork.generate(count, **network_kwargs)
+        row = {'hosts': count}
+        row.update(bench_probes(network, args.duration, args.interval))
+        if args.workers:
+            row.update(bench_distributed(network, args.workers, args.duration, args.interval, network_kwargs))
+        if args.subscribers:
+            row.update(bench_live_api(network, args.subscribers, args.duration, args.interval))
+        memory, monitor = bench_memory(network, args.max_history)
+        row.update(memory)
+        row.update(bench_scan(network, args.scan_rate))
+        row.update(bench_services(min(count, args.service_hosts)))
+        row.update(bench_passive(network))
+        row.update(bench_nmap_xml(network))
+        row.update(bench_sla(network))
+        row.update(bench_figures(monitor, args.page_size))
+        rows.append(row)
+        if not args.json:
+            print(f"✓ {count} host-uri", flush=True)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import os
+import signal
+import threading
+
+from utils.collector_service import CollectorServer, DEFAULT_HOST, DEFAULT_PORT
+from utils.distributed import DistributedPingMonitor, parse_address
+from utils.live_api import DEFAULT_API_PORT, LiveApiServer, LiveFeed
+from utils.alerting import AlertEngine, FileSink, WebhookSink
+from utils.metrics import MetricsServer
+from utils.network_scanner import NetworkScanner
+from utils.ping_monitor import PingMonitor
+from utils.simulation import TraceRecorder
+from utils.speed_tester import InternetSpeedTester
+from utils.timeseries_store import TimeSeriesStore
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Colector Network Monitor (fără UI)")
+    parser.add_argument('--network', help="Rețelele scanate, separate prin virgulă (implicit: detectate automat)")
+    parser.add_argument('--interface', action='append', help="Scanează doar aceste interfețe (repetabil)")
+    parser.add_argument('--interface-rate', type=float, default=500, help="Pachete/s de descoperire per interfață")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="Adresa de publicare a snapshot-urilor")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Portul de publicare")
+    parser.add_argument('--db', default=os.environ.get('NETWORK_MONITOR_DB', 'data/network_monitor.db'),
+                        help="Fișierul SQLite pentru istoricul persistent")
+    parser.add_argument('--scan-interval', type=float, default=60, help="Secunde între citirile inventarului")
+    parser.add_argument('--speed-interval', type=float, default=600, help="Secunde între testele de viteză")
+    parser.add_argument('--throughput-url', help="Server de throughput propriu (ex. http://nas:8766) în locul speedtest-cli")
+    parser.add_argument('--throughput-streams', type=int, default=4, help="Stream-uri paralele pentru testul de throughput")
+    parser.add_argument('--record-trace', help="Înregistrează probele într-un fișier JSON Lines (pentru benchmark.py --replay)")
+    parser.add_argument('--max-history', type=int, default=1800, help="Eșantioane ping păstrate în memorie per host")
+    parser.add_argument('--max-pps', type=float, help="Limita globală de probe ping pe secundă")
+    parser.add_argument('--probe-jitter', type=float, default=0.1, help="Jitter-ul probelor, ca fracție din interval")
+    parser.add_argument('--no-backoff', action='store_true', help="Sondează host-urile căzute la intervalul normal")
+    parser.add_argument('--passive', action='store_true', help="Ascultă ARP/DHCP/mDNS pentru dispozitive noi (root + scapy)")
+    parser.add_argument('--passive-iface', help="Interfața ascultată pasiv (implicit: cea implicită)")
+    parser.add_argument('--coordinator', help="Mod coordonator: probele rulează pe workeri conectați la host:port")
+    parser.add_argument('--alerts-file', help="Scrie evenimentele de alertă într-un fișier JSON Lines")
+    parser.add_argument('--alert-webhook', help="Trimite evenimentele de alertă prin POST la acest URL")
+    parser.add_argument('--alert-repeat', type=float, help="Repetă notificarea alertelor active la N secunde")
+    parser.add_argument('--metrics-port', type=int, default=9105, help="Portul endpoint-ului /metrics (0 = dezactivat)")
+    parser.add_argument('--api-port', type=int, default=DEFAULT_API_PORT,
+                        help="Portul API-ului HTTP cu fluxul SSE /api/stream (0 = dezactivat)")
+    parser.add_argument('--sla-state', default='data/sla.npz',
+                        help="Fișierul în care se păstrează agregările SLA între reporniri")
+    parser.add_argument('--sla-save-interval', type=float, default=300, help="Secunde între salvările stării SLA")
+    parser.add_argument('--api-batch', type=float, default=1.0, help="Secunde între loturile trimise abonaților SSE")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    store = TimeSeriesStore(args.db)
+    if args.coordinator:
+        # Host-urile se împart între workeri (python -m utils.distributed --coordinator ...)
+        coordinator_host, coordinator_port = parse_address(args.coordinator)
+        monitor = DistributedPingMonitor(coordinator_host, coordinator_port,
+                                         max_history=args.max_history, store=store)
+    else:
+        monitor = PingMonitor(max_history=args.max_history, store=store, jitter=args.probe_jitter,
+                              max_pps=args.max_pps, backoff=not args.no_backoff)
+    if monitor.sla.load(args.sla_state):
+        print(f"Agregări SLA reîncărcate din {args.sla_state}")
+    monitor.sla.start_autosave(args.sla_state, args.sla_save_interval)
+    recorder = None
+    if args.record_trace:
+        recorder = TraceRecorder(args.record_trace)
+        monitor.add_listener(recorder)
+    sinks = []
+    if args.alerts_file:
+        sinks.append(FileSink(args.alerts_file))
+    if args.alert_webhook:
+        sinks.append(WebhookSink(args.alert_webhook))
+    alerts = AlertEngine(sinks=sinks, repeat_interval=args.alert_repeat)
+    monitor.add_listener(alerts)
+    scanner = NetworkScanner(interface_rate=args.interface_rate)
+    if args.passive and not scanner.start_passive(args.passive_iface):
+        print("Descoperirea pasivă necesită scapy și root - continui doar cu scanări active")
+    network = args.network
+    if network is None and args.interface:
+        network = scanner.get_local_network(args.interface)
+    speed_tester = InternetSpeedTester(store=store, throughput_url=args.throughput_url,
+                                       throughput_streams=args.throughput_streams)
+    collector = CollectorServer(
+        scanner,
+        monitor,
+        speed_tester,
+        network=network,
+        host=args.host,
+        port=args.port,
+        scan_interval=args.scan_interval,
+        speed_interval=args.speed_interval,
+        alerts=alerts,
+        store=store
+    )
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+
+    metrics = None
+    if args.metrics_port:
+        metrics = MetricsServer(args.host, args.metrics_port)
+        metrics.start()
+    api = None
+    if args.api_port:
+        feed = LiveFeed(monitor, scanner, speed_tester, alerts, batch_interval=args.api_batch)
+        api = LiveApiServer(feed, args.host, args.api_port, snapshot=collector.snapshot_payload)
+        api.start()
+
+    collector.start()
+    print(f"Colector pornit: rețea {collector.network}, snapshot-uri pe {args.host}:{args.port}")
+    if metrics:
+        print(f"Metrici Prometheus pe http://{args.host}:{metrics.port}/metrics")
+    if api:
+        print(f"API live pe http://{args.host}:{api.port}/api/stream")
+    stopped.wait()
+
+    if api:
+        api.stop()
+    collector.stop()
+    scanner.stop_passive()
+    if args.coordinator:
+        monitor.close()
+    if metrics:
+        metrics.stop()
+    alerts.close()
+    monitor.sla.stop_autosave()
+    monitor.sla.save(args.sla_state)
+    store.close()
+    if recorder:
+        recorder.close()
+    print("Colector oprit")
+
+if __name__ == "__main__":
+    main()
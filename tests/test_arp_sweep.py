@@ -0,0 +1,32 @@
+from utils.arp_sweep import ArpSweeper, ScriptedResponder
+
+
+class ChattyResponder(ScriptedResponder):
+    """Pe lângă răspunsurile cerute, vede ARP gratuit de la host-uri din afara țintelor"""
+
+    def replies(self):
+        return [('192.168.1.50', 'AA:BB:CC:00:00:50')] + super().replies()
+
+
+def test_sweep_ignores_replies_outside_targets():
+    hosts = {'10.0.0.1': 'AA:BB:CC:00:00:01', '10.0.0.2': 'AA:BB:CC:00:00:02'}
+    sweeper = ArpSweeper(lambda: ChattyResponder(hosts), rate=10000, timeout=0.2, retries=0)
+    found = {d['ip'] for d in sweeper.sweep('10.0.0.0/29')}
+    assert found == {'10.0.0.1', '10.0.0.2'}
+
+
+def test_sweep_hosts_waits_for_real_targets():
+    hosts = {'10.0.0.1': 'AA:BB:CC:00:00:01', '10.0.0.9': 'AA:BB:CC:00:00:09'}
+    # O singură țintă: răspunsul străin nu trebuie să încheie sweep-ul înainte ca ținta să răspundă
+    sweeper = ArpSweeper(lambda: ChattyResponder(hosts, delay=0.05), rate=10000, timeout=0.5, retries=0)
+    assert [d['ip'] for d in sweeper.sweep_hosts(['10.0.0.9'])] == ['10.0.0.9']
+
+
+def test_sweep_sharded_streams_hosts_from_worker_processes():
+    hosts = {f'10.0.{i}.{j}': f'AA:BB:CC:00:{i:02X}:{j:02X}' for i in range(4) for j in (1, 77, 254)}
+    hosts['10.0.9.1'] = 'AA:BB:CC:00:09:01'
+    sweeper = ArpSweeper(lambda: ScriptedResponder(hosts, seed=1), rate=100000, timeout=0.3, retries=0)
+    devices = list(sweeper.sweep_sharded('10.0.0.0/22', workers=2))
+    # Fiecare host din /22 apare o singură dată, cu MAC-ul lui; cel din afara range-ului nu
+    assert sorted(d['ip'] for d in devices) == sorted(ip for ip in hosts if ip != '10.0.9.1')
+    assert all(d['mac'] == hosts[d['ip']] for d in devices)
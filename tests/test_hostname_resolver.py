@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from utils.hostname_resolver import HostnameCache, HostnameResolver
+from utils.simulation import StubDnsServer
+
+
+@pytest.fixture
+def dns():
+    server = StubDnsServer({'10.0.0.1': 'router.lan', '10.0.0.2': 'nas.lan'}, silent=['10.0.0.9']).start()
+    yield server
+    server.close()
+
+
+def make_resolver(server, **kwargs):
+    host, port = server.address
+    return HostnameResolver(nameserver=host, port=port, use_mdns=False, **kwargs)
+
+
+def test_ptr_names(dns):
+    resolver = make_resolver(dns)
+    assert resolver.resolve_many(['10.0.0.1', '10.0.0.2']) == {'10.0.0.1': 'router.lan', '10.0.0.2': 'nas.lan'}
+
+
+def test_nxdomain_is_cached_negatively(dns):
+    resolver = make_resolver(dns, timeout=2.0, cache=HostnameCache(negative_ttl=0.2))
+    started = time.monotonic()
+    assert resolver.resolve_many(['10.0.0.3']) == {'10.0.0.3': None}
+    # NXDOMAIN încheie cererea imediat, fără să aștepte timeout-ul
+    assert time.monotonic() - started < 1.0
+    assert resolver.cached(['10.0.0.3']) == ({'10.0.0.3': None}, [])
+
+    resolver.resolve_many(['10.0.0.3'])
+    assert len(dns.queries) == 1
+    time.sleep(0.25)
+    assert resolver.cached(['10.0.0.3']) == ({}, ['10.0.0.3'])
+    resolver.resolve_many(['10.0.0.3'])
+    assert len(dns.queries) == 2
+
+
+def test_timeout_returns_none(dns):
+    resolver = make_resolver(dns, timeout=0.2)
+    started = time.monotonic()
+    assert resolver.resolve_many(['10.0.0.9', '10.0.0.1']) == {'10.0.0.9': None, '10.0.0.1': 'router.lan'}
+    elapsed = time.monotonic() - started
+    assert 0.15 < elapsed < 1.0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = HostnameCache(max_size=2)
+    cache.put('10.0.0.1', 'a')
+    cache.put('10.0.0.2', 'b')
+    assert cache.get('10.0.0.1') == (True, 'a')
+    cache.put('10.0.0.3', 'c')
+    assert cache.get('10.0.0.2') == (False, None)
+    assert cache.get('10.0.0.1') == (True, 'a')
+    assert cache.get('10.0.0.3') == (True, 'c')
+    assert len(cache) == 2
@@ -0,0 +1,22 @@
+from utils.inventory import IP_CHANGED, JOINED, DeviceInventory
+
+
+def test_changed_mac_releases_previous_mac():
+    inventory = DeviceInventory()
+    inventory.upsert({'ip': '10.0.0.5', 'mac': 'aa:bb:cc:00:00:01'}, now=1)
+    inventory.update('10.0.0.5', mac='aa:bb:cc:00:00:02')
+    assert inventory.by_mac('AA:BB:CC:00:00:01') is None
+    assert inventory.by_mac('AA:BB:CC:00:00:02')['ip'] == '10.0.0.5'
+
+    # Vechiul MAC apărut la altă adresă este un dispozitiv nou, nu o mutare a celui existent
+    events = inventory.upsert({'ip': '10.0.0.9', 'mac': 'AA:BB:CC:00:00:01'}, now=2)
+    assert [e['type'] for e in events] == [JOINED]
+    assert inventory.get('10.0.0.5')['mac'] == 'AA:BB:CC:00:00:02'
+
+
+def test_learned_mac_is_indexed_for_moves():
+    inventory = DeviceInventory()
+    inventory.upsert({'ip': '10.0.0.5', 'mac': 'N/A'}, now=1)
+    inventory.upsert({'ip': '10.0.0.5', 'mac': 'AA:BB:CC:00:00:03'}, now=2)
+    events = inventory.upsert({'ip': '10.0.0.6', 'mac': 'AA:BB:CC:00:00:03'}, now=3)
+    assert [(e['type'], e.get('old_ip')) for e in events] == [(IP_CHANGED, '10.0.0.5')]
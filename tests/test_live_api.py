@@ -0,0 +1,14 @@
+from utils.live_api import Subscriber
+
+
+def test_overflow_resyncs_once_and_keeps_later_messages():
+    subscriber = Subscriber(['samples'], max_pending=100)
+    subscriber.offer('samples', b'x' * 80)
+    subscriber.offer('samples', b'y' * 80)
+    subscriber.offer('samples', b'z' * 10)
+    subscriber.offer('samples', b'w' * 10)
+
+    chunks = subscriber.take(0)
+    assert subscriber.resyncs == 1
+    assert b'event: resync' in chunks[0]
+    assert chunks[1:] == [b'z' * 10, b'w' * 10]
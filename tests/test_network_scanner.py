@@ -0,0 +1,33 @@
+import threading
+
+from utils.network_scanner import NetworkScanner
+
+
+def test_scans_do_not_share_device_list():
+    scanner = NetworkScanner()
+    scanner._local.quiet = True
+    results = {}
+
+    def scan(network_range):
+        # Fiecare fir își primește propria listă, fără să o suprascrie pe a celuilalt
+        results[network_range] = scanner._scan_simple_fallback(network_range)
+
+    threads = [threading.Thread(target=scan, args=(r,)) for r in ('10.0.0.0/24', '10.0.1.0/24')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert {d['ip'] for d in results['10.0.0.0/24']} == {'10.0.0.1', '10.0.0.100', '10.0.0.101', '10.0.0.50'}
+    assert {d['ip'] for d in results['10.0.1.0/24']} == {'10.0.1.1', '10.0.1.100', '10.0.1.101', '10.0.1.50'}
+    assert scanner.devices == []
+
+
+def test_devices_returns_copies_of_last_read():
+    scanner = NetworkScanner()
+    scanner._cache['10.0.0.0/24'] = {'scanned_at': 0, 'full_sweep_at': 0}
+    scanner.inventory.apply([{'ip': '10.0.0.1', 'mac': 'N/A', 'hostname': 'router', 'status': 'up'}], 0)
+
+    assert [d['ip'] for d in scanner._cached_devices('10.0.0.0/24')] == ['10.0.0.1']
+    scanner.devices[0]['hostname'] = 'changed'
+    assert scanner.devices[0]['hostname'] == 'router'
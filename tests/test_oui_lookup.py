@@ -0,0 +1,41 @@
+from utils.oui_lookup import BUNDLED_REGISTRY, OuiIndex, build_index, parse_registry
+
+IEEE_TEXT = """OUI/MA-L                                                    Organization
+company_id                                                  Organization
+                                                            Address
+
+10-E9-92   (hex)\t\tINGRAM MICRO SERVICES
+10E992     (base 16)\t\tINGRAM MICRO SERVICES
+\t\t\t\t100 CHEMIN DE BAILLOT
+\t\t\t\tFR
+
+00-50-C2                      (hex)                         RF Code
+F71000-F71FFF                 (base 16)                     RF Code
+                                                            Austin  TX  78758
+
+70-B3-D5   (hex)\t\tMedium Corp
+A00000-AFFFFF     (base 16)\t\tMedium Corp
+"""
+
+
+def test_parse_ieee_text_registry(tmp_path):
+    path = tmp_path / 'oui.txt'
+    path.write_text(IEEE_TEXT)
+    assert list(parse_registry(str(path))) == [
+        (0x10E992 << 24, 24, 'INGRAM MICRO SERVICES'),
+        (0x0050C2F71 << 12, 36, 'RF Code'),
+        (0x70B3D5A << 20, 28, 'Medium Corp'),
+    ]
+
+
+def test_bundled_registry_resolves_real_vendors(tmp_path):
+    path = str(tmp_path / 'oui.idx')
+    build_index([BUNDLED_REGISTRY], path)
+    index = OuiIndex(path)
+    try:
+        # Registrul inclus este cel IEEE complet, nu doar câteva prefixe de bază
+        assert len(index) > 30000
+        assert index.lookup_many(['B8:27:EB:00:00:01', '10:E9:92:00:00:01', '00:50:C2:F7:10:01']) == \
+            ['Raspberry Pi Foundation', 'INGRAM MICRO SERVICES', 'RF Code']
+    finally:
+        index.close()
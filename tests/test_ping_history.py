@@ -0,0 +1,32 @@
+import numpy as np
+
+from utils.ping_history import PingHistoryStore
+
+
+def test_growth_keeps_full_rows_in_order():
+    store = PingHistoryStore(max_history=1800, initial_columns=256)
+    for i in range(300):
+        store.append('10.0.0.1', 1000.0 + i, float(i), 'good', False)
+
+    records = store.records('10.0.0.1')
+    assert len(records) == 300
+    assert [r['timestamp'] for r in records] == [1000.0 + i for i in range(300)]
+    stats = store.stats('10.0.0.1')
+    assert stats['samples'] == 300
+    assert stats['min'] == 0.0
+    assert stats['p99'] <= 299.0
+    timestamps, rtt = store.series('10.0.0.1')
+    assert np.array_equal(rtt, np.arange(300, dtype=np.float32))
+
+
+def test_growth_with_several_hosts_and_wrap_at_max_history():
+    store = PingHistoryStore(max_history=600, initial_columns=100)
+    for i in range(1000):
+        store.append('a', float(i), float(i), 'good', False)
+        if i < 50:
+            store.append('b', float(i), float(i), 'good', False)
+
+    assert store.length('a') == 600
+    assert store.get('a', 0)['timestamp'] == 400.0
+    assert store.latest('a')['timestamp'] == 999.0
+    assert [r['timestamp'] for r in store.records('b')] == [float(i) for i in range(50)]
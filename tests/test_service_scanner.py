@@ -0,0 +1,38 @@
+import pytest
+
+from utils.service_scanner import ServiceScanner
+from utils.simulation import LoopbackServices
+
+
+@pytest.fixture
+def services():
+    listeners = LoopbackServices(['SSH-2.0-OpenSSH_9.6', '220 ftp ready', None], closed=2).start()
+    yield listeners
+    listeners.close()
+
+
+def test_loopback_services_stream_per_host(services):
+    ports = services.open_ports + services.closed_ports
+    scanner = ServiceScanner(ports, grab_banners=True, timeout=1.0, banner_timeout=0.5)
+    # 127.0.0.2 este tot loopback, dar listenerii ascultă doar pe 127.0.0.1
+    results = {r['ip']: r for r in scanner.stream(['127.0.0.1', '127.0.0.2'])}
+
+    assert set(results) == {'127.0.0.1', '127.0.0.2'}
+    local = results['127.0.0.1']
+    assert local['scanned'] == len(ports)
+    assert sorted(local['open']) == services.open_ports
+    assert {port: info['banner'] for port, info in local['open'].items()} == services.banners
+    assert all(info['rtt'] >= 0 for info in local['open'].values())
+    assert results['127.0.0.2']['open'] == {}
+
+
+def test_network_scanner_streams_with_requested_ports(services):
+    from utils.network_scanner import NetworkScanner
+
+    scanner = NetworkScanner()
+    ports = ','.join(str(port) for port in services.open_ports)
+    results = list(scanner.stream_services([{'ip': '127.0.0.1'}], ports, grab_banners=True))
+    assert [r['ip'] for r in results] == ['127.0.0.1']
+    assert {port: info['banner'] for port, info in results[0]['open'].items()} == services.banners
+    # Setul implicit al scanerului rămâne neschimbat
+    assert scanner.service_scanner.grab_banners is False
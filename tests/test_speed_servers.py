@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from utils.speed_servers import ServerIndex, json_servers_fetcher
+from utils.simulation import StubSpeedServer
+
+
+@pytest.fixture
+def stub():
+    server = StubSpeedServer({'fast': 0.0, 'slow': 0.05, 'down': None}).start()
+    yield server
+    server.close()
+
+
+def make_index(tmp_path, stub, **kwargs):
+    return ServerIndex(str(tmp_path / 'servers.json'), fetch_servers=json_servers_fetcher(stub.servers_url), **kwargs)
+
+
+def latency_requests(stub):
+    return sum(1 for path in stub.requests if path.endswith('/latency.txt'))
+
+
+def test_cached_list_is_not_refetched_within_ttl(tmp_path, stub):
+    index = make_index(tmp_path, stub)
+    assert index.best_server()['id'] == 'fast'
+    assert index.best_server()['id'] == 'fast'
+    assert stub.count('/servers.json') == 1
+
+
+def test_list_is_refetched_after_ttl(tmp_path, stub):
+    index = make_index(tmp_path, stub, ttl=60)
+    index.best_server()
+    index.fetched_at -= 61
+    index.best_server()
+    assert stub.count('/servers.json') == 2
+
+
+def test_fast_mode_reuses_cached_best_server(tmp_path, stub):
+    index = make_index(tmp_path, stub)
+    index.best_server()
+    measured = latency_requests(stub)
+    # Modul rapid nu re-măsoară; cel complet sondează din nou toți candidații
+    assert index.best_server(fast=True)['id'] == 'fast'
+    assert latency_requests(stub) == measured
+    index.best_server(fast=False)
+    assert latency_requests(stub) > measured
+
+
+def test_rank_expires_after_rank_ttl(tmp_path, stub):
+    index = make_index(tmp_path, stub, rank_ttl=60)
+    index.best_server()
+    measured = latency_requests(stub)
+    index.ranked_at -= 61
+    index.best_server(fast=True)
+    assert latency_requests(stub) > measured
+
+
+def test_degraded_ping_triggers_rerank(tmp_path, stub):
+    index = make_index(tmp_path, stub, degrade_factor=1.5)
+    baseline = index.best_server()['latency']
+    # Serverul ales s-a degradat între timp; un ping sub prag nu schimbă nimic
+    stub.delays['fast'] = 0.2
+    assert index.observe('fast', baseline * 1.2) is False
+    assert index.best_id == 'fast'
+    assert index.observe('fast', baseline * 10 + 1) is True
+    assert index.best_id == 'slow'
+
+
+def test_saved_index_survives_reload(tmp_path, stub):
+    index = make_index(tmp_path, stub)
+    best = index.best_server()
+    assert not os.path.exists(index.path + '.tmp')
+
+    # Fără fetcher: un index reîncărcat trebuie să răspundă din fișier, fără rețea
+    reloaded = ServerIndex(index.path)
+    requests = len(stub.requests)
+    assert reloaded.best_server(fast=True) == best
+    assert len(stub.requests) == requests
+    assert reloaded.latencies['down']['latency'] > reloaded.latencies['slow']['latency']
@@ -0,0 +1,12 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_worker_module_does_not_import_streamlit():
+    # Procesul worker importă doar modulul de test, fără Streamlit
+    code = "import sys, utils.speed_tester; print('streamlit' in sys.modules)"
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == 'False'
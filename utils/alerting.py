@@ -0,0 +1,382 @@
+import bisect
+import json
+import math
+import os
+import queue
+import threading
+import urllib.request
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.metrics import ALERTS_ACTIVE, ALERTS_FIRED, CALLBACK_ERRORS
+
+# Abaterea maximă (în deviații standard) cu care un eșantion poate muta EWMA
+OUTLIER_CLIP = 3.0
+
+
+class P2Quantile:
+    """Estimator P² (Jain & Chlamtac): o cuantilă în memorie constantă, O(1) per eșantion"""
+    __slots__ = ('p', 'heights', 'positions', 'desired', 'increments', 'count')
+
+    def __init__(self, p: float):
+        self.p = p
+        self.heights: List[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+        self.count = 0
+
+    def add(self, x: float):
+        self.count += 1
+        q = self.heights
+        if len(q) < 5:
+            bisect.insort(q, x)
+            return
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(q, x) - 1
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        # Ajustează markerii interiori spre pozițiile dorite (interpolare parabolică sau liniară)
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self) -> Optional[float]:
+        q = self.heights
+        if not q:
+            return None
+        if len(q) < 5:
+            return q[min(len(q) - 1, int(round(self.p * (len(q) - 1))))]
+        return q[2]
+
+
+class HostStats:
+    """Statistici incrementale per host: EWMA, pierderi pe fereastră, cuantilă, eșecuri consecutive"""
+    __slots__ = ('alpha', 'ewma', 'ewm_var', 'zscore', 'loss_ring', 'loss_index', 'losses',
+                 'samples', 'consecutive_failures', 'last_rtt', 'last_seen',
+                 'quantile', 'previous_quantile', 'quantile_window')
+
+    def __init__(self, alpha: float = 0.1, loss_window: int = 100, quantile: float = 0.95,
+                 quantile_window: int = 500):
+        self.alpha = alpha
+        self.ewma = None
+        self.ewm_var = 0.0
+        self.zscore = 0.0
+        self.loss_ring = bytearray(loss_window)
+        self.loss_index = 0
+        self.losses = 0
+        self.samples = 0
+        self.consecutive_failures = 0
+        self.last_rtt = None
+        self.last_seen = 0.0
+        # Două schițe alternante: cuantila urmărește comportamentul recent, nu tot istoricul
+        self.quantile = P2Quantile(quantile)
+        self.previous_quantile = None
+        self.quantile_window = quantile_window
+
+    def update(self, timestamp: float, response_time: Optional[float]):
+        lost = response_time is None
+        ring = self.loss_ring
+        if self.samples >= len(ring):
+            self.losses -= ring[self.loss_index]
+        ring[self.loss_index] = lost
+        self.losses += lost
+        self.loss_index = (self.loss_index + 1) % len(ring)
+        self.samples += 1
+        self.last_seen = timestamp
+
+        if lost:
+            self.consecutive_failures += 1
+            return
+        self.consecutive_failures = 0
+        self.last_rtt = response_time
+        if self.ewma is None:
+            self.ewma = response_time
+        else:
+            # Scorul z se calculează față de starea dinaintea eșantionului curent
+            diff = response_time - self.ewma
+            std = math.sqrt(self.ewm_var)
+            self.zscore = diff / std if std > 0 else 0.0
+            if std > 0:
+                # Un vârf izolat nu umflă imediat media și varianța (altfel anomalia se maschează singură)
+                diff = max(-OUTLIER_CLIP * std, min(OUTLIER_CLIP * std, diff))
+            self.ewma += self.alpha * diff
+            self.ewm_var = (1 - self.alpha) * (self.ewm_var + self.alpha * diff * diff)
+        self.quantile.add(response_time)
+        if self.quantile.count >= self.quantile_window:
+            self.previous_quantile = self.quantile
+            self.quantile = P2Quantile(self.quantile.p)
+
+    @property
+    def loss_rate(self) -> float:
+        window = min(self.samples, len(self.loss_ring))
+        return self.losses / window if window else 0.0
+
+    @property
+    def rtt_quantile(self) -> Optional[float]:
+        if self.previous_quantile is not None and self.quantile.count < self.quantile_window // 2:
+            return self.previous_quantile.value()
+        return self.quantile.value()
+
+    def metric(self, name: str) -> Optional[float]:
+        """Valoarea unei metrici folosite de reguli"""
+        if name == 'rtt_ewma':
+            return self.ewma
+        if name == 'rtt_quantile':
+            return self.rtt_quantile
+        if name == 'rtt_zscore':
+            return self.zscore if self.consecutive_failures == 0 else None
+        if name == 'loss_rate':
+            return self.loss_rate
+        if name == 'consecutive_failures':
+            return self.consecutive_failures
+        raise KeyError(name)
+
+    def to_dict(self) -> Dict:
+        quantile = self.rtt_quantile
+        return {
+            'samples': self.samples,
+            'rtt_ewma': round(self.ewma, 3) if self.ewma is not None else None,
+            'rtt_std': round(math.sqrt(self.ewm_var), 3),
+            'rtt_quantile': round(quantile, 3) if quantile is not None else None,
+            'loss_rate': round(self.loss_rate, 4),
+            'consecutive_failures': self.consecutive_failures,
+            'last_seen': self.last_seen,
+        }
+
+
+class Rule:
+    """Regulă de prag cu histerezis: declanșează la valoare >= fire, se rezolvă la <= clear"""
+
+    def __init__(self, name: str, metric: str, fire: float, clear: Optional[float] = None,
+                 for_samples: int = 1, min_samples: int = 0, severity: str = 'warning',
+                 message: str = ''):
+        self.name = name
+        self.metric = metric
+        self.fire = fire
+        self.clear = fire if clear is None else clear
+        self.for_samples = for_samples
+        self.min_samples = min_samples
+        self.severity = severity
+        self.message = message or f"{metric} >= {fire}"
+
+    def evaluate(self, stats: HostStats) -> Tuple[Optional[bool], Optional[float]]:
+        """(True = peste prag, False = sub pragul de rezolvare, None = zona de histerezis) și valoarea"""
+        if stats.samples < self.min_samples:
+            return None, None
+        value = stats.metric(self.metric)
+        if value is None:
+            return None, None
+        if value >= self.fire:
+            return True, value
+        if value <= self.clear:
+            return False, value
+        return None, value
+
+
+# Regulile implicite; pragurile de latență urmează treptele din PingMonitor.determine_speed_status
+DEFAULT_RULES = [
+    Rule('host_down', 'consecutive_failures', fire=3, clear=0, severity='critical',
+         message="Host-ul nu răspunde"),
+    Rule('packet_loss', 'loss_rate', fire=0.05, clear=0.02, min_samples=20,
+         message="Pierderi de pachete peste 5%"),
+    Rule('high_latency', 'rtt_ewma', fire=100, clear=80, min_samples=5,
+         message="Latență medie peste 100 ms"),
+    Rule('latency_p95', 'rtt_quantile', fire=200, clear=150, min_samples=50,
+         message="P95 al latenței peste 200 ms"),
+    Rule('latency_anomaly', 'rtt_zscore', fire=4, clear=2, for_samples=3, min_samples=30,
+         message="Latență anormală față de comportamentul obișnuit"),
+]
+
+
+class _AlertState:
+    __slots__ = ('streak', 'firing', 'since', 'notified_at', 'value')
+
+    def __init__(self):
+        self.streak = 0
+        self.firing = False
+        self.since = 0.0
+        self.notified_at = 0.0
+        self.value = None
+
+
+class FileSink:
+    """Scrie evenimentele de alertă într-un fișier JSON Lines"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+
+    def __call__(self, event: Dict):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+
+class WebhookSink:
+    """Trimite fiecare eveniment ca JSON printr-un POST HTTP (ex. un webhook local)"""
+
+    def __init__(self, url: str, timeout: float = 5.0, headers: Optional[Dict[str, str]] = None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = {'Content-Type': 'application/json', **(headers or {})}
+
+    def __call__(self, event: Dict):
+        request = urllib.request.Request(self.url, data=json.dumps(event).encode('utf-8'),
+                                         headers=self.headers, method='POST')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class AlertEngine:
+    """Evaluează regulile la fiecare eșantion, fără rescanarea istoricului; se atașează ca listener PingMonitor"""
+
+    def __init__(self, rules: Optional[Iterable[Rule]] = None, sinks: Iterable[Callable[[Dict], None]] = (),
+                 ewma_alpha: float = 0.1, loss_window: int = 100, quantile: float = 0.95,
+                 quantile_window: int = 500, repeat_interval: Optional[float] = None):
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.sinks = list(sinks)
+        self.ewma_alpha = ewma_alpha
+        self.loss_window = loss_window
+        self.quantile = quantile
+        self.quantile_window = quantile_window
+        self.repeat_interval = repeat_interval
+        self.stats: Dict[str, HostStats] = {}
+        self._states: Dict[Tuple[str, str], _AlertState] = {}
+        self._active: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.Lock()
+        # Sink-urile (ex. webhook) rulează în afara thread-ului de probe
+        self._events = queue.Queue()
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+        ALERTS_ACTIVE.set_function(lambda: len(self._active))
+
+    def add_sink(self, sink: Callable[[Dict], None]):
+        """Adaugă o destinație pentru evenimente (primește un dict per tranziție)"""
+        self.sinks.append(sink)
+
+    def __call__(self, host: str, timestamp: float, response_time: Optional[float],
+                 status: str, packet_loss: bool):
+        self.observe(host, timestamp, None if packet_loss else response_time)
+
+    def observe(self, host: str, timestamp: float, response_time: Optional[float]):
+        """Actualizează statisticile host-ului și evaluează regulile (O(reguli) per eșantion)"""
+        events = []
+        with self._lock:
+            stats = self.stats.get(host)
+            if stats is None:
+                stats = self.stats[host] = HostStats(self.ewma_alpha, self.loss_window,
+                                                     self.quantile, self.quantile_window)
+            stats.update(timestamp, response_time)
+            for rule in self.rules:
+                event = self._evaluate(host, rule, stats, timestamp)
+                if event:
+                    events.append(event)
+        for event in events:
+            self._events.put(event)
+
+    def _evaluate(self, host: str, rule: Rule, stats: HostStats, timestamp: float) -> Optional[Dict]:
+        key = (host, rule.name)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _AlertState()
+        breached, value = rule.evaluate(stats)
+        if value is not None:
+            state.value = value
+
+        if not state.firing:
+            state.streak = state.streak + 1 if breached else 0
+            if state.streak < rule.for_samples:
+                return None
+            state.firing = True
+            state.since = timestamp
+            state.notified_at = timestamp
+            event = self._event(host, rule, state, 'firing', timestamp)
+            self._active[key] = event
+            ALERTS_FIRED.labels(rule.name).inc()
+            return event
+
+        if breached is False:
+            # Deduplicare: o singură notificare de rezolvare, apoi starea revine la zero
+            state.firing = False
+            state.streak = 0
+            self._active.pop(key, None)
+            return self._event(host, rule, state, 'resolved', timestamp)
+
+        self._active[key]['value'] = value
+        if self.repeat_interval and timestamp - state.notified_at >= self.repeat_interval:
+            state.notified_at = timestamp
+            return self._event(host, rule, state, 'firing', timestamp)
+        return None
+
+    @staticmethod
+    def _event(host: str, rule: Rule, state: _AlertState, kind: str, timestamp: float) -> Dict:
+        return {
+            'host': host,
+            'rule': rule.name,
+            'severity': rule.severity,
+            'state': kind,
+            'value': round(state.value, 4) if state.value is not None else None,
+            'threshold': rule.fire if kind == 'firing' else rule.clear,
+            'message': rule.message,
+            'since': state.since,
+            'timestamp': timestamp,
+        }
+
+    def _dispatch(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            for sink in list(self.sinks):
+                try:
+                    sink(event)
+                except Exception as e:
+                    CALLBACK_ERRORS.labels('alert_sink').inc()
+                    print(f"Alert sink error: {e}")
+
+    def active(self) -> List[Dict]:
+        """Alertele în curs, cele critice și cele mai vechi primele"""
+        with self._lock:
+            alerts = [dict(event) for event in self._active.values()]
+        return sorted(alerts, key=lambda a: (a['severity'] != 'critical', a['since']))
+
+    def host_stats(self, host: str) -> Optional[Dict]:
+        """Statisticile curente ale unui host"""
+        with self._lock:
+            stats = self.stats.get(host)
+            return stats.to_dict() if stats else None
+
+    def forget(self, host: str):
+        """Elimină starea unui host scos din monitorizare"""
+        with self._lock:
+            self.stats.pop(host, None)
+            for key in [k for k in self._states if k[0] == host]:
+                self._states.pop(key, None)
+                self._active.pop(key, None)
+
+    def close(self):
+        """Golește coada de evenimente și oprește thread-ul de livrare"""
+        self._events.put(None)
+        self._thread.join(timeout=5)
@@ -0,0 +1,310 @@
+import functools
+import heapq
+import ipaddress
+import json
+import os
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.icmp_engine import IcmpProbeEngine, build_echo_request, parse_echo_reply
+
+class ScapyArpTransport:
+    """Transport real: cereri ARP broadcast prin scapy, răspunsuri colectate cu AsyncSniffer"""
+
+    def __init__(self, iface: Optional[str] = None):
+        self.iface = iface
+        self._replies = queue.Queue()
+        self._sniffer = None
+
+    def spec(self) -> Dict:
+        """Configurația transportului, serializabilă pentru procesele worker"""
+        return {'kind': 'scapy', 'iface': self.iface}
+
+    @staticmethod
+    def is_supported() -> bool:
+        """ARP brut necesită scapy și privilegii de root"""
+        try:
+            import scapy.all  # noqa: F401
+        except ImportError:
+            return False
+        return hasattr(os, 'geteuid') and os.geteuid() == 0
+
+    def open(self):
+        from scapy.all import AsyncSniffer
+        # Doar ARP reply (op = 2), filtrat în kernel prin BPF
+        self._sniffer = AsyncSniffer(iface=self.iface, filter='arp and arp[6:2] = 2',
+                                     store=False, prn=self._on_packet)
+        self._sniffer.start()
+        time.sleep(0.05)
+
+    def _on_packet(self, packet):
+        from scapy.all import ARP
+        if ARP in packet:
+            self._replies.put((packet[ARP].psrc, packet[ARP].hwsrc.upper()))
+
+    def send(self, ips: List[str]):
+        from scapy.all import ARP, Ether, sendp
+        packets = [Ether(dst='ff:ff:ff:ff:ff:ff') / ARP(pdst=ip) for ip in ips]
+        sendp(packets, iface=self.iface, verbose=False)
+
+    def replies(self) -> List[Tuple[str, str]]:
+        found = []
+        while True:
+            try:
+                found.append(self._replies.get_nowait())
+            except queue.Empty:
+                return found
+
+    def close(self):
+        if self._sniffer is not None:
+            try:
+                self._sniffer.stop()
+            except Exception:
+                pass
+            self._sniffer = None
+
+
+class IcmpSweepTransport:
+    """Transport ICMP echo (pentru rețele care nu sunt direct conectate sau fără root)"""
+
+    def __init__(self):
+        self._sock = None
+        self._raw = False
+        self._ident = os.getpid() & 0xffff
+        self._seq = 0
+
+    def spec(self) -> Dict:
+        return {'kind': 'icmp'}
+
+    @staticmethod
+    def is_supported() -> bool:
+        return IcmpProbeEngine.is_supported()
+
+    def open(self):
+        self._sock, self._raw = IcmpProbeEngine.open_socket()
+        self._sock.setblocking(False)
+        if not self._raw:
+            self._ident = self._sock.getsockname()[1] & 0xffff
+
+    def send(self, ips: List[str]):
+        for ip in ips:
+            self._seq = (self._seq + 1) & 0xffff
+            try:
+                self._sock.sendto(build_echo_request(self._ident, self._seq), (ip, 0))
+            except OSError:
+                pass
+
+    def replies(self) -> List[Tuple[str, str]]:
+        found = []
+        while True:
+            try:
+                packet, addr = self._sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError, OSError):
+                return found
+            parsed = parse_echo_reply(packet)
+            if parsed and (not self._raw or parsed[0] == self._ident):
+                found.append((addr[0], 'N/A'))
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+class ScriptedResponder:
+    """Transport fals pentru teste: răspunde din tabela ip -> mac cu întârziere și pierderi"""
+
+    def __init__(self, hosts: Dict[str, str], delay: float = 0.001, jitter: float = 0.0,
+                 loss: float = 0.0, seed: Optional[int] = None):
+        self.hosts = hosts
+        self.delay = delay
+        self.jitter = jitter
+        self.loss = loss
+        self.sent = 0
+        self._rng = random.Random(seed)
+        self._pending = []
+        self._seed = seed
+
+    def spec(self) -> Dict:
+        return {'kind': 'scripted', 'hosts': self.hosts, 'delay': self.delay, 'jitter': self.jitter,
+                'loss': self.loss, 'seed': self._seed}
+
+    def open(self):
+        pass
+
+    def send(self, ips: List[str]):
+        now = time.monotonic()
+        for ip in ips:
+            self.sent += 1
+            mac = self.hosts.get(ip)
+            if mac is None or self._rng.random() < self.loss:
+                continue
+            due = now + self.delay + self._rng.uniform(0, self.jitter)
+            heapq.heappush(self._pending, (due, ip, mac))
+
+    def replies(self) -> List[Tuple[str, str]]:
+        now = time.monotonic()
+        found = []
+        while self._pending and self._pending[0][0] <= now:
+            _due, ip, mac = heapq.heappop(self._pending)
+            found.append((ip, mac))
+        return found
+
+    def close(self):
+        self._pending = []
+
+
+TRANSPORTS = {'scapy': ScapyArpTransport, 'icmp': IcmpSweepTransport, 'scripted': ScriptedResponder}
+
+
+def transport_from_spec(spec: Dict):
+    """Reconstruiește un transport din configurația produsă de `spec()`"""
+    options = dict(spec)
+    return TRANSPORTS[options.pop('kind')](**options)
+
+
+def _device(ip: str, mac: str) -> Dict:
+    return {'ip': ip, 'mac': mac, 'hostname': 'N/A', 'status': 'up', 'vendor': 'N/A'}
+
+
+class ArpSweeper:
+    """Descoperire host-uri în loturi limitate ca rată, cu răspunsuri colectate asincron"""
+
+    def __init__(self, transport_factory: Optional[Callable] = None, rate: float = 500,
+                 batch_size: int = 64, timeout: float = 1.0, retries: int = 1):
+        self.transport_factory = transport_factory or ScapyArpTransport
+        self.rate = rate
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.retries = retries
+
+    def sweep(self, network_range: str) -> Iterator[Dict]:
+        """Generează dispozitivele pe măsură ce răspund (un singur proces)"""
+        network = ipaddress.ip_network(network_range, strict=False)
+        targets = [str(ip) for ip in network.hosts()] or [str(network.network_address)]
+        yield from self.sweep_hosts(targets)
+
+    def sweep_hosts(self, targets: List[str]) -> Iterator[Dict]:
+        """Sondează doar adresele date; răspunsurile de la alte adrese (ARP gratuit, trafic străin) se ignoră"""
+        transport = self.transport_factory()
+        transport.open()
+        target_set = set(targets)
+        seen = set()
+
+        def collect():
+            for ip, mac in transport.replies():
+                if ip in target_set and ip not in seen:
+                    seen.add(ip)
+                    yield _device(ip, mac)
+
+        try:
+            remaining = targets
+            for _attempt in range(self.retries + 1):
+                started = time.monotonic()
+                for i in range(0, len(remaining), self.batch_size):
+                    transport.send(remaining[i:i + self.batch_size])
+                    yield from collect()
+                    # Token bucket simplu: nu depăși `rate` pachete pe secundă
+                    sent = i + self.batch_size
+                    delay = started + sent / self.rate - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                deadline = time.monotonic() + self.timeout
+                while time.monotonic() < deadline:
+                    yield from collect()
+                    if len(seen) == len(target_set):
+                        return
+                    time.sleep(0.01)
+                remaining = [ip for ip in remaining if ip not in seen]
+                if not remaining:
+                    return
+        finally:
+            transport.close()
+
+    def sweep_sharded(self, network_range: str, workers: Optional[int] = None,
+                      shard_prefix: int = 24) -> Iterator[Dict]:
+        """Împarte range-urile mari în subrețele scanate de procese separate; rezultatele vin în flux"""
+        network = ipaddress.ip_network(network_range, strict=False)
+        if network.prefixlen >= shard_prefix:
+            yield from self.sweep(network_range)
+            return
+
+        shards = [str(subnet) for subnet in network.subnets(new_prefix=shard_prefix)]
+        workers = min(workers or os.cpu_count() or 1, len(shards))
+        spec = getattr(self.transport_factory(), 'spec', None)
+        if spec is None:
+            # Transport fără configurație serializabilă: scanarea rămâne în procesul curent
+            yield from self.sweep(network_range)
+            return
+        # Bugetul de rată este împărțit între procese
+        config = dict(transport=spec(), rate=self.rate / workers, batch_size=self.batch_size,
+                      timeout=self.timeout, retries=self.retries)
+
+        # Fiecare worker este un interpretor nou (nu fork/spawn): nu moștenește lock-urile
+        # thread-urilor din procesul părinte și nu reimportă scriptul Streamlit.
+        # Primește un set de subrețele și le scanează ca un singur flux, astfel încât
+        # timeout-ul de așteptare se plătește o singură dată per proces
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        results = queue.Queue()
+        processes = []
+        try:
+            for i in range(workers):
+                process = subprocess.Popen([sys.executable, '-m', 'utils.arp_sweep', '--worker'],
+                                           cwd=root, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                           stderr=subprocess.DEVNULL, text=True)
+                processes.append(process)
+                threading.Thread(target=_read_worker, args=(process.stdout, results), daemon=True).start()
+                process.stdin.write(json.dumps({'config': config, 'shards': shards[i::workers]}))
+                process.stdin.close()
+
+            finished = 0
+            while finished < len(processes):
+                item = results.get()
+                if item is None:
+                    finished += 1
+                else:
+                    yield item
+        finally:
+            for process in processes:
+                if process.poll() is None:
+                    process.terminate()
+                try:
+                    process.wait(timeout=1)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+
+def _read_worker(stream, results: queue.Queue):
+    """Citește host-urile trimise de un worker (o linie JSON per host); None la final"""
+    try:
+        for line in stream:
+            try:
+                results.put(json.loads(line))
+            except ValueError:
+                continue
+    finally:
+        results.put(None)
+
+
+def _shard_worker(config: Dict, shards: List[str]):
+    """Proces worker: scanează subrețelele primite și scrie host-urile găsite pe stdout"""
+    config = dict(config)
+    transport_factory = functools.partial(transport_from_spec, config.pop('transport'))
+    sweeper = ArpSweeper(transport_factory, **config)
+    targets = []
+    for shard in shards:
+        targets.extend(str(ip) for ip in ipaddress.ip_network(shard).hosts())
+    for device in sweeper.sweep_hosts(targets):
+        print(json.dumps(device), flush=True)
+
+
+if __name__ == "__main__":
+    if '--worker' in sys.argv:
+        job = json.load(sys.stdin)
+        _shard_worker(job['config'], job['shards'])
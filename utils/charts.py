@@ -0,0 +1,223 @@
+import math
+import warnings
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import plotly.graph_objects as go
+
+# Culori pentru status
+STATUS_COLORS = {
+    'excellent': '#00ff00',  # Verde - 1000 Mbps
+    'good': '#ffff00',       # Galben - 100 Mbps
+    'fair': '#ffa500',       # Portocaliu - 10 Mbps
+    'slow': '#ff0000',       # Roșu - Probleme
+    'down': '#8b0000',       # Roșu închis - Down
+    'unknown': '#808080'     # Gri - Unknown
+}
+
+SPEED_TEXT = {
+    'excellent': '1000 Mbps',
+    'good': '100 Mbps',
+    'fair': '10 Mbps',
+    'slow': '<10 Mbps',
+    'down': 'DOWN',
+    'unknown': 'UNKNOWN'
+}
+
+ROW_HEIGHT = 24
+
+
+def get_speed_text(status: str) -> str:
+    """Returnează textul pentru viteza estimată"""
+    return SPEED_TEXT.get(status, 'UNKNOWN')
+
+
+def lttb(x: Sequence[float], y: Sequence[float], threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Downsampling Largest-Triangle-Three-Buckets: păstrează forma seriei în `threshold` puncte"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        start = int(math.floor(i * every)) + 1
+        end = int(math.floor((i + 1) * every)) + 1
+        next_end = min(int(math.floor((i + 2) * every)) + 1, n)
+        # Media bucket-ului următor este al treilea vârf al triunghiului
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return x[selected], y[selected]
+
+
+def lttb_matrix(x: np.ndarray, y: np.ndarray, threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+    """LTTB vectorizat pe o matrice host × timp; punctele NaN (pierderi, padding) nu sunt alese"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    hosts, n = y.shape
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    rows = np.arange(hosts)
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty((hosts, threshold), dtype=np.int64)
+    selected[:, 0] = 0
+    a = np.zeros(hosts, dtype=np.int64)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for i in range(threshold - 2):
+            start = int(math.floor(i * every)) + 1
+            end = int(math.floor((i + 1) * every)) + 1
+            next_end = min(int(math.floor((i + 2) * every)) + 1, n)
+            if next_end > end:
+                avg_x = np.nanmean(x[:, end:next_end], axis=1)
+                avg_y = np.nanmean(y[:, end:next_end], axis=1)
+            else:
+                avg_x, avg_y = x[:, -1], y[:, -1]
+            ax, ay = x[rows, a], y[rows, a]
+            area = np.abs((ax - avg_x)[:, None] * (y[:, start:end] - ay[:, None])
+                          - (ax[:, None] - x[:, start:end]) * (avg_y - ay)[:, None])
+            area = np.where(np.isnan(area), -1.0, area)
+            a = start + np.argmax(area, axis=1)
+            selected[:, i + 1] = a
+    selected[:, -1] = n - 1
+    return np.take_along_axis(x, selected, axis=1), np.take_along_axis(y, selected, axis=1)
+
+
+def fleet_sparklines(ips: List[str], timestamps: np.ndarray, rtts: np.ndarray,
+                     points: int = 40) -> Dict[str, Dict[str, List[float]]]:
+    """Sparkline-uri pentru toate host-urile dintr-o singură trecere LTTB vectorizată"""
+    if not ips:
+        return {}
+    xs, ys = lttb_matrix(timestamps, rtts, points)
+    # Doar rândurile cu istoric incomplet (host-uri noi) sunt reduse individual; pierderile
+    # izolate nu sunt alese de LTTB și rămân pe calea vectorizată
+    sparse = np.isnan(timestamps).any(axis=1)
+    sparklines = {}
+    for i, ip in enumerate(ips):
+        if sparse[i]:
+            sparklines[ip] = sparkline_points(timestamps[i][~np.isnan(timestamps[i])],
+                                              rtts[i][~np.isnan(timestamps[i])], points)
+            continue
+        valid = ~np.isnan(ys[i])
+        sparklines[ip] = {'t': np.round(xs[i][valid], 3).tolist(), 'rtt': np.round(ys[i][valid], 3).tolist()}
+    return sparklines
+
+
+def paginate(hosts: Dict[str, Dict], page: int, page_size: int,
+             query: str = '') -> Tuple[List[Tuple[str, Dict]], int]:
+    """Returnează host-urile paginii cerute (după filtrare) și numărul total de pagini"""
+    items = list(hosts.items())
+    if query:
+        query = query.lower()
+        items = [(ip, data) for ip, data in items
+                 if query in ip.lower() or query in str(data.get('hostname', '')).lower()]
+    pages = max(1, math.ceil(len(items) / page_size))
+    page = min(max(page, 0), pages - 1)
+    return items[page * page_size:(page + 1) * page_size], pages
+
+
+def build_device_figure(page_hosts: List[Tuple[str, Dict]]) -> go.Figure:
+    """Toate host-urile paginii într-o singură urmă Scattergl, etichetele pe axa Y"""
+    count = len(page_hosts)
+    ips = [ip for ip, _data in page_hosts]
+    statuses = [data['status'] if data.get('latest') else 'unknown' for _ip, data in page_hosts]
+    labels = [f"<b>{data['hostname']}</b> {ip}" for ip, data in page_hosts]
+    latest_rtt = [(data.get('latest') or {}).get('response_time') for _ip, data in page_hosts]
+
+    fig = go.Figure(go.Scattergl(
+        x=np.full(count, 100.0),
+        y=np.arange(count),
+        mode='markers+text',
+        marker=dict(size=15, color=[STATUS_COLORS.get(s, '#808080') for s in statuses]),
+        text=[get_speed_text(s) for s in statuses],
+        textposition="middle right",
+        hovertext=[f"{label}<br>{rtt if rtt is not None else 'N/A'} ms"
+                   for label, rtt in zip(labels, latest_rtt)],
+        hoverinfo='text',
+        customdata=ips,
+        showlegend=False
+    ))
+
+    # Liniile punctate sunt grila axei Y, nu urme separate
+    fig.update_layout(
+        title="Monitorizare Dispozitive Rețea",
+        xaxis=dict(range=[0, 130], showgrid=False, zeroline=False, showticklabels=False, title=""),
+        yaxis=dict(
+            range=[count - 0.5, -0.5],
+            tickmode='array',
+            tickvals=list(range(count)),
+            ticktext=labels,
+            showgrid=True,
+            griddash='dot',
+            gridwidth=2,
+            zeroline=False,
+            title=""
+        ),
+        plot_bgcolor='white',
+        height=120 + count * ROW_HEIGHT,
+        margin=dict(l=10, r=10, t=40, b=10)
+    )
+    return fig
+
+
+def build_sparkline_figure(page_hosts: List[Tuple[str, Dict]]) -> go.Figure:
+    """Sparkline-urile de latență ale paginii, stivuite pe rânduri, într-o singură urmă Scattergl"""
+    xs, ys, hover = [], [], []
+    labels = []
+    for row, (ip, data) in enumerate(page_hosts):
+        labels.append(f"{data['hostname']} {ip}")
+        spark = data.get('sparkline') or {}
+        t = np.asarray(spark.get('t', []), dtype=np.float64)
+        rtt = np.asarray(spark.get('rtt', []), dtype=np.float64)
+        if len(t) == 0:
+            continue
+        # Fiecare serie este normalizată în banda propriului rând
+        low, high = np.nanmin(rtt), np.nanmax(rtt)
+        scale = (high - low) or 1.0
+        band = row + 0.4 - 0.8 * (rtt - low) / scale
+        xs.extend(t.tolist() + [None])
+        ys.extend(band.tolist() + [None])
+        hover.extend([f"{ip}: {value:.2f} ms" for value in rtt] + [None])
+
+    fig = go.Figure(go.Scattergl(
+        x=[None if v is None else v * 1000 for v in xs],
+        y=ys,
+        mode='lines',
+        line=dict(width=1.5, color='#1f77b4'),
+        hovertext=hover,
+        hoverinfo='text',
+        showlegend=False,
+        connectgaps=False
+    ))
+    count = len(page_hosts)
+    fig.update_layout(
+        title="Istoric latență (downsampling LTTB)",
+        xaxis=dict(type='date', showgrid=False, title=""),
+        yaxis=dict(range=[count - 0.5, -0.5], tickmode='array', tickvals=list(range(count)),
+                   ticktext=labels, showgrid=False, zeroline=False, title=""),
+        plot_bgcolor='white',
+        height=120 + count * ROW_HEIGHT,
+        margin=dict(l=10, r=10, t=40, b=10)
+    )
+    return fig
+
+
+def sparkline_points(timestamps: Sequence[float], rtts: Sequence[Optional[float]],
+                     points: int = 40) -> Dict[str, List[float]]:
+    """Pregătește o serie de latență pentru sparkline: elimină pierderile și aplică LTTB"""
+    t = np.asarray(timestamps, dtype=np.float64)
+    if not isinstance(rtts, np.ndarray):
+        rtts = [np.nan if v is None else v for v in rtts]
+    rtt = np.asarray(rtts, dtype=np.float64)
+    valid = ~np.isnan(rtt)
+    t, rtt = lttb(t[valid], rtt[valid], points)
+    return {'t': np.round(t, 3).tolist(), 'rtt': np.round(rtt, 3).tolist()}
@@ -0,0 +1,247 @@
+import json
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+
+from utils.charts import fleet_sparklines
+from utils.metrics import CALLBACK_ERRORS, SNAPSHOT_SECONDS
+from utils.sla import SLA_WINDOWS
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+def build_snapshot(scanner, monitor, speed_tester, network: Optional[str],
+                   devices: List[Dict], stats_window: float = 300,
+                   sparkline_samples: int = 300, sparkline_size: int = 40, alerts=None) -> Dict:
+    """Construiește starea completă afișată de dashboard (aceeași formă local și prin colector)"""
+    stats = monitor.get_stats(window=stats_window)
+    ping_data = list(monitor.ping_data.items())
+    ips = [ip for ip, _data in ping_data]
+    # Seriile sunt reduse cu LTTB (vectorizat pe toate host-urile) înainte de a ajunge în browser
+    timestamps, rtts = monitor.history_store.series_matrix(ips, sparkline_samples)
+    sparklines = fleet_sparklines(ips, timestamps, rtts, sparkline_size)
+    # Numele rezolvate după pornirea monitorizării vin din inventarul scanner-ului
+    names = {d['ip']: d['hostname'] for d in devices if d.get('hostname', 'N/A') != 'N/A'}
+    hosts = {}
+    for ip, data in ping_data:
+        hosts[ip] = {
+            'hostname': names.get(ip, data['hostname']),
+            'status': data['status'],
+            'latest': monitor.get_latest(ip),
+            'stats': stats.get(ip, {}),
+            'sparkline': sparklines.get(ip, {'t': [], 'rtt': []})
+        }
+    return {
+        'generated_at': time.time(),
+        'network': network,
+        'scan_method': scanner.get_scan_method(),
+        'refreshing': bool(network) and scanner.is_refreshing(network),
+        'devices': devices,
+        'changes': scanner.inventory.recent(20),
+        'monitoring': monitor.is_monitoring,
+        'hosts': hosts,
+        'alerts': alerts.active() if alerts is not None else [],
+        # Rapoartele SLA sunt deja agregate în bucket-uri; aici doar se însumează ferestrele
+        'sla': monitor.sla.reports(SLA_WINDOWS),
+        'speed': speed_tester.get_speed_data(),
+        'speed_status': {
+            'continuous': speed_tester.is_continuous,
+            'testing': speed_tester.is_testing,
+            'next_test_at': speed_tester.next_test_at,
+            'last_error': speed_tester.last_error,
+        },
+    }
+
+
+class _SnapshotServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class CollectorServer:
+    """Proces colector fără UI: deține scanner-ul, monitorul și testerul, publică snapshot-uri"""
+
+    def __init__(self, scanner, monitor, speed_tester, network: Optional[str] = None,
+                 host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, scan_interval: float = 60,
+                 speed_interval: float = 600, publish_interval: float = 1.0, alerts=None,
+                 store=None, summary_age: float = 10.0):
+        self.scanner = scanner
+        self.monitor = monitor
+        self.speed_tester = speed_tester
+        self.alerts = alerts
+        # Istoricul pe termen lung (agregările SQLite), servit vizualizatorilor la cerere
+        self.store = store
+        self.summary_age = summary_age
+        self._summaries: Dict[int, tuple] = {}
+        self.network = network
+        self.address = (host, port)
+        self.scan_interval = scan_interval
+        self.speed_interval = speed_interval
+        self.publish_interval = publish_interval
+
+        self.devices = []
+        self.is_running = False
+        self.threads = []
+        self._payload = b'{}'
+        self._payload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = None
+
+    def start(self):
+        """Pornește buclele de colectare și serverul local de publicare"""
+        self.is_running = True
+        if self.network is None:
+            self.network = self.scanner.get_local_network()
+
+        self._server = _SnapshotServer(self.address, self._make_handler())
+
+        self.speed_tester.start_continuous_test(interval=self.speed_interval)
+        for target in (self._scan_loop, self._publish_loop, self._server.serve_forever):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        """Oprește colectarea și serverul"""
+        self.is_running = False
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        self.monitor.stop_monitoring()
+        self.speed_tester.stop_continuous_test()
+        for thread in self.threads:
+            thread.join(timeout=2)
+        self.threads = []
+
+    def snapshot_payload(self) -> bytes:
+        """Ultimul snapshot serializat (construit o singură dată per interval, partajat de toți clienții)"""
+        with self._payload_lock:
+            return self._payload
+
+    def summary_payload(self, seconds: int) -> bytes:
+        """Sumarul istoricului pe ultimele `seconds` secunde, reutilizat `summary_age` secunde"""
+        if self.store is None:
+            return b'{}'
+        now = time.time()
+        with self._payload_lock:
+            cached = self._summaries.get(seconds)
+            if cached is not None and now - cached[0] < self.summary_age:
+                return cached[1]
+        payload = json.dumps(self.store.summary(now - seconds), default=str).encode('utf-8')
+        with self._payload_lock:
+            self._summaries[seconds] = (now, payload)
+        return payload
+
+    def _scan_loop(self):
+        # Dispozitivele noi, mutate sau scoase ajung în monitor prin evenimentele inventarului
+        self.scanner.inventory.subscribe(self.monitor.apply_inventory_events)
+        while not self._stop.is_set():
+            try:
+                self.devices = self.scanner.get_devices(self.network)
+                if not self.monitor.is_monitoring:
+                    self.monitor.start_monitoring(self.devices)
+                else:
+                    self.monitor.sync_hosts(self.devices)
+            except Exception as e:
+                CALLBACK_ERRORS.labels('collector_scan').inc()
+                print(f"Collector scan error: {e}")
+            # Cache-ul scanner-ului face reîmprospătarea în fundal; aici doar îl citim
+            self._stop.wait(min(self.scan_interval, self.scanner.cache_ttl))
+
+    def _publish_loop(self):
+        while not self._stop.is_set():
+            try:
+                with SNAPSHOT_SECONDS.time():
+                    snapshot = build_snapshot(self.scanner, self.monitor, self.speed_tester,
+                                              self.network, self.devices, alerts=self.alerts)
+                payload = json.dumps(snapshot, default=str).encode('utf-8')
+                with self._payload_lock:
+                    self._payload = payload
+            except Exception as e:
+                CALLBACK_ERRORS.labels('collector_publish').inc()
+                print(f"Collector publish error: {e}")
+            self._stop.wait(self.publish_interval)
+
+    def _make_handler(self):
+        server = self
+
+        class SnapshotHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    command = line.strip().upper()
+                    if command == b'SNAPSHOT':
+                        payload = server.snapshot_payload()
+                        self.wfile.write(struct.pack('!I', len(payload)) + payload)
+                    elif command.startswith(b'SUMMARY '):
+                        try:
+                            seconds = int(command.split()[1])
+                        except ValueError:
+                            break
+                        payload = server.summary_payload(seconds)
+                        self.wfile.write(struct.pack('!I', len(payload)) + payload)
+                    elif command == b'PING':
+                        self.wfile.write(struct.pack('!I', 4) + b'PONG')
+                    else:
+                        break
+
+        return SnapshotHandler
+
+
+class CollectorClient:
+    """Client read-only pentru dashboard; snapshot-ul e reutilizat cât timp e proaspăt"""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 timeout: float = 0.5, max_age: float = 1.0):
+        self.address = (host, port)
+        self.timeout = timeout
+        self.max_age = max_age
+        self._cached = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_address(cls, address: str, **kwargs) -> 'CollectorClient':
+        """Creează clientul dintr-un șir 'host:port'"""
+        host, _, port = address.rpartition(':')
+        return cls(host or DEFAULT_HOST, int(port), **kwargs)
+
+    def _request(self, command: bytes) -> bytes:
+        with socket.create_connection(self.address, timeout=self.timeout) as sock:
+            sock.sendall(command + b'\n')
+            reader = sock.makefile('rb')
+            header = reader.read(4)
+            if len(header) < 4:
+                raise ConnectionError("Răspuns incomplet de la colector")
+            (length,) = struct.unpack('!I', header)
+            return reader.read(length)
+
+    def is_available(self) -> bool:
+        """Verifică dacă un colector rulează la adresa configurată"""
+        try:
+            return self._request(b'PING') == b'PONG'
+        except OSError:
+            return False
+
+    def summary(self, seconds: int) -> Optional[Dict]:
+        """Istoricul agregat pe ultimele `seconds` secunde, citit din stocarea colectorului"""
+        try:
+            return json.loads(self._request(b'SUMMARY %d' % seconds))
+        except (OSError, ValueError):
+            return None
+
+    def snapshot(self) -> Optional[Dict]:
+        """Returnează starea publicată de colector sau None dacă nu este disponibil"""
+        with self._lock:
+            if self._cached is not None and time.time() - self._fetched_at < self.max_age:
+                return self._cached
+            try:
+                self._cached = json.loads(self._request(b'SNAPSHOT'))
+                self._fetched_at = time.time()
+            except (OSError, ValueError):
+                self._cached = None
+            return self._cached
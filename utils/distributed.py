@@ -0,0 +1,491 @@
+import argparse
+import bisect
+import hashlib
+import json
+import math
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.metrics import CALLBACK_ERRORS, PROBE_WORKERS
+from utils.ping_monitor import PingMonitor
+
+DEFAULT_COORDINATOR_PORT = 8767
+
+# Cadre: tip (1 octet) + lungime (4 octeți) + conținut
+FRAME_HEADER = struct.Struct('!BI')
+HELLO, ASSIGN, RESULTS, HEARTBEAT = 1, 2, 3, 4
+
+# Un rezultat: index în lista asignată, timestamp, RTT (NaN = pachet pierdut) - 16 octeți
+RESULT = struct.Struct('!Idf')
+EPOCH = struct.Struct('!I')
+
+
+def send_frame(sock: socket.socket, kind: int, payload: bytes = b''):
+    sock.sendall(FRAME_HEADER.pack(kind, len(payload)) + payload)
+
+
+def read_frame(reader) -> Optional[Tuple[int, bytes]]:
+    """Citește un cadru; None la închiderea conexiunii"""
+    header = reader.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        return None
+    kind, length = FRAME_HEADER.unpack(header)
+    payload = reader.read(length)
+    if len(payload) < length:
+        return None
+    return kind, payload
+
+
+def encode_results(epoch: int, results: List[Tuple[int, float, Optional[float]]]) -> bytes:
+    """Lot compact de rezultate pentru o asignare (epoch)"""
+    parts = [EPOCH.pack(epoch)]
+    for index, timestamp, rtt in results:
+        parts.append(RESULT.pack(index, timestamp, math.nan if rtt is None else rtt))
+    return b''.join(parts)
+
+
+def decode_results(payload: bytes) -> Tuple[int, List[Tuple[int, float, Optional[float]]]]:
+    (epoch,) = EPOCH.unpack_from(payload)
+    results = []
+    for index, timestamp, rtt in RESULT.iter_unpack(payload[EPOCH.size:]):
+        results.append((index, timestamp, None if math.isnan(rtt) else rtt))
+    return epoch, results
+
+
+class HashRing:
+    """Hashing consistent cu noduri virtuale: la plecarea unui worker se mută doar host-urile lui"""
+
+    def __init__(self, nodes: List[str] = (), replicas: int = 64):
+        self.replicas = replicas
+        self._keys: List[int] = []
+        self._nodes: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        # hash() diferă între procese; blake2b e stabil pe coordonator și în teste
+        return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+    def add(self, node: str):
+        for replica in range(self.replicas):
+            key = self._hash(f"{node}#{replica}")
+            index = bisect.bisect(self._keys, key)
+            self._keys.insert(index, key)
+            self._nodes.insert(index, node)
+
+    def remove(self, node: str):
+        kept = [(k, n) for k, n in zip(self._keys, self._nodes) if n != node]
+        self._keys = [k for k, _n in kept]
+        self._nodes = [n for _k, n in kept]
+
+    def node_for(self, key: str) -> Optional[str]:
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, self._hash(key)) % len(self._keys)
+        return self._nodes[index]
+
+    def assign(self, keys: List[str]) -> Dict[str, List[str]]:
+        """Împarte cheile pe noduri"""
+        shards: Dict[str, List[str]] = {node: [] for node in set(self._nodes)}
+        for key in keys:
+            node = self.node_for(key)
+            if node is not None:
+                shards[node].append(key)
+        return shards
+
+
+class _WorkerConnection:
+    __slots__ = ('worker_id', 'sock', 'send_lock', 'last_seen', 'epoch', 'hosts', 'previous')
+
+    def __init__(self, worker_id: str, sock: socket.socket):
+        self.worker_id = worker_id
+        self.sock = sock
+        self.send_lock = threading.Lock()
+        self.last_seen = time.monotonic()
+        self.epoch = 0
+        self.hosts: List[str] = []
+        # Loturile trimise înainte de o reasignare folosesc încă lista veche
+        self.previous: Tuple[int, List[str]] = (0, [])
+
+
+class _CoordinatorServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class ProbeCoordinator:
+    """Împarte host-urile pe workeri (hashing consistent) și primește loturile lor de rezultate"""
+
+    def __init__(self, on_result: Callable[[str, float, Optional[float]], None],
+                 host: str = '127.0.0.1', port: int = DEFAULT_COORDINATOR_PORT, interval: float = 2.0,
+                 heartbeat_timeout: float = 6.0, replicas: int = 64):
+        self.on_result = on_result
+        self.address = (host, port)
+        self.interval = interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.replicas = replicas
+        self.hosts: List[str] = []
+        self._workers: Dict[str, _WorkerConnection] = {}
+        self._lock = threading.Lock()
+        # Asignările pleacă în ordinea epoch-urilor, chiar cu reechilibrări concurente
+        self._rebalance_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = None
+        self._threads = []
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1] if self._server else self.address[1]
+
+    def start(self):
+        """Pornește serverul pentru workeri și verificarea heartbeat-urilor"""
+        self._server = _CoordinatorServer(self.address, self._make_handler())
+        for target in (self._server.serve_forever, self._reap_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        PROBE_WORKERS.set_function(lambda: len(self._workers))
+
+    def stop(self):
+        """Oprește serverul și deconectează workerii"""
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            self._close(worker)
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+
+    def set_hosts(self, hosts: List[str]):
+        """Setul complet de host-uri de monitorizat"""
+        with self._lock:
+            self.hosts = list(dict.fromkeys(hosts))
+        self._rebalance()
+
+    def workers(self) -> Dict[str, int]:
+        """Workerii conectați și numărul de host-uri asignate fiecăruia"""
+        with self._lock:
+            return {worker_id: len(worker.hosts) for worker_id, worker in self._workers.items()}
+
+    def _rebalance(self):
+        with self._rebalance_lock:
+            self._send_assignments()
+
+    def _send_assignments(self):
+        changed = []
+        with self._lock:
+            ring = HashRing(sorted(self._workers), self.replicas)
+            shards = ring.assign(self.hosts)
+            for worker_id, worker in self._workers.items():
+                hosts = shards.get(worker_id, [])
+                if hosts == worker.hosts and worker.epoch:
+                    continue
+                worker.previous = (worker.epoch, worker.hosts)
+                worker.epoch += 1
+                worker.hosts = hosts
+                changed.append((worker, worker.epoch, hosts))
+        for worker, epoch, hosts in changed:
+            payload = json.dumps({'epoch': epoch, 'hosts': hosts, 'interval': self.interval}).encode()
+            try:
+                with worker.send_lock:
+                    send_frame(worker.sock, ASSIGN, payload)
+            except OSError:
+                self._close(worker)
+
+    def _register(self, worker_id: str, sock: socket.socket) -> _WorkerConnection:
+        worker = _WorkerConnection(worker_id, sock)
+        with self._lock:
+            old = self._workers.get(worker_id)
+            self._workers[worker_id] = worker
+        if old is not None:
+            # Același worker reconectat: conexiunea veche nu mai e validă
+            self._close(old)
+        self._rebalance()
+        return worker
+
+    def _unregister(self, worker: _WorkerConnection):
+        with self._lock:
+            if self._workers.get(worker.worker_id) is not worker:
+                return
+            del self._workers[worker.worker_id]
+        self._rebalance()
+
+    @staticmethod
+    def _close(worker: _WorkerConnection):
+        try:
+            worker.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _reap_loop(self):
+        while not self._stop.wait(self.heartbeat_timeout / 3):
+            now = time.monotonic()
+            with self._lock:
+                silent = [w for w in self._workers.values() if now - w.last_seen > self.heartbeat_timeout]
+            for worker in silent:
+                print(f"Probe worker {worker.worker_id} timed out")
+                self._close(worker)
+                self._unregister(worker)
+
+    def _handle_results(self, worker: _WorkerConnection, payload: bytes):
+        epoch, results = decode_results(payload)
+        with self._lock:
+            if epoch == worker.epoch:
+                hosts = worker.hosts
+            elif epoch == worker.previous[0]:
+                hosts = worker.previous[1]
+            else:
+                return
+            owned = set(worker.hosts)
+        for index, timestamp, rtt in results:
+            # Host-urile mutate între timp la alt worker sunt ignorate (fără dubluri)
+            if index < len(hosts) and hosts[index] in owned:
+                try:
+                    self.on_result(hosts[index], timestamp, rtt)
+                except Exception as e:
+                    CALLBACK_ERRORS.labels('coordinator').inc()
+                    print(f"Coordinator result error for {hosts[index]}: {e}")
+
+    def _make_handler(self):
+        coordinator = self
+
+        class WorkerHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                reader = self.request.makefile('rb')
+                frame = read_frame(reader)
+                if frame is None or frame[0] != HELLO:
+                    return
+                hello = json.loads(frame[1])
+                worker = coordinator._register(hello['worker_id'], self.request)
+                try:
+                    while True:
+                        frame = read_frame(reader)
+                        if frame is None:
+                            break
+                        worker.last_seen = time.monotonic()
+                        kind, payload = frame
+                        if kind == RESULTS:
+                            coordinator._handle_results(worker, payload)
+                except (OSError, ValueError, struct.error):
+                    pass
+                finally:
+                    coordinator._unregister(worker)
+
+        return WorkerHandler
+
+
+class DistributedPingMonitor(PingMonitor):
+    """PingMonitor ale cărui probe rulează pe workeri; ping_data, istoricul și listenerii rămân aici"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_COORDINATOR_PORT,
+                 heartbeat_timeout: float = 6.0, **kwargs):
+        super().__init__(**kwargs)
+        self.assigned: List[str] = []
+        self.coordinator = ProbeCoordinator(self._on_worker_result, host, port, interval=self.interval,
+                                            heartbeat_timeout=heartbeat_timeout)
+        self.coordinator.start()
+
+    def _on_worker_result(self, host: str, timestamp: float, response_time: Optional[float]):
+        self.record_result(host, response_time, timestamp)
+
+    def start_monitoring(self, devices: List[Dict]):
+        """Trimite host-urile către workeri în loc să le sondeze local"""
+        self.is_monitoring = True
+        for device in devices:
+            if device['ip'] and device['ip'] not in self.ping_data:
+                self._init_host(device['ip'], device['hostname'])
+        self.assigned = [d['ip'] for d in devices if d['ip']]
+        self.coordinator.set_hosts(self.assigned)
+
+    def add_host(self, host: str, hostname: str = 'N/A'):
+        """Adaugă un host; coordonatorul re-echilibrează doar shard-urile afectate"""
+        if not self.is_monitoring or host in self.assigned:
+            return
+        if host not in self.ping_data:
+            self._init_host(host, hostname)
+        self.assigned.append(host)
+        self.coordinator.set_hosts(self.assigned)
+
+    def remove_host(self, host: str):
+        """Scoate un host din shard-urile workerilor"""
+        if host in self.assigned:
+            self.assigned.remove(host)
+            self.coordinator.set_hosts(self.assigned)
+        self.ping_data.pop(host, None)
+
+    def stop_monitoring(self):
+        """Oprește probele pe toți workerii"""
+        self.is_monitoring = False
+        self.assigned = []
+        self.coordinator.set_hosts([])
+
+    def close(self):
+        """Oprește coordonatorul"""
+        self.coordinator.stop()
+
+
+class ProbeWorker:
+    """Worker de probe: sondează shard-ul primit de la coordonator și trimite rezultatele în loturi"""
+
+    def __init__(self, coordinator: Tuple[str, int], worker_id: Optional[str] = None,
+                 batch_interval: float = 0.5, max_batch: int = 4096, heartbeat_interval: float = 2.0,
+                 reconnect_delay: float = 1.0, use_icmp_engine: bool = True, sock_factory=None):
+        self.coordinator = coordinator
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_interval = batch_interval
+        self.max_batch = max_batch
+        self.heartbeat_interval = heartbeat_interval
+        self.reconnect_delay = reconnect_delay
+        # Istoricul rămâne la coordonator; local păstrăm doar ultimul eșantion
+        self.monitor = PingMonitor(max_history=1, use_icmp_engine=use_icmp_engine, sock_factory=sock_factory)
+        self.monitor.add_listener(self._on_result)
+        self._index: Dict[str, int] = {}
+        self._epoch = 0
+        self._buffer: List[Tuple[int, float, Optional[float]]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _on_result(self, host: str, timestamp: float, response_time: Optional[float],
+                   status: str, packet_loss: bool):
+        with self._lock:
+            index = self._index.get(host)
+            if index is not None:
+                self._buffer.append((index, timestamp, response_time))
+
+    def _apply(self, assignment: Dict):
+        hosts = assignment['hosts']
+        with self._lock:
+            if assignment['epoch'] <= self._epoch:
+                return self._epoch, []
+            # Rezultatele din vechea asignare pleacă înainte cu epoch-ul lor
+            pending = (self._epoch, self._buffer)
+            self._buffer = []
+            self._epoch = assignment['epoch']
+            self._index = {host: i for i, host in enumerate(hosts)}
+        monitor = self.monitor
+        current = set(monitor.ping_data)
+        if monitor.engine and monitor.interval == assignment['interval']:
+            # Doar diferența: host-urile rămase își păstrează cadența
+            for host in current - set(hosts):
+                monitor.engine.remove_host(host)
+                monitor.ping_data.pop(host, None)
+            for host in hosts:
+                if host not in current:
+                    monitor._init_host(host, host)
+                    monitor.engine.add_host(host)
+        else:
+            monitor.interval = assignment['interval']
+            monitor.ping_data.clear()
+            monitor.start_monitoring([{'ip': host, 'hostname': host} for host in hosts])
+        return pending
+
+    def _session(self, sock: socket.socket):
+        send_frame(sock, HELLO, json.dumps({'worker_id': self.worker_id}).encode())
+        reader = sock.makefile('rb')
+        send_lock = threading.Lock()
+        closed = threading.Event()
+
+        def send(kind: int, payload: bytes = b''):
+            with send_lock:
+                send_frame(sock, kind, payload)
+
+        def receive():
+            try:
+                while True:
+                    frame = read_frame(reader)
+                    if frame is None:
+                        break
+                    kind, payload = frame
+                    if kind == ASSIGN:
+                        epoch, results = self._apply(json.loads(payload))
+                        if results:
+                            send(RESULTS, encode_results(epoch, results))
+            except (OSError, ValueError):
+                pass
+            finally:
+                closed.set()
+
+        receiver = threading.Thread(target=receive, daemon=True)
+        receiver.start()
+        last_sent = time.monotonic()
+        try:
+            while not self._stop.is_set() and not closed.wait(self.batch_interval):
+                with self._lock:
+                    epoch = self._epoch
+                    batch, self._buffer = self._buffer[:self.max_batch], self._buffer[self.max_batch:]
+                if batch:
+                    send(RESULTS, encode_results(epoch, batch))
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= self.heartbeat_interval:
+                    send(HEARTBEAT)
+                    last_sent = time.monotonic()
+        finally:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            receiver.join(timeout=2)
+
+    def run(self):
+        """Bucla worker-ului, cu reconectare la căderea coordonatorului"""
+        while not self._stop.is_set():
+            try:
+                with socket.create_connection(self.coordinator, timeout=5) as sock:
+                    sock.settimeout(None)
+                    self._session(sock)
+            except OSError as e:
+                print(f"Coordinator connection error: {e}")
+            # Fără coordonator nu are sens să sondăm; reasignarea vine la reconectare
+            self.monitor.stop_monitoring()
+            self.monitor.ping_data.clear()
+            with self._lock:
+                self._index = {}
+                self._buffer = []
+                self._epoch = 0
+            self._stop.wait(self.reconnect_delay)
+
+    def start(self):
+        """Rulează worker-ul într-un thread"""
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Oprește worker-ul și probele"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.monitor.stop_monitoring()
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """'host:port' -> (host, port)"""
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker de probe pentru un colector coordonator")
+    parser.add_argument('--coordinator', default=f'127.0.0.1:{DEFAULT_COORDINATOR_PORT}',
+                        help="Adresa coordonatorului (collector.py --coordinator-port)")
+    parser.add_argument('--id', help="Identificatorul worker-ului (implicit: hostname-pid)")
+    parser.add_argument('--batch-interval', type=float, default=0.5, help="Secunde între loturile de rezultate")
+    args = parser.parse_args()
+    worker = ProbeWorker(parse_address(args.coordinator), args.id, batch_interval=args.batch_interval)
+    print(f"Worker {worker.worker_id} -> {args.coordinator}")
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
@@ -0,0 +1,276 @@
+import asyncio
+import ipaddress
+import random
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+MDNS_PORT = 5353
+NETBIOS_PORT = 137
+TYPE_PTR = 12
+TYPE_NBSTAT = 0x21
+
+
+def reverse_name(ip: str) -> str:
+    """Numele PTR pentru o adresă (in-addr.arpa / ip6.arpa)"""
+    return ipaddress.ip_address(ip).reverse_pointer
+
+
+def build_ptr_query(ident: int, name: str, recursive: bool = True) -> bytes:
+    """Cerere DNS PTR pentru un nume reverse"""
+    header = struct.pack('!HHHHHH', ident, 0x0100 if recursive else 0, 1, 0, 0, 0)
+    labels = b''.join(bytes([len(part)]) + part.encode('ascii') for part in name.split('.') if part)
+    return header + labels + b'\0' + struct.pack('!HH', TYPE_PTR, 1)
+
+
+def read_name(packet: bytes, offset: int) -> Tuple[str, int]:
+    """Decodează un nume DNS (cu pointeri de compresie); returnează numele și offset-ul următor"""
+    labels = []
+    end = None
+    for _ in range(128):
+        length = packet[offset]
+        if length & 0xc0 == 0xc0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3f) << 8) | packet[offset + 1]
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(packet[offset:offset + length].decode('utf-8', errors='replace'))
+        offset += length
+    return '.'.join(labels), end if end is not None else offset
+
+
+def parse_ptr_response(packet: bytes, ident: Optional[int] = None) -> Optional[str]:
+    """Primul răspuns PTR dintr-un pachet DNS/mDNS; '' pentru un răspuns negativ, None dacă pachetul nu e al nostru"""
+    try:
+        rid, flags, qdcount, ancount, _ns, _ar = struct.unpack_from('!HHHHHH', packet)
+        if ident is not None and rid != ident:
+            return None
+        if not flags & 0x8000:
+            return None
+        if flags & 0x000f:
+            return ''
+        offset = 12
+        for _ in range(qdcount):
+            _name, offset = read_name(packet, offset)
+            offset += 4
+        for _ in range(ancount):
+            _name, offset = read_name(packet, offset)
+            rtype, _rclass, _ttl, rdlength = struct.unpack_from('!HHIH', packet, offset)
+            offset += 10
+            if rtype == TYPE_PTR:
+                name, _ = read_name(packet, offset)
+                return name.rstrip('.')
+            offset += rdlength
+    except (struct.error, IndexError):
+        return None
+    return ''
+
+
+def build_nbstat_query(ident: int) -> bytes:
+    """Cerere NetBIOS Node Status pentru numele wildcard '*'"""
+    raw = b'*' + b'\0' * 15
+    encoded = bytes(c for byte in raw for c in (0x41 + (byte >> 4), 0x41 + (byte & 0x0f)))
+    return (struct.pack('!HHHHHH', ident, 0, 1, 0, 0, 0) + b'\x20' + encoded + b'\0'
+            + struct.pack('!HH', TYPE_NBSTAT, 1))
+
+
+def parse_nbstat_response(packet: bytes, ident: Optional[int] = None) -> Optional[str]:
+    """Numele stației (sufix 0x00, unic) dintr-un răspuns NetBIOS Node Status; '' dacă lipsește"""
+    try:
+        rid, _flags, _qd, ancount, _ns, _ar = struct.unpack_from('!HHHHHH', packet)
+        if (ident is not None and rid != ident) or ancount < 1:
+            return None
+        _name, offset = read_name(packet, 12)
+        offset += 10
+        count = packet[offset]
+        offset += 1
+        for i in range(count):
+            entry = packet[offset + i * 18:offset + (i + 1) * 18]
+            name, suffix = entry[:15], entry[15]
+            (flags,) = struct.unpack('!H', entry[16:18])
+            if suffix == 0x00 and not flags & 0x8000:
+                return name.decode('ascii', errors='replace').strip()
+    except (struct.error, IndexError):
+        return None
+    return ''
+
+
+def system_nameserver(path: str = '/etc/resolv.conf') -> Optional[str]:
+    """Primul nameserver din resolv.conf (None pe sisteme fără acest fișier)"""
+    try:
+        with open(path) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 2 and fields[0] == 'nameserver':
+                    return fields[1]
+    except OSError:
+        pass
+    return None
+
+
+class HostnameCache:
+    """Cache LRU cu TTL, inclusiv rezultate negative (host-uri fără nume)"""
+
+    def __init__(self, max_size: int = 4096, ttl: float = 3600, negative_ttl: float = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: 'OrderedDict[str, Tuple[Optional[str], float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, ip: str) -> Tuple[bool, Optional[str]]:
+        """(găsit, nume); un rezultat negativ valid este (True, None)"""
+        with self._lock:
+            entry = self._entries.get(ip)
+            if entry is None:
+                return False, None
+            name, expires = entry
+            if expires < time.time():
+                del self._entries[ip]
+                return False, None
+            self._entries.move_to_end(ip)
+            return True, name
+
+    def put(self, ip: str, name: Optional[str]):
+        """Memorează numele (sau absența lui, cu TTL mai scurt)"""
+        ttl = self.ttl if name else self.negative_ttl
+        with self._lock:
+            self._entries[ip] = (name, time.time() + ttl)
+            self._entries.move_to_end(ip)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _UdpQuery(asyncio.DatagramProtocol):
+    def __init__(self, future: asyncio.Future, parse: Callable[[bytes], Optional[str]]):
+        self.future = future
+        self.parse = parse
+
+    def datagram_received(self, data, addr):
+        if self.future.done():
+            return
+        name = self.parse(data)
+        if name is not None:
+            self.future.set_result(name)
+
+    def error_received(self, exc):
+        # ICMP port unreachable: host-ul nu are serviciul, nu mai așteptăm timeout-ul
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class HostnameResolver:
+    """Rezolvare concurentă de nume: PTR prin DNS, opțional mDNS și NetBIOS, cu cache partajat"""
+
+    def __init__(self, nameserver: Optional[str] = None, port: int = 53, timeout: float = 1.0,
+                 concurrency: int = 64, use_mdns: bool = True, use_netbios: bool = False,
+                 cache: Optional[HostnameCache] = None):
+        self.nameserver = nameserver or system_nameserver()
+        self.port = port
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.use_mdns = use_mdns
+        self.use_netbios = use_netbios
+        self.cache = cache if cache is not None else HostnameCache()
+
+    async def _query(self, packet: bytes, address: Tuple[str, int],
+                     parse: Callable[[bytes], Optional[str]]) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        try:
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: _UdpQuery(future, parse), remote_addr=address)
+        except OSError:
+            return None
+        try:
+            transport.sendto(packet)
+            # Un răspuns negativ ('') încheie cererea imediat, fără să aștepte timeout-ul
+            return await asyncio.wait_for(future, self.timeout) or None
+        except (asyncio.TimeoutError, OSError):
+            return None
+        finally:
+            transport.close()
+
+    async def _resolve_ptr(self, ip: str) -> Optional[str]:
+        if self.nameserver is None:
+            # Fără resolv.conf: resolver-ul sistemului, într-un thread din pool
+            loop = asyncio.get_running_loop()
+            try:
+                return (await asyncio.wait_for(
+                    loop.run_in_executor(None, socket.gethostbyaddr, ip), self.timeout))[0]
+            except (OSError, asyncio.TimeoutError):
+                return None
+        ident = random.getrandbits(16)
+        return await self._query(build_ptr_query(ident, reverse_name(ip)), (self.nameserver, self.port),
+                                 lambda data: parse_ptr_response(data, ident))
+
+    async def _resolve_mdns(self, ip: str) -> Optional[str]:
+        # Cerere unicast direct către host (răspuns "legacy unicast" de la responder-ul mDNS)
+        ident = random.getrandbits(16)
+        return await self._query(build_ptr_query(ident, reverse_name(ip), recursive=False),
+                                 (ip, MDNS_PORT), lambda data: parse_ptr_response(data, ident))
+
+    async def _resolve_netbios(self, ip: str) -> Optional[str]:
+        ident = random.getrandbits(16)
+        return await self._query(build_nbstat_query(ident), (ip, NETBIOS_PORT),
+                                 lambda data: parse_nbstat_response(data, ident))
+
+    async def _resolve(self, ip: str, semaphore: asyncio.Semaphore) -> Optional[str]:
+        async with semaphore:
+            name = await self._resolve_ptr(ip)
+            if name is None and self.use_mdns:
+                name = await self._resolve_mdns(ip)
+            if name is None and self.use_netbios:
+                name = await self._resolve_netbios(ip)
+        self.cache.put(ip, name)
+        return name
+
+    async def resolve_async(self, ips: Iterable[str],
+                            on_resolved: Optional[Callable[[str, Optional[str]], None]] = None
+                            ) -> Dict[str, Optional[str]]:
+        """Rezolvă toate IP-urile (cel mult `concurrency` simultan); callback-ul e chemat pe măsură ce vin"""
+        results = {}
+        pending = []
+        for ip in dict.fromkeys(ips):
+            found, name = self.cache.get(ip)
+            if found:
+                results[ip] = name
+            else:
+                pending.append(ip)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def resolve_one(ip):
+            name = await self._resolve(ip, semaphore)
+            results[ip] = name
+            if on_resolved:
+                on_resolved(ip, name)
+
+        await asyncio.gather(*(resolve_one(ip) for ip in pending))
+        return results
+
+    def resolve_many(self, ips: Iterable[str],
+                     on_resolved: Optional[Callable[[str, Optional[str]], None]] = None
+                     ) -> Dict[str, Optional[str]]:
+        """Variantă sincronă (rulează propria buclă asyncio)"""
+        return asyncio.run(self.resolve_async(ips, on_resolved))
+
+    def cached(self, ips: Iterable[str]) -> Tuple[Dict[str, Optional[str]], List[str]]:
+        """Împarte IP-urile în nume deja cunoscute din cache și IP-uri care trebuie rezolvate"""
+        known, missing = {}, []
+        for ip in ips:
+            found, name = self.cache.get(ip)
+            if found:
+                known[ip] = name
+            else:
+                missing.append(ip)
+        return known, missing
@@ -0,0 +1,265 @@
+import socket
+import struct
+import selectors
+import threading
+import heapq
+import time
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.probe_scheduler import ProbeScheduler
+
+from utils.metrics import (CALLBACK_ERRORS, PROBE_LAG_SECONDS, PROBE_LOOP_SECONDS, PROBE_RTT_SECONDS,
+                           PROBE_SEND_SECONDS, PROBES_LOST, PROBES_SENT)
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+
+
+def icmp_checksum(data: bytes) -> int:
+    """Calculează checksum-ul ICMP (complement față de unu pe 16 biți)"""
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def build_echo_request(ident: int, seq: int, payload: bytes = b'') -> bytes:
+    """Construiește un pachet ICMP echo request"""
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    checksum = icmp_checksum(header + payload)
+    return struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, checksum, ident, seq) + payload
+
+
+def parse_echo_reply(packet: bytes) -> Optional[Tuple[int, int]]:
+    """Extrage (id, secvență) dintr-un echo reply; acceptă și pachete cu header IP"""
+    # Socket-urile raw (și cele DGRAM pe macOS) includ header-ul IPv4
+    if len(packet) >= 20 and packet[0] >> 4 == 4:
+        packet = packet[(packet[0] & 0x0f) * 4:]
+    if len(packet) < 8:
+        return None
+    icmp_type, _code, _checksum, ident, seq = struct.unpack('!BBHHH', packet[:8])
+    if icmp_type != ICMP_ECHO_REPLY:
+        return None
+    return ident, seq
+
+
+class HostProbeState:
+    """Starea de probe pentru un singur host"""
+    __slots__ = ('host', 'address', 'pending_seq', 'sent_at', 'sent', 'received')
+
+    def __init__(self, host: str, address: Optional[str]):
+        self.host = host
+        self.address = address
+        self.pending_seq = None
+        self.sent_at = 0.0
+        self.sent = 0
+        self.received = 0
+
+
+class IcmpProbeEngine:
+    """Trimite și primește ICMP echo pentru mii de host-uri dintr-un singur thread"""
+
+    def __init__(self, on_result: Callable[[str, Optional[float]], None],
+                 interval: float = 2.0, timeout: float = 1.0,
+                 sock_factory: Optional[Callable[[], Tuple[socket.socket, bool]]] = None,
+                 scheduler: Optional[ProbeScheduler] = None):
+        self.on_result = on_result
+        self.interval = interval
+        self.timeout = min(timeout, interval * 0.9)
+        self.sock_factory = sock_factory or self.open_socket
+        # Planificatorul decide când pleacă fiecare probă (faze, backoff, limită pps)
+        self.scheduler = scheduler if scheduler is not None else ProbeScheduler(interval)
+        self.states: Dict[str, HostProbeState] = {}
+        self.is_running = False
+        self.thread = None
+
+        self._lock = threading.Lock()
+        self._deadlines: List[Tuple[float, int]] = []
+        self._pending: Dict[int, HostProbeState] = {}
+        self._seq = 0
+        self._sock = None
+        self._raw = False
+        self._ident = os.getpid() & 0xffff
+
+    @staticmethod
+    def open_socket() -> Tuple[socket.socket, bool]:
+        """Deschide un socket ICMP neprivilegiat (DGRAM), cu fallback la RAW"""
+        try:
+            return socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP), False
+        except (PermissionError, OSError):
+            return socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP), True
+
+    @classmethod
+    def is_supported(cls) -> bool:
+        """Verifică dacă procesul curent poate deschide un socket ICMP"""
+        try:
+            sock, _raw = cls.open_socket()
+            sock.close()
+            return True
+        except (PermissionError, OSError, AttributeError):
+            return False
+
+    def add_host(self, host: str, interval: Optional[float] = None):
+        """Adaugă un host în rotația de probe (opțional cu interval propriu)"""
+        try:
+            address = socket.gethostbyname(host)
+        except OSError:
+            address = None
+        with self._lock:
+            if host in self.states:
+                return
+            self.states[host] = HostProbeState(host, address)
+            self.scheduler.add(host, time.monotonic(), interval)
+
+    def remove_host(self, host: str):
+        """Scoate un host din rotație (intrările din heap sunt ignorate ulterior)"""
+        with self._lock:
+            self.scheduler.remove(host)
+            state = self.states.pop(host, None)
+            if state and state.pending_seq is not None:
+                self._pending.pop(state.pending_seq, None)
+
+    def start(self):
+        """Pornește bucla de probe într-un thread dedicat"""
+        if self.is_running:
+            return
+        self._sock, self._raw = self.sock_factory()
+        self._sock.setblocking(False)
+        if not self._raw:
+            # Pe Linux kernel-ul rescrie id-ul cu portul local al socket-ului
+            self._ident = self._sock.getsockname()[1] & 0xffff
+        self.is_running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Oprește bucla și închide socket-ul"""
+        self.is_running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+    def run(self):
+        """Bucla principală: trimite probe scadente, expiră timeout-uri, citește răspunsuri"""
+        selector = selectors.DefaultSelector()
+        selector.register(self._sock, selectors.EVENT_READ)
+        try:
+            while self.is_running:
+                now = time.monotonic()
+                self._expire(now)
+                self._send_due(now)
+                busy = time.monotonic() - now
+                selector.select(self._next_wakeup(time.monotonic()))
+                drained = time.monotonic()
+                self._drain()
+                PROBE_LOOP_SECONDS.observe(busy + time.monotonic() - drained)
+        finally:
+            selector.close()
+
+    def _next_seq(self) -> int:
+        # Sare peste secvențele încă în așteptare (mii de host-uri în zbor)
+        for _ in range(0x10000):
+            self._seq = (self._seq + 1) & 0xffff
+            if self._seq not in self._pending:
+                return self._seq
+        raise RuntimeError("Prea multe probe ICMP în așteptare")
+
+    def _send_due(self, now: float):
+        results = []
+        sent = 0
+        with self._lock:
+            for host, due in self.scheduler.pop_due(now):
+                state = self.states.get(host)
+                if state is None or state.pending_seq is not None:
+                    continue
+                if state.address is None:
+                    self.scheduler.record(host, False)
+                    results.append((host, None))
+                    continue
+                seq = self._next_seq()
+                packet = build_echo_request(self._ident, seq, struct.pack('!d', now))
+                PROBE_LAG_SECONDS.observe(time.monotonic() - due)
+                send_started = time.perf_counter()
+                try:
+                    self._sock.sendto(packet, (state.address, 0))
+                except OSError:
+                    self.scheduler.record(host, False)
+                    results.append((host, None))
+                    continue
+                PROBE_SEND_SECONDS.observe(time.perf_counter() - send_started)
+                sent += 1
+                state.pending_seq = seq
+                state.sent_at = now
+                state.sent += 1
+                self._pending[seq] = state
+                heapq.heappush(self._deadlines, (now + self.timeout, seq))
+        if sent:
+            PROBES_SENT.inc(sent)
+        self._emit(results)
+
+    def _expire(self, now: float):
+        results = []
+        with self._lock:
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _deadline, seq = heapq.heappop(self._deadlines)
+                state = self._pending.pop(seq, None)
+                if state is None:
+                    continue
+                state.pending_seq = None
+                self.scheduler.record(state.host, False)
+                results.append((state.host, None))
+        if results:
+            PROBES_LOST.inc(len(results))
+        self._emit(results)
+
+    def _drain(self):
+        results = []
+        while True:
+            try:
+                packet, addr = self._sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                break
+            received_at = time.monotonic()
+            parsed = parse_echo_reply(packet)
+            if parsed is None:
+                continue
+            ident, seq = parsed
+            if self._raw and ident != self._ident:
+                continue
+            with self._lock:
+                state = self._pending.get(seq)
+                if state is None or state.address != addr[0]:
+                    continue
+                del self._pending[seq]
+                state.pending_seq = None
+                state.received += 1
+                self.scheduler.record(state.host, True)
+                PROBE_RTT_SECONDS.observe(received_at - state.sent_at)
+                results.append((state.host, (received_at - state.sent_at) * 1000))
+        self._emit(results)
+
+    def _next_wakeup(self, now: float) -> float:
+        with self._lock:
+            candidates = [0.05]
+            wakeup = self.scheduler.next_wakeup(now)
+            if wakeup is not None:
+                candidates.append(wakeup)
+            if self._deadlines:
+                candidates.append(self._deadlines[0][0] - now)
+        return max(0.0, min(candidates))
+
+    def _emit(self, results: List[Tuple[str, Optional[float]]]):
+        for host, response_time in results:
+            try:
+                self.on_result(host, response_time)
+            except Exception as e:
+                CALLBACK_ERRORS.labels('icmp_engine').inc()
+                print(f"ICMP result callback error for {host}: {e}")
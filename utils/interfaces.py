@@ -0,0 +1,158 @@
+import fnmatch
+import ipaddress
+import socket
+import struct
+from typing import Dict, Iterable, List, Optional
+
+# Interfețe virtuale ignorate implicit (containere, mașini virtuale, tuneluri de test)
+DEFAULT_EXCLUDE = ('lo*', 'docker*', 'veth*', 'virbr*', 'br-*', 'ifb*', 'cni*', 'flannel*')
+
+# Prefixul cel mai larg scanat automat; o interfață /8 este limitată la /16 în jurul adresei
+MIN_PREFIX = 16
+
+# ioctl-uri Linux folosite când netifaces lipsește
+SIOCGIFFLAGS = 0x8913
+SIOCGIFADDR = 0x8915
+SIOCGIFNETMASK = 0x891b
+SIOCGIFHWADDR = 0x8927
+IFF_UP = 0x1
+
+
+def _interface(name: str, address: str, netmask: str, mac: str = 'N/A',
+               default: bool = False) -> Optional[Dict]:
+    try:
+        network = ipaddress.IPv4Network(f"{address}/{netmask}", strict=False)
+    except ValueError:
+        return None
+    return {
+        'name': name,
+        'address': address,
+        'netmask': str(network.netmask),
+        'prefixlen': network.prefixlen,
+        'network': str(network),
+        'mac': mac,
+        'is_loopback': network.is_loopback,
+        'is_default': default,
+    }
+
+
+def default_interface() -> Optional[str]:
+    """Interfața rutei implicite (netifaces, apoi /proc/net/route)"""
+    try:
+        import netifaces
+        gateway = netifaces.gateways().get('default', {}).get(netifaces.AF_INET)
+        if gateway:
+            return gateway[1]
+    except ImportError:
+        pass
+    try:
+        with open('/proc/net/route') as f:
+            next(f)
+            for line in f:
+                fields = line.split()
+                if len(fields) > 7 and fields[1] == '00000000' and fields[7] == '00000000':
+                    return fields[0]
+    except (OSError, StopIteration):
+        pass
+    return None
+
+
+def _netifaces_interfaces(default: Optional[str]) -> List[Dict]:
+    import netifaces
+    interfaces = []
+    for name in netifaces.interfaces():
+        addresses = netifaces.ifaddresses(name)
+        link = addresses.get(netifaces.AF_LINK, [{}])
+        mac = (link[0].get('addr') or 'N/A').upper()
+        # O interfață poate avea mai multe adrese IPv4 (alias-uri, VLAN-uri pe același port)
+        for entry in addresses.get(netifaces.AF_INET, []):
+            if entry.get('addr') and entry.get('netmask'):
+                interface = _interface(name, entry['addr'], entry['netmask'], mac, name == default)
+                if interface:
+                    interfaces.append(interface)
+    return interfaces
+
+
+def _ioctl_interfaces(default: Optional[str]) -> List[Dict]:
+    import fcntl
+    interfaces = []
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        for _index, name in socket.if_nameindex():
+            request = struct.pack('256s', name.encode()[:15])
+            try:
+                flags = struct.unpack('H', fcntl.ioctl(sock, SIOCGIFFLAGS, request)[16:18])[0]
+                if not flags & IFF_UP:
+                    continue
+                address = socket.inet_ntoa(fcntl.ioctl(sock, SIOCGIFADDR, request)[20:24])
+                netmask = socket.inet_ntoa(fcntl.ioctl(sock, SIOCGIFNETMASK, request)[20:24])
+            except OSError:
+                # Interfață fără adresă IPv4
+                continue
+            try:
+                raw = fcntl.ioctl(sock, SIOCGIFHWADDR, request)[18:24]
+                mac = ':'.join(f'{b:02X}' for b in raw)
+            except OSError:
+                mac = 'N/A'
+            interface = _interface(name, address, netmask, mac, name == default)
+            if interface:
+                interfaces.append(interface)
+    finally:
+        sock.close()
+    return interfaces
+
+
+def list_interfaces(include_loopback: bool = False) -> List[Dict]:
+    """Interfețele IPv4 cu prefixul real (netifaces; pe Linux fără netifaces prin ioctl)"""
+    default = default_interface()
+    try:
+        interfaces = _netifaces_interfaces(default)
+    except ImportError:
+        try:
+            interfaces = _ioctl_interfaces(default)
+        except (ImportError, AttributeError, OSError):
+            interfaces = []
+    if not include_loopback:
+        interfaces = [i for i in interfaces if not i['is_loopback']]
+    # Interfața rutei implicite prima, apoi în ordinea sistemului
+    return sorted(interfaces, key=lambda i: not i['is_default'])
+
+
+def discovery_network(interface: Dict, min_prefix: int = MIN_PREFIX) -> str:
+    """Subrețeaua de scanat pentru o interfață, limitată la `min_prefix` în jurul adresei"""
+    if interface['prefixlen'] >= min_prefix:
+        return interface['network']
+    return str(ipaddress.IPv4Network(f"{interface['address']}/{min_prefix}", strict=False))
+
+
+def select_interfaces(interfaces: List[Dict], names: Optional[Iterable[str]] = None,
+                      exclude: Iterable[str] = DEFAULT_EXCLUDE) -> List[Dict]:
+    """Interfețele alese explicit după nume sau, implicit, toate cele fizice/VLAN cu adrese utilizabile"""
+    if names:
+        wanted = set(names)
+        return [i for i in interfaces if i['name'] in wanted]
+    selected = []
+    for interface in interfaces:
+        if any(fnmatch.fnmatch(interface['name'], pattern) for pattern in exclude):
+            continue
+        if ipaddress.IPv4Address(interface['address']).is_link_local or interface['prefixlen'] >= 31:
+            continue
+        selected.append(interface)
+    return selected
+
+
+def split_networks(network_range: str) -> List[str]:
+    """Lista de subrețele dintr-un șir '192.168.1.0/24,10.0.0.0/22'"""
+    return [part.strip() for part in network_range.split(',') if part.strip()]
+
+
+def interface_for(network_range: str, interfaces: List[Dict]) -> Optional[str]:
+    """Interfața pe care se află o subrețea (prima care se suprapune)"""
+    try:
+        target = ipaddress.ip_network(network_range, strict=False)
+    except ValueError:
+        return None
+    for interface in interfaces:
+        if ipaddress.ip_network(interface['network']).overlaps(target):
+            return interface['name']
+    return None
@@ -0,0 +1,234 @@
+import ipaddress
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.metrics import CALLBACK_ERRORS
+
+# Tipurile de evenimente din fluxul de modificări
+JOINED = 'joined'          # dispozitiv nou sau revenit după ce a fost căzut
+LEFT = 'left'              # dispozitivul nu mai răspunde
+IP_CHANGED = 'ip_changed'  # același MAC, altă adresă IP
+UPDATED = 'updated'        # producător, nume sau interfață schimbate
+REMOVED = 'removed'        # intrarea a fost scoasă din inventar
+
+# Câmpurile urmărite pentru evenimentele 'updated'
+TRACKED_FIELDS = ('hostname', 'vendor', 'mac', 'interface')
+
+
+def _known(value) -> bool:
+    return value not in (None, '', 'N/A')
+
+
+class DeviceInventory:
+    """Inventarul dispozitivelor, indexat după IP și MAC, cu un flux de evenimente pentru actualizări incrementale"""
+
+    def __init__(self, max_events: int = 10000):
+        self._by_ip: Dict[str, Dict] = {}
+        self._by_mac: Dict[str, str] = {}
+        self._addresses: Dict[str, ipaddress.IPv4Address] = {}
+        self._events = deque(maxlen=max_events)
+        self._seq = 0
+        self._listeners: List[Callable[[List[Dict]], None]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._by_ip)
+
+    def __contains__(self, ip: str) -> bool:
+        return ip in self._by_ip
+
+    @property
+    def seq(self) -> int:
+        """Numărul ultimului eveniment emis"""
+        return self._seq
+
+    def subscribe(self, callback: Callable[[List[Dict]], None]):
+        """Înregistrează un callback(events), apelat după fiecare lot de modificări"""
+        self._listeners.append(callback)
+
+    def get(self, ip: str) -> Optional[Dict]:
+        with self._lock:
+            device = self._by_ip.get(ip)
+            return dict(device) if device else None
+
+    def by_mac(self, mac: str) -> Optional[Dict]:
+        with self._lock:
+            ip = self._by_mac.get(mac.upper())
+            return dict(self._by_ip[ip]) if ip else None
+
+    def devices(self, networks: Optional[Iterable] = None) -> List[Dict]:
+        """Copii ale dispozitivelor, ordonate după IP, opțional doar cele din `networks`"""
+        with self._lock:
+            items = [(self._addresses[ip], device) for ip, device in self._by_ip.items()]
+        if networks is not None:
+            networks = tuple(networks)
+            items = [(address, d) for address, d in items if any(address in n for n in networks)]
+        return [dict(d) for _address, d in sorted(items, key=lambda item: item[0])]
+
+    def events_since(self, seq: int) -> Tuple[Optional[List[Dict]], int]:
+        """Evenimentele de după `seq` și ultimul seq; None dacă unele au ieșit deja din istoric"""
+        with self._lock:
+            latest = self._seq
+            if seq >= latest:
+                return [], latest
+            if not self._events or self._events[0]['seq'] > seq + 1:
+                return None, latest
+            start = len(self._events) - (latest - seq)
+            return [self._events[i] for i in range(start, len(self._events))], latest
+
+    def recent(self, limit: int = 20) -> List[Dict]:
+        """Ultimele evenimente, cele mai noi primele"""
+        with self._lock:
+            return [self._events[-i] for i in range(1, min(limit, len(self._events)) + 1)]
+
+    def _emit(self, events: List[Dict], kind: str, device: Dict, timestamp: float, **extra):
+        self._seq += 1
+        event = {'seq': self._seq, 'type': kind, 'ip': device['ip'],
+                 'mac': device.get('mac', 'N/A'), 'timestamp': timestamp}
+        event.update(extra)
+        self._events.append(event)
+        events.append(event)
+
+    def _index(self, device: Dict):
+        self._by_ip[device['ip']] = device
+        self._addresses[device['ip']] = ipaddress.ip_address(device['ip'])
+        if _known(device.get('mac')):
+            self._by_mac[device['mac']] = device['ip']
+
+    def _unindex(self, ip: str) -> Optional[Dict]:
+        device = self._by_ip.pop(ip, None)
+        self._addresses.pop(ip, None)
+        if device is not None and self._by_mac.get(device.get('mac')) == ip:
+            del self._by_mac[device['mac']]
+        return device
+
+    def _reindex_mac(self, ip: str, old_mac: Optional[str], new_mac: Optional[str]):
+        # MAC-ul vechi nu trebuie să mai trimită la această intrare (altfel o mută greșit mai târziu)
+        if self._by_mac.get(old_mac) == ip:
+            del self._by_mac[old_mac]
+        if _known(new_mac):
+            self._by_mac[new_mac] = ip
+
+    def _upsert(self, found: Dict, now: float, keep: Iterable[str], events: List[Dict]):
+        ip = found['ip']
+        mac = found.get('mac', 'N/A')
+        if _known(mac):
+            mac = found['mac'] = mac.upper()
+        device = None
+        old_ip = self._by_mac.get(mac) if _known(mac) else None
+        if old_ip is not None and old_ip != ip:
+            # Același MAC la altă adresă (lease DHCP nou): intrarea se mută
+            displaced = self._by_ip.get(ip)
+            if displaced is not None:
+                self._unindex(ip)
+                self._emit(events, REMOVED, displaced, now)
+            device = self._unindex(old_ip)
+            device['ip'] = ip
+            device['previous_ips'] = (device.get('previous_ips', []) + [old_ip])[-8:]
+            self._index(device)
+            self._emit(events, IP_CHANGED, device, now, old_ip=old_ip, hostname=device.get('hostname', 'N/A'))
+        else:
+            device = self._by_ip.get(ip)
+            if (device is not None and _known(mac) and _known(device.get('mac'))
+                    and device['mac'] != mac):
+                # Alt dispozitiv a preluat adresa: intrarea veche dispare
+                self._unindex(ip)
+                self._emit(events, REMOVED, device, now)
+                device = None
+
+        if device is None:
+            device = {'ip': ip, 'mac': 'N/A', 'hostname': 'N/A', 'vendor': 'N/A', 'status': 'up'}
+            device.update({k: v for k, v in found.items() if _known(v) or k not in device})
+            device.update(status='up', first_seen=now, last_seen=now)
+            self._index(device)
+            self._emit(events, JOINED, device, now, hostname=device['hostname'])
+            return
+
+        previous_mac = device.get('mac')
+        changes = {}
+        for key, value in found.items():
+            if key in ('ip', 'status', 'first_seen', 'last_seen', 'previous_ips'):
+                continue
+            current = device.get(key)
+            # Un 'N/A' nou nu șterge o valoare aflată; câmpurile din `keep` se completează doar dacă lipsesc
+            if not _known(value) and key in device:
+                continue
+            if key in keep and _known(current):
+                continue
+            if current != value:
+                device[key] = value
+                if key in TRACKED_FIELDS:
+                    changes[key] = value
+        if 'mac' in changes:
+            self._reindex_mac(ip, previous_mac, device['mac'])
+        was_down = device.get('status') == 'down'
+        device.update(status='up', last_seen=max(now, device.get('last_seen', now)))
+        if was_down:
+            self._emit(events, JOINED, device, now, hostname=device.get('hostname', 'N/A'))
+        if changes:
+            self._emit(events, UPDATED, device, now, changes=changes)
+
+    def _notify(self, events: List[Dict]):
+        if not events:
+            return
+        for listener in self._listeners:
+            try:
+                listener(events)
+            except Exception as e:
+                CALLBACK_ERRORS.labels('inventory_listener').inc()
+                print(f"Inventory listener error: {e}")
+
+    def upsert(self, device: Dict, now: Optional[float] = None, keep: Iterable[str] = ()) -> List[Dict]:
+        """Adaugă sau actualizează un dispozitiv văzut acum (O(1)); returnează evenimentele emise"""
+        return self.apply([device], now, keep=keep)
+
+    def apply(self, found: Iterable[Dict], now: Optional[float] = None,
+              checked: Optional[Iterable[str]] = None, keep: Iterable[str] = ()) -> List[Dict]:
+        """Aplică rezultatul unei scanări: IP-urile din `checked` care nu au răspuns devin 'down'"""
+        now = time.time() if now is None else now
+        events = []
+        with self._lock:
+            seen = set()
+            for device in found:
+                self._upsert(dict(device), device.get('last_seen', now), keep, events)
+                seen.add(device['ip'])
+            for ip in checked or ():
+                device = self._by_ip.get(ip)
+                if ip not in seen and device is not None and device.get('status') != 'down':
+                    device['status'] = 'down'
+                    self._emit(events, LEFT, device, now)
+        self._notify(events)
+        return events
+
+    def update(self, ip: str, **fields) -> List[Dict]:
+        """Actualizează câmpuri fără a marca dispozitivul ca văzut (ex. nume rezolvat ulterior)"""
+        events = []
+        with self._lock:
+            device = self._by_ip.get(ip)
+            if device is None:
+                return events
+            if _known(fields.get('mac')):
+                fields['mac'] = fields['mac'].upper()
+            changes = {k: v for k, v in fields.items() if device.get(k) != v}
+            if changes:
+                previous_mac = device.get('mac')
+                device.update(changes)
+                if 'mac' in changes:
+                    self._reindex_mac(ip, previous_mac, changes['mac'])
+                tracked = {k: v for k, v in changes.items() if k in TRACKED_FIELDS}
+                if tracked:
+                    self._emit(events, UPDATED, device, time.time(), changes=tracked)
+        self._notify(events)
+        return events
+
+    def remove(self, ip: str) -> List[Dict]:
+        """Scoate un dispozitiv din inventar"""
+        events = []
+        with self._lock:
+            device = self._unindex(ip)
+            if device is not None:
+                self._emit(events, REMOVED, device, time.time())
+        self._notify(events)
+        return events
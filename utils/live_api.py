@@ -0,0 +1,358 @@
+import http.server
+import json
+import socketserver
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from utils.metrics import API_RESYNCS, API_SUBSCRIBERS, CALLBACK_ERRORS
+from utils.sla import SLA_WINDOWS, report_rows, rows_to_csv
+
+DEFAULT_API_PORT = 8768
+
+# Tipurile de mesaje din fluxul SSE
+EVENT_TYPES = ('samples', 'status', 'devices', 'alerts', 'speed')
+
+
+def _sse(seq: Optional[int], kind: str, data) -> bytes:
+    head = f"id: {seq}\n" if seq is not None else ''
+    body = json.dumps(data, separators=(',', ':'), default=str)
+    return f"{head}event: {kind}\ndata: {body}\n\n".encode('utf-8')
+
+
+class Subscriber:
+    """Coada unui client SSE; peste `max_pending` octeți coada se golește și clientul primește 'resync'"""
+
+    def __init__(self, types: Iterable[str], max_pending: int = 1 << 20):
+        self.types = set(types)
+        self.max_pending = max_pending
+        self.resyncs = 0
+        self.closed = False
+        self._chunks = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+
+    def offer(self, kind: str, payload: bytes):
+        if kind not in self.types and kind != 'resync':
+            return
+        with self._cond:
+            if self._size + len(payload) > self.max_pending:
+                # Client prea lent: în loc să crească memoria, pierde lotul și reia de la snapshot
+                self._chunks.clear()
+                self._size = 0
+                payload = _sse(None, 'resync', {'reason': 'slow_consumer'})
+                self.resyncs += 1
+                API_RESYNCS.inc()
+            self._chunks.append(payload)
+            self._size += len(payload)
+            self._cond.notify()
+
+    def take(self, timeout: float) -> List[bytes]:
+        """Tot ce s-a adunat de la ultima citire (listă goală după `timeout`)"""
+        with self._cond:
+            if not self._chunks and not self.closed:
+                self._cond.wait(timeout)
+            chunks = list(self._chunks)
+            self._chunks.clear()
+            self._size = 0
+            return chunks
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+
+class LiveFeed:
+    """Fluxul de modificări: eșantioane noi, schimbări de status, inventar, alerte și teste de viteză
+
+    Eșantioanele se adună în loturi la `batch_interval`; fiecare lot se serializează o singură
+    dată și aceiași octeți ajung la toți abonații.
+    """
+
+    def __init__(self, monitor, scanner=None, speed_tester=None, alerts=None,
+                 batch_interval: float = 1.0, history: int = 64, max_pending: int = 1 << 20):
+        self.monitor = monitor
+        self.scanner = scanner
+        self.speed_tester = speed_tester
+        self.batch_interval = batch_interval
+        self.max_pending = max_pending
+        self.seq = 0
+        self.is_running = False
+        self.thread = None
+
+        self._samples: List[Tuple[str, float, Optional[float]]] = []
+        self._status: Dict[str, str] = {}
+        self._status_changes: List[Dict] = []
+        self._devices: List[Dict] = []
+        self._alerts: List[Dict] = []
+        self._speed_at = None
+        # Ultimele mesaje, pentru reluarea după Last-Event-ID
+        self._history = deque(maxlen=history)
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        monitor.add_listener(self)
+        if scanner is not None:
+            scanner.inventory.subscribe(self._on_devices)
+        if alerts is not None:
+            alerts.add_sink(self._on_alert)
+        if speed_tester is not None:
+            latest = speed_tester.get_latest_speed()
+            self._speed_at = latest['timestamp'] if latest else None
+
+    def __call__(self, host: str, timestamp: float, response_time: Optional[float],
+                 status: str, packet_loss: bool):
+        with self._lock:
+            self._samples.append((host, round(timestamp, 3), response_time))
+            previous = self._status.get(host)
+            if previous != status:
+                self._status[host] = status
+                self._status_changes.append({'host': host, 'from': previous, 'to': status, 'timestamp': timestamp})
+
+    def _on_devices(self, events: List[Dict]):
+        with self._lock:
+            self._devices.extend(events)
+
+    def _on_alert(self, event: Dict):
+        with self._lock:
+            self._alerts.append(event)
+
+    def subscribe(self, types: Iterable[str] = EVENT_TYPES, last_id: Optional[int] = None) -> Subscriber:
+        """Un abonat nou; cu `last_id` primește întâi mesajele pierdute (sau 'resync' dacă sunt prea vechi)"""
+        subscriber = Subscriber(types, self.max_pending)
+        with self._lock:
+            if last_id is not None and last_id < self.seq:
+                if self._history and self._history[0][0] <= last_id + 1:
+                    for seq, kind, payload in self._history:
+                        if seq > last_id:
+                            subscriber.offer(kind, payload)
+                else:
+                    subscriber.offer('resync', _sse(None, 'resync', {'reason': 'history_expired'}))
+            self._subscribers.append(subscriber)
+            API_SUBSCRIBERS.set(len(self._subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscriber.close()
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+            API_SUBSCRIBERS.set(len(self._subscribers))
+
+    @property
+    def subscribers(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def start(self):
+        """Pornește thread-ul care publică loturile"""
+        self.is_running = True
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Oprește publicarea și închide abonații"""
+        self.is_running = False
+        self._stop.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, []
+            API_SUBSCRIBERS.set(0)
+        for subscriber in subscribers:
+            subscriber.close()
+
+    def _run(self):
+        while not self._stop.wait(self.batch_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                CALLBACK_ERRORS.labels('live_feed').inc()
+                print(f"Live feed error: {e}")
+
+    def flush(self):
+        """Publică tot ce s-a adunat de la lotul anterior"""
+        speed = None
+        if self.speed_tester is not None:
+            latest = self.speed_tester.get_latest_speed()
+            if latest and latest['timestamp'] != self._speed_at:
+                self._speed_at = latest['timestamp']
+                speed = latest
+        with self._lock:
+            batches = []
+            if self._samples:
+                # Formă compactă: [host, timestamp, rtt] (rtt null = pachet pierdut)
+                batches.append(('samples', self._samples))
+            if self._status_changes:
+                batches.append(('status', self._status_changes))
+            if self._devices:
+                batches.append(('devices', self._devices))
+            if self._alerts:
+                batches.append(('alerts', self._alerts))
+            if speed is not None:
+                batches.append(('speed', [speed]))
+            self._samples, self._status_changes, self._devices, self._alerts = [], [], [], []
+            first = self.seq + 1
+            self.seq += len(batches)
+        # Serializarea se face în afara lock-ului: listenerii probelor nu așteaptă după ea
+        messages = [(seq, kind, _sse(seq, kind, data)) for seq, (kind, data) in enumerate(batches, first)]
+        with self._lock:
+            self._history.extend(messages)
+            subscribers = list(self._subscribers)
+        for _seq, kind, payload in messages:
+            for subscriber in subscribers:
+                subscriber.offer(kind, payload)
+
+
+class _ApiHandler(http.server.BaseHTTPRequestHandler):
+    api = None
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/api/stream':
+            self._stream(parse_qs(url.query))
+            return
+        build = self.api.endpoints.get(url.path)
+        if build is None:
+            self.send_error(404)
+            return
+        body = self.api.cached(url.path, build)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv' if url.path.endswith('.csv') else 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, query: Dict[str, List[str]]):
+        feed = self.api.feed
+        if feed.subscribers >= self.api.max_subscribers:
+            self.send_error(503, 'Too many subscribers')
+            return
+        types = [t for part in query.get('types', []) for t in part.split(',') if t in EVENT_TYPES] or EVENT_TYPES
+        last_id = self.headers.get('Last-Event-ID') or (query.get('last_id') or [None])[0]
+        try:
+            last_id = int(last_id) if last_id is not None else None
+        except ValueError:
+            last_id = None
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.close_connection = True
+
+        subscriber = feed.subscribe(types, last_id)
+        try:
+            self.wfile.write(f"retry: {int(self.api.retry * 1000)}\n\n".encode())
+            self.wfile.flush()
+            while self.api.is_running and not subscriber.closed:
+                chunks = subscriber.take(self.api.keepalive)
+                # Comentariu SSE ca keepalive, ca proxy-urile să nu închidă conexiunea
+                self.wfile.write(b''.join(chunks) if chunks else b': keepalive\n\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            feed.unsubscribe(subscriber)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ApiHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class LiveApiServer:
+    """API HTTP local: snapshot-uri JSON și fluxul SSE /api/stream cu doar modificările"""
+
+    def __init__(self, feed: LiveFeed, host: str = '127.0.0.1', port: int = DEFAULT_API_PORT,
+                 snapshot: Optional[Callable[[], bytes]] = None, max_subscribers: int = 1000,
+                 keepalive: float = 15.0, retry: float = 2.0, cache_age: float = 1.0):
+        self.feed = feed
+        self.max_subscribers = max_subscribers
+        self.keepalive = keepalive
+        self.retry = retry
+        self.cache_age = cache_age
+        self.is_running = False
+        self._cache: Dict[str, Tuple[float, bytes]] = {}
+        self._cache_lock = threading.Lock()
+
+        self.endpoints: Dict[str, Callable[[], bytes]] = {
+            '/api/hosts': self._hosts,
+            '/api/stats': self._stats,
+        }
+        if snapshot is not None:
+            # Snapshot-ul colectorului este deja serializat o dată pe interval
+            self.endpoints['/api/snapshot'] = snapshot
+        if feed.scanner is not None:
+            self.endpoints['/api/devices'] = lambda: self._json(feed.scanner.inventory.devices())
+        if feed.speed_tester is not None:
+            self.endpoints['/api/speed'] = lambda: self._json(feed.speed_tester.get_speed_data())
+        sla = getattr(feed.monitor, 'sla', None)
+        if sla is not None:
+            for window in SLA_WINDOWS:
+                # Rapoarte SLA pe 1h/1d/30d, JSON sau CSV pentru consum în bloc
+                self.endpoints[f'/api/sla/{window}'] = lambda w=window: self._json(sla.report(w))
+                self.endpoints[f'/api/sla/{window}.csv'] = \
+                    lambda w=window: rows_to_csv(report_rows(sla.report(w))).encode('utf-8')
+
+        handler = type('ApiHandler', (_ApiHandler,), {'api': self})
+        self._server = _ApiHTTPServer((host, port), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @staticmethod
+    def _json(data) -> bytes:
+        return json.dumps(data, separators=(',', ':'), default=str).encode('utf-8')
+
+    def cached(self, name: str, build: Callable[[], bytes]) -> bytes:
+        """Răspunsul reutilizat cât timp are sub `cache_age` secunde (mulți clienți, un singur calcul)"""
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = self._cache.get(name)
+            if entry is not None and now - entry[0] < self.cache_age:
+                return entry[1]
+        body = build()
+        with self._cache_lock:
+            self._cache[name] = (now, body)
+        return body
+
+    def _hosts(self) -> bytes:
+        monitor = self.feed.monitor
+        hosts = {}
+        for ip, data in list(monitor.ping_data.items()):
+            hosts[ip] = {'hostname': data['hostname'], 'status': data['status'], 'latest': monitor.get_latest(ip)}
+        return self._json({'seq': self.feed.seq, 'hosts': hosts})
+
+    def _stats(self) -> bytes:
+        return self._json(self.feed.monitor.get_stats(window=300))
+
+    def start(self):
+        """Pornește publicarea loturilor și serverul HTTP în fundal"""
+        self.is_running = True
+        if not self.feed.is_running:
+            self.feed.start()
+        self._thread.start()
+
+    def stop(self):
+        """Oprește serverul și deconectează abonații"""
+        self.is_running = False
+        self.feed.stop()
+        self._server.shutdown()
+        self._server.server_close()
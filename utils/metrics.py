@@ -0,0 +1,312 @@
+import bisect
+import http.server
+import math
+import socketserver
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Bucket-uri implicite (secunde): de la sub-milisecundă la zeci de secunde
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple = ()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + '}'
+
+
+class _Metric:
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional['Registry'] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **kwargs):
+        """Seria pentru o combinație de etichete (creată la prima folosire, apoi din cache)"""
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _default(self):
+        return self._children[()]
+
+    def collect(self, openmetrics: bool = False) -> List[str]:
+        name = self._family_name(openmetrics)
+        lines = [f"# HELP {name} {self.documentation}", f"# TYPE {name} {self.type_name}"]
+        for values, child in list(self._children.items()):
+            lines.extend(self._samples(values, child))
+        return lines
+
+    def _family_name(self, openmetrics: bool) -> str:
+        return self.name
+
+    def _samples(self, values, child) -> List[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Contor monoton crescător"""
+    type_name = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def _family_name(self, openmetrics: bool) -> str:
+        # Formatul text Prometheus declară numele complet, OpenMetrics doar baza
+        return self.name if openmetrics else f"{self.name}_total"
+
+    def _samples(self, values, child):
+        return [f"{self.name}_total{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class _GaugeChild:
+    __slots__ = ('value', 'function')
+
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]):
+        """Valoarea este citită la fiecare scrape (ex. numărul de thread-uri)"""
+        self.function = function
+
+    def get(self) -> float:
+        return self.function() if self.function else self.value
+
+
+class Gauge(_Metric):
+    """Valoare instantanee"""
+    type_name = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default().set_function(function)
+
+    def _samples(self, values, child):
+        try:
+            value = child.get()
+        except Exception:
+            return []
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}"]
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    """Distribuție pe bucket-uri cumulative (format Prometheus)"""
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional['Registry'] = None):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        """Context manager care măsoară durata blocului"""
+        return self._default().time()
+
+    def _samples(self, values, child):
+        with child._lock:
+            counts = list(child.counts)
+            total = child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (math.inf,), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, values, (('le', _format_value(bound)),))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Colecția de metrici expuse pe /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            # La reîncărcarea modulului (ex. Streamlit) ultima definiție înlocuiește metrica veche
+            self._metrics[metric.name] = metric
+
+    def render(self, openmetrics: bool = False) -> str:
+        """Formatul text Prometheus (sau OpenMetrics, cu terminatorul # EOF)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect(openmetrics))
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Metricile aplicației, folosite direct de modulele instrumentate
+PROBES_SENT = Counter('network_monitor_probes_sent', "Probe ICMP trimise")
+PROBES_LOST = Counter('network_monitor_probes_lost', "Probe ICMP fără răspuns în timeout")
+PROBE_SEND_SECONDS = Histogram('network_monitor_probe_send_seconds', "Durata apelului sendto pentru o probă",
+                               buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01))
+PROBE_RTT_SECONDS = Histogram('network_monitor_probe_rtt_seconds', "Timpul de răspuns al probelor")
+PROBE_LAG_SECONDS = Histogram('network_monitor_probe_lag_seconds',
+                              "Întârzierea trimiterii față de momentul programat")
+PROBE_LOOP_SECONDS = Histogram('network_monitor_probe_loop_seconds',
+                               "Durata unei iterații a buclei de probe (fără așteptare)")
+PING_COMMAND_SECONDS = Histogram('network_monitor_ping_command_seconds',
+                                 "Durata comenzii ping (fallback prin subprocess)")
+PARSE_SECONDS = Histogram('network_monitor_parse_seconds', "Timpul de parsare a rezultatelor",
+                          ['source'])
+SCAN_SECONDS = Histogram('network_monitor_scan_seconds', "Durata scanării rețelei", ['method'])
+SCAN_DEVICES = Gauge('network_monitor_scan_devices', "Dispozitive găsite la ultima scanare", ['method'])
+SPEEDTEST_PHASE_SECONDS = Histogram('network_monitor_speedtest_phase_seconds',
+                                    "Durata fazelor testului de viteză", ['phase'])
+SPEEDTEST_ERRORS = Counter('network_monitor_speedtest_errors', "Teste de viteză eșuate")
+UI_RENDER_SECONDS = Histogram('network_monitor_ui_render_seconds', "Durata unei randări a dashboard-ului")
+SNAPSHOT_SECONDS = Histogram('network_monitor_snapshot_seconds', "Durata construirii unui snapshot")
+STORE_BATCH_SECONDS = Histogram('network_monitor_store_batch_seconds', "Durata scrierii unui lot în SQLite")
+STORE_QUEUE = Gauge('network_monitor_store_queue', "Scrieri în așteptare pentru SQLite")
+CALLBACK_ERRORS = Counter('network_monitor_callback_errors', "Erori în callback-uri și listeneri",
+                          ['component'])
+ALERTS_FIRED = Counter('network_monitor_alerts_fired', "Alerte declanșate", ['rule'])
+ALERTS_ACTIVE = Gauge('network_monitor_alerts_active', "Alerte active în acest moment")
+API_SUBSCRIBERS = Gauge('network_monitor_api_subscribers', "Clienți conectați la fluxul SSE")
+API_RESYNCS = Counter('network_monitor_api_resyncs', "Clienți SSE prea lenți, trimiși la snapshot")
+PROBE_WORKERS = Gauge('network_monitor_probe_workers', "Workeri de probe conectați la coordonator")
+THREADS = Gauge('network_monitor_threads', "Thread-uri active în proces")
+THREADS.set_function(threading.active_count)
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        openmetrics = 'application/openmetrics-text' in self.headers.get('Accept', '')
+        body = self.registry.render(openmetrics).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+                         if openmetrics else 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class MetricsServer:
+    """Endpoint HTTP local /metrics pentru scraping Prometheus"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9105, registry: Registry = REGISTRY):
+        handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry})
+        self._server = _ThreadingHTTPServer((host, port), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        """Pornește serverul în fundal"""
+        self._thread.start()
+
+    def stop(self):
+        """Oprește serverul"""
+        self._server.shutdown()
+        self._server.server_close()
@@ -1,44 +1,121 @@
 import streamlit as st
-import subprocess
-import platform
+import copy
+import functools
 import ipaddress
+import queue
 import socket
-from typing import List, Dict, Optional
+import threading
+import time
+from typing import Callable, Iterator, List, Dict, Optional
+
+from utils.arp_sweep import ArpSweeper, ScapyArpTransport, IcmpSweepTransport
+from utils.hostname_resolver import HostnameResolver
+from utils.inventory import DeviceInventory
+from utils.interfaces import discovery_network, interface_for, list_interfaces, select_interfaces, split_networks
+from utils.metrics import SCAN_DEVICES, SCAN_SECONDS
+from utils.nmap_stream import NmapStreamScanner
+from utils.oui_lookup import OuiIndex
+from utils.passive_discovery import PassiveDiscovery
+from utils.service_scanner import ServiceScanner, parse_ports
+from utils.startup import PROFILE, Capabilities, default_capabilities
 
 class NetworkScanner:
-    def __init__(self):
-        self.nm = None
-        self.devices = []
-        
-        # Verifică dacă nmap este disponibil
-        if self._check_nmap_installed():
-            try:
-                import nmap
-                self.nm = nmap.PortScanner()
-                st.success("✓ Nmap este disponibil - scanare completă activată")
-            except ImportError:
-                st.warning("⚠ python-nmap nu este instalat. Folosește `pip install python-nmap` pentru funcționalități complete")
-            except Exception as e:
-                st.warning(f"⚠ Eroare la inițializarea nmap: {e}")
-        else:
-            st.warning("⚠ Nmap nu este instalat pe sistem. Funcționalitățile de scanare vor fi limitate (mod demo).")
-    
-    def _check_nmap_installed(self) -> bool:
-        """Verifică dacă nmap este instalat în sistem"""
+    def __init__(self, cache_ttl: float = 120, full_sweep_interval: float = 900,
+                 interface_rate: float = 500, capabilities: Optional[Capabilities] = None):
+        # nmap și motorul nativ se aleg la prima utilizare, din verificări făcute în fundal
+        self.capabilities = capabilities or default_capabilities()
+        self._nm = None
+        self._sweeper = None
+        self._backends_ready = False
+        self._backends_lock = threading.Lock()
+
+        # Interfețele locale și câte un sweeper per interfață (buget de rată separat)
+        self.interfaces = []
+        self.interface_rate = interface_rate
+        self._sweepers = {}
+
+        # Inventarul indexat după IP/MAC; cache-ul per rețea păstrează doar momentele scanărilor
+        self.inventory = DeviceInventory()
+
+        # Cache de scanare per rețea: stale-while-revalidate în fundal
+        self.cache_ttl = cache_ttl
+        self.full_sweep_interval = full_sweep_interval
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        self._refreshing = set()
+        self._last_range = None
+        self._local = threading.local()
+
+        # Baza locală OUI pentru producători (independentă de nmap)
         try:
-            if platform.system() == "Windows":
-                result = subprocess.run(["where", "nmap"], capture_output=True, text=True, timeout=5)
-            else:
-                result = subprocess.run(["which", "nmap"], capture_output=True, text=True, timeout=5)
-            return result.returncode == 0
-        except subprocess.TimeoutExpired:
-            st.error("⏰ Timeout la verificarea nmap")
-            return False
-        except Exception:
-            return False
+            self.oui = OuiIndex.open_default()
+        except (OSError, ValueError) as e:
+            print(f"OUI index unavailable: {e}")
+            self.oui = None
+
+        # Numele host-urilor se rezolvă separat de descoperire, cu cache între scanări
+        self.resolver = HostnameResolver()
+        self._resolving = set()
+
+        # Scanare de servicii prin conexiuni TCP (fără proces nmap per host)
+        self.service_scanner = ServiceScanner()
+
+        # Descoperire pasivă (ARP/DHCP/mDNS): pornită la cerere cu start_passive()
+        self.passive = None
+
+    def _init_backends(self):
+        """Alege motorul nativ și scannerul nmap (o singură dată, la prima utilizare)"""
+        with self._backends_lock:
+            if self._backends_ready:
+                return
+            with PROFILE.step('init', 'NetworkScanner backends'):
+                # Motor nativ de descoperire: ARP cu root, altfel ICMP echo
+                if self.capabilities.get('scapy_arp'):
+                    self._sweeper = ArpSweeper(ScapyArpTransport)
+                elif self.capabilities.get('icmp'):
+                    self._sweeper = ArpSweeper(IcmpSweepTransport)
+
+                # nmap rulează per scanare, cu XML parsat în flux (fără python-nmap)
+                if self.capabilities.get('nmap'):
+                    self._nm = NmapStreamScanner()
+                    self._notify('success', "✓ Nmap este disponibil - scanare completă activată")
+                else:
+                    self._notify('warning', "⚠ Nmap nu este instalat pe sistem. "
+                                            "Funcționalitățile de scanare vor fi limitate.")
+            self._backends_ready = True
+
+    @property
+    def nm(self):
+        if not self._backends_ready:
+            self._init_backends()
+        return self._nm
+
+    @property
+    def sweeper(self) -> Optional[ArpSweeper]:
+        if not self._backends_ready:
+            self._init_backends()
+        return self._sweeper
     
-    def get_local_network(self) -> str:
-        """Detectează rețeaua locală"""
+    def get_interfaces(self, refresh: bool = False) -> List[Dict]:
+        """Interfețele IPv4 locale cu prefixul real (enumerate o singură dată, apoi din memorie)"""
+        if refresh or not self.interfaces:
+            try:
+                self.interfaces = list_interfaces()
+            except Exception as e:
+                print(f"Interface enumeration error: {e}")
+                self.interfaces = []
+        return self.interfaces
+
+    def get_local_network(self, interfaces: Optional[List[str]] = None) -> str:
+        """Detectează rețelele locale: subrețelele tuturor interfețelor selectate, separate prin virgulă"""
+        selected = select_interfaces(self.get_interfaces(refresh=True), interfaces)
+        if selected:
+            networks = list(dict.fromkeys(discovery_network(i) for i in selected))
+            names = ', '.join(f"{i['name']} {discovery_network(i)}" for i in selected)
+            self._notify('success', f"✓ Rețele detectate automat: {names}")
+            return ','.join(networks)
+
+        # Fără interfețe enumerate: IP-ul rutei către internet, presupunând /24
         try:
             # Obține IP-ul local
             s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -49,53 +126,184 @@ class NetworkScanner:
             # Creează o adresă de rețea bazată pe IP-ul local
             ip_obj = ipaddress.IPv4Address(local_ip)
             network = ipaddress.IPv4Network(f"{ip_obj}/24", strict=False)
-            st.success(f"✓ Rețea detectată automat: {network}")
+            self._notify('success', f"✓ Rețea detectată automat: {network}")
             return str(network)
         except Exception as e:
-            st.warning(f"⚠ Nu s-a putut detecta rețeaua automat: {e}")
+            self._notify('warning', f"⚠ Nu s-a putut detecta rețeaua automat: {e}")
             # Rețea implicită dacă detectarea eșuează
             return "192.168.1.0/24"
     
-    def scan_network(self, network_range: str) -> List[Dict]:
+    def scan_network(self, network_range: str, on_device: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
         """Scanează rețeaua - folosește nmap dacă disponibil, altwise fallback la metoda simplă"""
-        self.devices = []
+        method = self.get_scan_method()
+        started = time.perf_counter()
+        ranges = split_networks(network_range)
         
-        if self.nm:
+        if len(ranges) > 1 and (self.sweeper or self.nm):
+            # Mai multe interfețe/subrețele: descoperire concurentă, un singur inventar
+            devices = self._scan_interfaces(ranges, on_device)
+        elif self.sweeper and (not self.nm or self._is_large_range(network_range)):
+            # Range-urile mari (sau lipsa nmap) merg prin motorul nativ, în flux
+            devices = self._scan_with_sweep(network_range, on_device)
+        elif self.nm:
             # Folosește nmap dacă este disponibil
-            return self._scan_with_nmap(network_range)
+            devices = self._scan_with_nmap(network_range, on_device)
         else:
             # Fallback la metoda simplă
-            return self._scan_simple_fallback(network_range)
+            devices = self._scan_simple_fallback(ranges[0] if ranges else network_range)
+
+        self._tag_interfaces(devices)
+        SCAN_SECONDS.labels(method).observe(time.perf_counter() - started)
+        SCAN_DEVICES.labels(method).set(len(devices))
+        return devices
     
-    def _scan_with_nmap(self, network_range: str) -> List[Dict]:
-        """Scanează rețeaua folosind nmap"""
+    def _scan_with_nmap(self, network_range: str, on_device: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Scanează rețeaua folosind nmap; host-urile apar pe măsură ce nmap le raportează"""
         try:
-            st.info(f"🔍 Scanare rețea {network_range} cu nmap...")
+            self._notify('info', f"🔍 Scanare rețea {network_range} cu nmap...")
             
-            # Scanare ping (host discovery)
-            self.nm.scan(hosts=network_range, arguments='-sn')
+            devices = []
+            for device in self._nmap_ping_sweep(network_range):
+                devices.append(device)
+                if on_device:
+                    on_device(device)
+            devices.sort(key=lambda d: ipaddress.ip_address(d['ip']))
             
-            self.devices = []
-            for host in self.nm.all_hosts():
-                device_info = {
-                    'ip': host,
-                    'mac': self.nm[host]['addresses'].get('mac', 'N/A'),
-                    'hostname': self.nm[host].hostname() or 'N/A',
-                    'status': 'up',
-                    'vendor': self.nm[host].get('vendor', {}).get(self.nm[host]['addresses'].get('mac', ''), 'N/A')
-                }
-                self.devices.append(device_info)
-            
-            st.success(f"✓ Scanare completă: {len(self.devices)} dispozitive găsite")
-            return self.devices
+            self._notify('success', f"✓ Scanare completă: {len(devices)} dispozitive găsite")
+            return devices
             
         except Exception as e:
-            st.error(f"❌ Eroare scanare nmap: {e}")
+            self._notify('error', f"❌ Eroare scanare nmap: {e}")
             return self._scan_simple_fallback(network_range)
     
+    @staticmethod
+    def _is_large_range(network_range: str) -> bool:
+        try:
+            return ipaddress.ip_network(network_range, strict=False).num_addresses > 256
+        except ValueError:
+            return False
+
+    def discover_stream(self, network_range: str) -> Iterator[Dict]:
+        """Generează dispozitivele pe măsură ce răspund (range-urile mari sunt împărțite pe procese)"""
+        if not self.sweeper:
+            yield from self.scan_network(network_range)
+            return
+        sweeper = self._interface_sweeper(interface_for(network_range, self.get_interfaces()))
+        yield from sweeper.sweep_sharded(network_range)
+
+    def _interface_sweeper(self, interface: Optional[str]) -> ArpSweeper:
+        """Sweeper legat de o interfață, cu propriul buget de pachete pe secundă"""
+        if interface is None:
+            return self.sweeper
+        sweeper = self._sweepers.get(interface)
+        if sweeper is None:
+            transport_factory = self.sweeper.transport_factory
+            if transport_factory is ScapyArpTransport:
+                # ARP se trimite pe interfața subrețelei; ICMP urmează tabela de rutare
+                transport_factory = functools.partial(ScapyArpTransport, iface=interface)
+            sweeper = ArpSweeper(transport_factory, rate=self.interface_rate)
+            self._sweepers[interface] = sweeper
+        return sweeper
+
+    def _tag_interfaces(self, devices: List[Dict]) -> List[Dict]:
+        """Marchează fiecare dispozitiv cu interfața locală prin care este accesibil"""
+        interfaces = self.get_interfaces()
+        for device in devices:
+            if device.get('interface', 'N/A') == 'N/A':
+                device['interface'] = interface_for(device['ip'], interfaces) or 'N/A'
+        return devices
+
+    def _scan_interfaces(self, ranges: List[str],
+                         on_device: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Scanează subrețelele în paralel; rezultatele se unesc într-un singur inventar"""
+        self._notify('info', f"🔍 Scanare {len(ranges)} subrețele ({self.get_scan_method()})...")
+        results = queue.Queue()
+
+        def run(network_range: str):
+            # Mesajele Streamlit rămân în thread-ul apelantului
+            self._local.quiet = True
+            try:
+                if self.sweeper:
+                    for device in self.discover_stream(network_range):
+                        results.put(device)
+                else:
+                    interface = interface_for(network_range, self.get_interfaces())
+                    for device in self._nmap_ping_sweep(network_range, interface):
+                        results.put(device)
+            except Exception as e:
+                print(f"Scan error for {network_range}: {e}")
+            finally:
+                results.put(None)
+
+        threads = [threading.Thread(target=run, args=(network_range,), daemon=True) for network_range in ranges]
+        for thread in threads:
+            thread.start()
+
+        devices = {}
+        finished = 0
+        while finished < len(threads):
+            device = results.get()
+            if device is None:
+                finished += 1
+                continue
+            self._tag_interfaces(self._resolve_vendors([device]))
+            known = devices.get(device['ip'])
+            if known is not None:
+                # Același host văzut pe mai multe interfețe (subrețele suprapuse)
+                if device['interface'] not in known['interface'].split(','):
+                    known['interface'] += f",{device['interface']}"
+                continue
+            devices[device['ip']] = device
+            if on_device:
+                on_device(device)
+
+        found = sorted(devices.values(), key=lambda d: ipaddress.ip_address(d['ip']))
+        self._notify('success', f"✓ Scanare completă: {len(found)} dispozitive găsite")
+        return found
+
+    def _scan_with_sweep(self, network_range: str, on_device: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Scanează rețeaua cu motorul nativ ARP/ICMP"""
+        try:
+            self._notify('info', f"🔍 Scanare rețea {network_range} ({self.get_scan_method()})...")
+            devices = []
+            for device in self.discover_stream(network_range):
+                self._tag_interfaces(self._resolve_vendors([device]))
+                devices.append(device)
+                if on_device:
+                    on_device(device)
+            devices.sort(key=lambda d: ipaddress.ip_address(d['ip']))
+            self._notify('success', f"✓ Scanare completă: {len(devices)} dispozitive găsite")
+            return devices
+        except Exception as e:
+            self._notify('error', f"❌ Eroare scanare {self.get_scan_method()}: {e}")
+            if self.nm:
+                return self._scan_with_nmap(network_range, on_device)
+            return self._scan_simple_fallback(network_range)
+
+    def _nmap_ping_sweep(self, hosts: str, interface: Optional[str] = None) -> Iterator[Dict]:
+        """Host discovery nmap (-sn) pentru un range sau o listă de IP-uri separate prin spațiu, în flux"""
+        # -n: fără DNS în nmap; numele vin din HostnameResolver
+        arguments = '-sn -n'
+        if interface:
+            arguments += f' -e {interface} --max-rate {self.interface_rate:g}'
+        # Fiecare scanare are propriul proces nmap; host-urile vin când nmap închide elementul <host>
+        for device in self.nm.scan(hosts, arguments):
+            device.pop('ports', None)
+            yield self._resolve_vendors([device])[0]
+
+    def _resolve_vendors(self, devices: List[Dict]) -> List[Dict]:
+        """Completează producătorul din baza OUI acolo unde scanarea nu l-a furnizat"""
+        if self.oui is None:
+            return devices
+        missing = [d for d in devices if d.get('vendor', 'N/A') == 'N/A' and d.get('mac', 'N/A') != 'N/A']
+        for device, vendor in zip(missing, self.oui.lookup_many([d['mac'] for d in missing])):
+            if vendor:
+                device['vendor'] = vendor
+        return devices
+
     def _scan_simple_fallback(self, network_range: str) -> List[Dict]:
         """Metodă fallback simplă pentru când nmap nu este disponibil"""
-        st.info("🎭 Mod demo: afișez dispozitive simulate (nmap nu este disponibil)")
+        self._notify('info', "🎭 Mod demo: afișez dispozitive simulate (nmap nu este disponibil)")
         
         # Parsează rețeaua pentru a genera IP-uri relevante
         try:
@@ -103,7 +311,7 @@ class NetworkScanner:
             base_ip = str(network.network_address).rsplit('.', 1)[0]
             
             # Dispozitive simulate bazate pe rețeaua actuală
-            self.devices = [
+            devices = [
                 {
                     'ip': f'{base_ip}.1', 
                     'mac': '00:11:22:33:44:55', 
@@ -135,34 +343,219 @@ class NetworkScanner:
             ]
         except:
             # Dispozitive default dacă parsing-ul eșuează
-            self.devices = [
+            devices = [
                 {'ip': '192.168.1.1', 'mac': '00:11:22:33:44:55', 'hostname': 'router', 'status': 'up', 'vendor': 'Router Vendor'},
                 {'ip': '192.168.1.100', 'mac': 'AA:BB:CC:DD:EE:FF', 'hostname': 'laptop', 'status': 'up', 'vendor': 'Laptop Brand'},
                 {'ip': '192.168.1.101', 'mac': '11:22:33:44:55:66', 'hostname': 'phone', 'status': 'up', 'vendor': 'Phone Maker'},
             ]
         
-        st.success(f"✓ Mod demo: {len(self.devices)} dispozitive simulate")
-        return self.devices
+        self._notify('success', f"✓ Mod demo: {len(devices)} dispozitive simulate")
+        return devices
     
-    def get_device_services(self, ip: str) -> Dict:
-        """Obține serviciile disponibile pe un dispozitiv"""
-        if not self.nm:
-            return {'http': 'Simulated', 'ssh': 'Simulated'}
-        
+    def _notify(self, level: str, message: str):
+        """Afișează un mesaj Streamlit, cu excepția scanărilor din fundal"""
+        if getattr(self._local, 'quiet', False):
+            return
+        getattr(st, level)(message)
+
+    def get_devices(self, network_range: str, ttl: Optional[float] = None,
+                    on_device: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Returnează imediat dispozitivele din cache; dacă au expirat, le reîmprospătează în fundal"""
+        ttl = self.cache_ttl if ttl is None else ttl
+        with self._cache_lock:
+            entry = self._cache.get(network_range)
+
+        if entry is None:
+            # Prima scanare a rețelei - nu există nimic de afișat până nu se termină
+            devices = self.scan_network(network_range, on_device)
+            now = time.time()
+            self.inventory.apply(devices, now)
+            with self._cache_lock:
+                self._cache[network_range] = {
+                    'scanned_at': now,
+                    'full_sweep_at': now,
+                }
+            self._resolve_hostnames(network_range)
+            return self._cached_devices(network_range)
+
+        if time.time() - entry['scanned_at'] > ttl:
+            self._start_refresh(network_range)
+        return self._cached_devices(network_range)
+
+    def _resolve_hostnames(self, network_range: str):
+        """Completează numele din cache imediat; restul se rezolvă în fundal și apar la următoarea citire"""
+        devices = self.inventory.devices(_range_networks(network_range))
+        with self._cache_lock:
+            unnamed = [d['ip'] for d in devices
+                       if d.get('hostname', 'N/A') == 'N/A' and d['ip'] not in self._resolving]
+        known, missing = self.resolver.cached(unnamed)
+        for ip, name in known.items():
+            if name:
+                self.inventory.update(ip, hostname=name)
+        with self._cache_lock:
+            self._resolving.update(missing)
+        if not missing:
+            return
+
+        def on_resolved(ip: str, name: Optional[str]):
+            with self._cache_lock:
+                self._resolving.discard(ip)
+            if name:
+                self.inventory.update(ip, hostname=name)
+
+        def run():
+            try:
+                self.resolver.resolve_many(missing, on_resolved)
+            except Exception as e:
+                print(f"Hostname resolution error: {e}")
+            finally:
+                with self._cache_lock:
+                    self._resolving.difference_update(missing)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _cached_devices(self, network_range: str) -> List[Dict]:
+        with self._cache_lock:
+            cached = network_range in self._cache
+            self._last_range = network_range
+        return self.inventory.devices(_range_networks(network_range)) if cached else []
+
+    @property
+    def devices(self) -> List[Dict]:
+        """Copii ale dispozitivelor din ultima rețea citită; nu este stare partajată între fire"""
+        with self._cache_lock:
+            network_range = self._last_range
+        return self._cached_devices(network_range) if network_range is not None else []
+
+    def invalidate_cache(self, network_range: Optional[str] = None, drop: bool = False):
+        """Marchează cache-ul ca expirat (sau îl șterge complet cu drop=True)"""
+        with self._cache_lock:
+            ranges = list(self._cache) if network_range is None else [network_range]
+            for key in ranges:
+                if key not in self._cache:
+                    continue
+                if drop:
+                    del self._cache[key]
+                else:
+                    # Forțează un sweep complet la următoarea reîmprospătare
+                    self._cache[key]['scanned_at'] = 0
+                    self._cache[key]['full_sweep_at'] = 0
+        if not drop:
+            for key in ranges:
+                self._start_refresh(key)
+
+    def is_refreshing(self, network_range: Optional[str] = None) -> bool:
+        """Verifică dacă o reîmprospătare rulează în fundal"""
+        with self._cache_lock:
+            return bool(self._refreshing) if network_range is None else network_range in self._refreshing
+
+    def _start_refresh(self, network_range: str):
+        with self._cache_lock:
+            if network_range in self._refreshing or network_range not in self._cache:
+                return
+            self._refreshing.add(network_range)
+        thread = threading.Thread(target=self._refresh, args=(network_range,), daemon=True)
+        thread.start()
+
+    def _refresh(self, network_range: str):
+        """Reîmprospătare în fundal: sweep complet rar, altfel doar host-urile incerte"""
+        self._local.quiet = True
         try:
-            # Scanare porturi comune
-            self.nm.scan(ip, '21-443')
-            services = {}
-            
-            for proto in self.nm[ip].all_protocols():
-                ports = self.nm[ip][proto].keys()
-                for port in ports:
-                    service_name = self.nm[ip][proto][port]['name']
-                    services[port] = service_name
-            
-            return services
-        except:
-            return {'http': 'N/A', 'ssh': 'N/A'}
+            with self._cache_lock:
+                entry = self._cache.get(network_range)
+                if entry is None:
+                    return
+                full = time.time() - entry['full_sweep_at'] > self.full_sweep_interval
+                if self.passive is not None and entry['full_sweep_at']:
+                    # Dispozitivele noi apar din traficul ascultat; sweep complet doar la cerere
+                    full = False
+            known = self.inventory.devices(_range_networks(network_range))
+            uncertain = [d['ip'] for d in known if time.time() - d['last_seen'] > self.cache_ttl]
+
+            if full:
+                found = self.scan_network(network_range)
+            elif uncertain and self.sweeper:
+                found = self._resolve_vendors(list(self.sweeper.sweep_hosts(uncertain)))
+            elif uncertain and self.nm:
+                found = list(self._nmap_ping_sweep(' '.join(uncertain)))
+            else:
+                # Fără nmap nu avem cum reconfirma - datele demo rămân valide
+                stale = set(uncertain)
+                found = [d for d in known if d['ip'] in stale]
+
+            now = time.time()
+            # Un 'N/A' din scanarea nouă nu șterge numele/producătorul deja aflat (regula inventarului)
+            checked = [d['ip'] for d in known] if full else uncertain
+            self.inventory.apply([dict(d, last_seen=now) for d in found], now, checked=checked)
+            with self._cache_lock:
+                entry = self._cache.get(network_range)
+                if entry is None:
+                    return
+                entry['scanned_at'] = now
+                if full:
+                    entry['full_sweep_at'] = now
+            self._resolve_hostnames(network_range)
+        except Exception as e:
+            print(f"Background scan error for {network_range}: {e}")
+        finally:
+            self._local.quiet = False
+            with self._cache_lock:
+                self._refreshing.discard(network_range)
+
+    def start_passive(self, iface: Optional[str] = None) -> bool:
+        """Pornește ascultarea pasivă; dispozitivele observate actualizează cache-ul în timp real"""
+        if self.passive is not None:
+            return True
+        if not PassiveDiscovery.is_supported():
+            return False
+        self.passive = PassiveDiscovery(self._on_passive_device, iface=iface)
+        self.passive.start()
+        return True
+
+    def stop_passive(self):
+        """Oprește ascultarea pasivă"""
+        if self.passive is not None:
+            self.passive.stop()
+            self.passive = None
+
+    def _on_passive_device(self, device: Dict):
+        """Un dispozitiv văzut în trafic: host-urile proaspete nu mai sunt reconfirmate activ la refresh"""
+        ip = ipaddress.ip_address(device['ip'])
+        with self._cache_lock:
+            watched = any(ip in network for network_range in self._cache
+                          for network in _range_networks(network_range))
+        if not watched:
+            return
+        device = self._tag_interfaces(self._resolve_vendors([dict(device)]))[0]
+        # Numele deja rezolvate (DNS/mDNS) au prioritate față de cel din DHCP
+        self.inventory.upsert(device, device['last_seen'], keep=('hostname',))
+
+    def get_device_services(self, ip: str) -> Dict:
+        """Obține serviciile disponibile pe un dispozitiv (port -> nume serviciu)"""
+        result = self.service_scanner.scan([ip])[ip]
+        return {port: info['service'] for port, info in result['open'].items()}
+
+    def _services_for(self, ports: Optional[str], grab_banners: bool) -> ServiceScanner:
+        """Scanerul de servicii cu setul de porturi și opțiunea de banner cerute"""
+        if ports is None and not grab_banners:
+            return self.service_scanner
+        scanner = copy.copy(self.service_scanner)
+        if ports is not None:
+            scanner.ports = parse_ports(ports)
+        scanner.grab_banners = grab_banners
+        return scanner
+
+    def scan_services(self, devices: List[Dict], on_host: Optional[Callable[[Dict], None]] = None,
+                      ports: Optional[str] = None, grab_banners: bool = False) -> Dict[str, Dict]:
+        """Scanează serviciile tuturor dispozitivelor în paralel; rezultatele vin per host"""
+        scanner = self._services_for(ports, grab_banners)
+        return scanner.scan([d['ip'] for d in devices if d['ip']], on_host)
+
+    def stream_services(self, devices: List[Dict], ports: Optional[str] = None,
+                        grab_banners: bool = False) -> Iterator[Dict]:
+        """Generează rezultatele per host pe măsură ce se termină scanarea serviciilor"""
+        scanner = self._services_for(ports, grab_banners)
+        return scanner.stream([d['ip'] for d in devices if d['ip']])
     
     def is_nmap_available(self) -> bool:
         """Verifică dacă nmap este disponibil"""
@@ -170,8 +563,20 @@ class NetworkScanner:
     
     def get_scan_method(self) -> str:
         """Returnează metoda de scanare curentă"""
+        if self.sweeper and not self.nm:
+            return "ARP" if self.sweeper.transport_factory is ScapyArpTransport else "ICMP"
         return "NMAP" if self.nm else "DEMO"
 
+@functools.lru_cache(maxsize=64)
+def _range_networks(network_range: str) -> tuple:
+    networks = []
+    for part in split_networks(network_range):
+        try:
+            networks.append(ipaddress.ip_network(part, strict=False))
+        except ValueError:
+            pass
+    return tuple(networks)
+
 # Testare locală
 if __name__ == "__main__":
     scanner = NetworkScanner()
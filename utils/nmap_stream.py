@@ -0,0 +1,152 @@
+import shlex
+import shutil
+import subprocess
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+
+from utils.metrics import PARSE_SECONDS
+
+
+class NmapError(RuntimeError):
+    """nmap s-a terminat cu eroare"""
+
+
+def parse_host(element: ET.Element) -> Dict:
+    """Un element <host> ca dicționarul de dispozitiv folosit de scanner"""
+    device = {'ip': None, 'mac': 'N/A', 'hostname': 'N/A', 'status': 'down', 'vendor': 'N/A'}
+    status = element.find('status')
+    if status is not None:
+        device['status'] = status.get('state', 'down')
+    for address in element.iter('address'):
+        kind = address.get('addrtype')
+        if kind == 'ipv4' or (kind == 'ipv6' and device['ip'] is None):
+            device['ip'] = address.get('addr')
+        elif kind == 'mac':
+            device['mac'] = address.get('addr', 'N/A').upper()
+            device['vendor'] = address.get('vendor') or 'N/A'
+    hostname = element.find('hostnames/hostname')
+    if hostname is not None and hostname.get('name'):
+        device['hostname'] = hostname.get('name')
+    ports = element.find('ports')
+    if ports is not None:
+        open_ports = {}
+        for port in ports.iter('port'):
+            state = port.find('state')
+            if state is None or state.get('state') != 'open':
+                continue
+            service = port.find('service')
+            open_ports[int(port.get('portid'))] = {
+                'protocol': port.get('protocol', 'tcp'),
+                'service': service.get('name', 'unknown') if service is not None else 'unknown',
+            }
+        device['ports'] = open_ports
+    return device
+
+
+def _chunks(stream: BinaryIO, size: int = 65536) -> Iterator[bytes]:
+    # read1 întoarce ce este disponibil în pipe, fără să aștepte un bloc întreg
+    read = getattr(stream, 'read1', stream.read)
+    while True:
+        chunk = read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_nmap_xml(source: Union[str, BinaryIO], only_up: bool = True) -> Iterator[Dict]:
+    """Parsează ieșirea XML nmap incremental: fiecare host apare când elementul <host> se închide
+
+    Elementele procesate sunt eliberate imediat, astfel că memoria nu crește cu dimensiunea scanării.
+    """
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            yield from parse_nmap_xml(f, only_up)
+        return
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root = None
+    for chunk in _chunks(source):
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            if event == 'start':
+                if root is None:
+                    root = element
+                continue
+            if element.tag != 'host':
+                continue
+            started = time.perf_counter()
+            device = parse_host(element)
+            PARSE_SECONDS.labels('nmap').observe(time.perf_counter() - started)
+            # Rădăcina <nmaprun> ar păstra toate host-urile deja parsate
+            root.clear()
+            if device['ip'] and (device['status'] == 'up' or not only_up):
+                yield device
+    parser.close()
+
+
+class NmapStreamScanner:
+    """Rulează nmap cu ieșire XML pe stdout și produce host-urile pe măsură ce nmap le termină"""
+
+    def __init__(self, binary: Optional[str] = None):
+        self.binary = binary or shutil.which('nmap') or 'nmap'
+
+    @staticmethod
+    def is_supported() -> bool:
+        return shutil.which('nmap') is not None
+
+    def command(self, hosts: Union[str, Iterable[str]], arguments: str = '-sn') -> List[str]:
+        targets = hosts.split() if isinstance(hosts, str) else list(hosts)
+        # --stats-every lipsește intenționat: stdout conține doar XML
+        return [self.binary, *shlex.split(arguments), '-oX', '-', *targets]
+
+    def scan(self, hosts: Union[str, Iterable[str]], arguments: str = '-sn',
+             only_up: bool = True) -> Iterator[Dict]:
+        """Generator de host-uri; închiderea generatorului oprește procesul nmap"""
+        # stderr într-un fișier temporar: avertismentele multe ale unei scanări lungi nu blochează pipe-ul
+        errors = tempfile.TemporaryFile()
+        process = subprocess.Popen(self.command(hosts, arguments), stdout=subprocess.PIPE,
+                                   stderr=errors, stdin=subprocess.DEVNULL)
+        finished = False
+        parse_error = None
+        try:
+            yield from parse_nmap_xml(process.stdout, only_up)
+            finished = True
+        except ET.ParseError as e:
+            # De obicei nmap a eșuat înainte de a scrie XML; mesajul util este pe stderr
+            parse_error = e
+        finally:
+            if not finished and process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            returncode = process.wait()
+            errors.seek(0)
+            stderr = errors.read().decode('utf-8', 'replace').strip()
+            errors.close()
+        if returncode != 0 or parse_error is not None:
+            raise NmapError(stderr or f"nmap exit code {returncode}: {parse_error}")
+
+
+# Parsare rapidă a unei ieșiri înregistrate: python -m utils.nmap_stream scan.xml
+if __name__ == "__main__":
+    import argparse
+    import tracemalloc
+
+    parser = argparse.ArgumentParser(description="Parsează incremental un fișier XML nmap (nmap -oX)")
+    parser.add_argument('xml', help="Fișierul XML înregistrat")
+    parser.add_argument('--all', action='store_true', help="Include și host-urile care nu sunt 'up'")
+    parser.add_argument('--quiet', action='store_true', help="Doar sumarul")
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = 0
+    for device in parse_nmap_xml(args.xml, only_up=not args.all):
+        count += 1
+        if not args.quiet:
+            ports = ','.join(str(p) for p in sorted(device.get('ports', {})))
+            print(f"{device['ip']:<16} {device['mac']:<18} {device['hostname']:<30} {ports}")
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    print(f"{count} host-uri în {elapsed:.2f}s ({count / max(elapsed, 1e-9):.0f}/s), "
+          f"memorie maximă {peak / 1024:.0f} KiB")
@@ -0,0 +1,266 @@
+import csv
+import glob
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b'OUIX'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI')
+TIER = struct.Struct('<BxxxI')
+
+# Lungimea prefixului (biți) pentru fiecare tip de alocare IEEE
+REGISTRY_BITS = {'MA-L': 24, 'MA-M': 28, 'MA-S': 36}
+
+BUNDLED_REGISTRY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'oui_registry.csv')
+DEFAULT_INDEX = 'data/oui.idx'
+# Registrele complete (oui.csv, mam.csv, oui36.csv de la IEEE sau `manuf` din Wireshark) se pun aici
+DEFAULT_REGISTRY_DIR = 'data/oui'
+
+
+def mac_to_int(mac: Optional[str]) -> Optional[int]:
+    """Convertește o adresă MAC (cu ':', '-' sau '.') în întreg pe 48 de biți"""
+    if not mac:
+        return None
+    digits = mac.replace(':', '').replace('-', '').replace('.', '')
+    if len(digits) != 12:
+        return None
+    try:
+        return int(digits, 16)
+    except ValueError:
+        return None
+
+
+def _mask(bits: int) -> int:
+    return ((1 << bits) - 1) << (48 - bits)
+
+
+def parse_registry(path: str) -> Iterator[Tuple[int, int, str]]:
+    """Citește un registru IEEE (CSV) sau Wireshark `manuf`: (prefix, biți, organizație)"""
+    with open(path, encoding='utf-8', errors='replace', newline='') as f:
+        first = f.readline()
+        f.seek(0)
+        if first.startswith('Registry,'):
+            for row in csv.DictReader(f):
+                bits = REGISTRY_BITS.get(row.get('Registry', ''))
+                assignment = row.get('Assignment', '')
+                if bits is None or not assignment:
+                    continue
+                yield int(assignment, 16) << (48 - len(assignment) * 4), bits, row['Organization Name'].strip()
+            return
+
+        hex_prefix = ''
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            # Formatul text IEEE (oui.txt, mam.txt, oui36.txt, iab.txt)
+            if '(hex)' in line:
+                hex_prefix = line.partition('(hex)')[0].strip().replace('-', '')
+                continue
+            if '(base 16)' in line:
+                assignment, _, name = line.partition('(base 16)')
+                start, _, end = assignment.strip().partition('-')
+                # Alocările MA-M/MA-S apar ca interval sub OUI-ul din linia (hex)
+                digits = hex_prefix + start[:len(os.path.commonprefix([start, end]))] if end else start
+                try:
+                    value = int(digits, 16) << (48 - len(digits) * 4)
+                except ValueError:
+                    continue
+                yield value, len(digits) * 4, name.strip()
+                continue
+            fields = line.split('\t')
+            if len(fields) < 2:
+                continue
+            prefix, _, bits = fields[0].partition('/')
+            digits = prefix.replace(':', '').replace('-', '').replace('.', '')
+            try:
+                value = int(digits, 16) << (48 - len(digits) * 4)
+            except ValueError:
+                continue
+            name = fields[2] if len(fields) > 2 and fields[2] else fields[1]
+            yield value, int(bits) if bits else len(digits) * 4, name.strip()
+
+
+def _merge(registries: Sequence[str]) -> Dict[Tuple[int, int], str]:
+    entries: Dict[Tuple[int, int], str] = {}
+    for path in registries:
+        for value, bits, name in parse_registry(path):
+            # Registrele ulterioare (ex. cele complete din data/oui) suprascriu registrul inclus
+            entries[(value & _mask(bits), bits)] = name
+    return entries
+
+
+def write_registry(registries: Sequence[str], output: str = BUNDLED_REGISTRY) -> int:
+    """Scrie registrele combinate ca un singur CSV IEEE sortat (registrul inclus în proiect)"""
+    registry_names = {bits: registry for registry, bits in REGISTRY_BITS.items()}
+    entries = _merge(registries)
+    tmp_path = f"{output}.tmp"
+    written = 0
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['Registry', 'Assignment', 'Organization Name', 'Organization Address'])
+        for (value, bits), name in sorted(entries.items()):
+            if bits not in registry_names or not name:
+                continue
+            writer.writerow([registry_names[bits], format(value >> (48 - bits), f'0{bits // 4}X'), name, ''])
+            written += 1
+    os.replace(tmp_path, output)
+    return written
+
+
+def build_index(registries: Sequence[str], output: str = DEFAULT_INDEX) -> int:
+    """Compilează registrele într-un index binar sortat; returnează numărul de prefixe"""
+    entries = _merge(registries)
+
+    names: List[str] = []
+    name_ids: Dict[str, int] = {}
+    tiers: Dict[int, List[Tuple[int, int]]] = {}
+    for (value, bits), name in entries.items():
+        if name not in name_ids:
+            name_ids[name] = len(names)
+            names.append(name)
+        tiers.setdefault(bits, []).append((value, name_ids[name]))
+
+    # Tier-urile sunt în ordinea prefixului cel mai lung, ca lookup-ul să se oprească la primul găsit
+    order = sorted(tiers, reverse=True)
+    encoded = [name.encode('utf-8') for name in names]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+
+    header = HEADER.pack(MAGIC, VERSION, len(order), len(names))
+    header += b''.join(TIER.pack(bits, len(tiers[bits])) for bits in order)
+    header += b'\0' * (-len(header) % 8)
+
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        for bits in order:
+            rows = sorted(tiers[bits])
+            f.write(np.array([value for value, _ in rows], dtype='<u8').tobytes())
+        for bits in order:
+            rows = sorted(tiers[bits])
+            f.write(np.array([name_id for _, name_id in rows], dtype='<u4').tobytes())
+        f.write(offsets.tobytes())
+        f.write(b''.join(encoded))
+    os.replace(tmp_path, output)
+    return len(entries)
+
+
+class OuiIndex:
+    """Index OUI mapat în memorie; lookup pe prefixul cel mai lung (MA-S, MA-M, MA-L)"""
+
+    def __init__(self, path: str = DEFAULT_INDEX):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, tier_count, name_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Index OUI invalid: {path}")
+
+        offset = HEADER.size
+        layout = []
+        for _ in range(tier_count):
+            layout.append(TIER.unpack_from(self._mmap, offset))
+            offset += TIER.size
+        offset += -offset % 8
+
+        # Doar vederi peste fișierul mapat - nimic nu este copiat la pornire
+        self.tiers = []
+        for bits, count in layout:
+            keys = np.frombuffer(self._mmap, dtype='<u8', count=count, offset=offset)
+            self.tiers.append((bits, np.uint64(_mask(bits)), keys))
+            offset += count * 8
+        self._name_ids = []
+        for _bits, count in layout:
+            self._name_ids.append(np.frombuffer(self._mmap, dtype='<u4', count=count, offset=offset))
+            offset += count * 4
+        self._offsets = np.frombuffer(self._mmap, dtype='<u4', count=name_count + 1, offset=offset)
+        self._names_start = offset + (name_count + 1) * 4
+        self._names: Dict[int, str] = {}
+
+    @classmethod
+    def open_default(cls, path: str = DEFAULT_INDEX,
+                     registries: Optional[Iterable[str]] = None) -> 'OuiIndex':
+        """Deschide indexul implicit, recompilându-l dacă lipsește sau registrele sunt mai noi"""
+        if registries is None:
+            registries = [BUNDLED_REGISTRY] + sorted(glob.glob(os.path.join(DEFAULT_REGISTRY_DIR, '*')))
+        registries = list(registries)
+        try:
+            built_at = os.path.getmtime(path)
+        except OSError:
+            built_at = None
+        if built_at is None or any(os.path.getmtime(r) > built_at for r in registries):
+            build_index(registries, path)
+        return cls(path)
+
+    def __len__(self) -> int:
+        return sum(len(keys) for _bits, _mask_value, keys in self.tiers)
+
+    def _name(self, name_id: int) -> str:
+        name = self._names.get(name_id)
+        if name is None:
+            start = self._names_start + int(self._offsets[name_id])
+            end = self._names_start + int(self._offsets[name_id + 1])
+            name = self._mmap[start:end].decode('utf-8')
+            self._names[name_id] = name
+        return name
+
+    def lookup(self, mac: Optional[str]) -> Optional[str]:
+        """Organizația care deține prefixul adresei MAC sau None"""
+        value = mac_to_int(mac)
+        if value is None:
+            return None
+        for tier, (_bits, mask, keys) in enumerate(self.tiers):
+            key = np.uint64(value) & mask
+            i = int(np.searchsorted(keys, key))
+            if i < len(keys) and keys[i] == key:
+                return self._name(int(self._name_ids[tier][i]))
+        return None
+
+    def lookup_many(self, macs: Sequence[Optional[str]]) -> List[Optional[str]]:
+        """Lookup vectorizat pentru un lot de adrese MAC"""
+        values = [mac_to_int(mac) for mac in macs]
+        valid = np.array([v is not None for v in values], dtype=bool)
+        ints = np.array([v or 0 for v in values], dtype=np.uint64)
+        result = np.full(len(values), -1, dtype=np.int64)
+        for tier, (_bits, mask, keys) in enumerate(self.tiers):
+            pending = valid & (result < 0)
+            if not pending.any() or not len(keys):
+                continue
+            wanted = ints[pending] & mask
+            idx = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+            hit = keys[idx] == wanted
+            ids = np.where(hit, self._name_ids[tier][idx], -1)
+            result[pending] = ids
+        return [self._name(int(i)) if i >= 0 else None for i in result]
+
+    def close(self):
+        """Eliberează maparea fișierului"""
+        self.tiers = []
+        self._name_ids = []
+        self._offsets = None
+        self._mmap.close()
+
+
+# Recompilare manuală: python -m utils.oui_lookup data/oui/oui.csv data/oui/mam.csv ...
+# Actualizarea registrului inclus: python -m utils.oui_lookup --bundle oui.txt mam.txt oui36.txt iab.txt
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compilează indexul OUI din registrele locale")
+    parser.add_argument('registries', nargs='*', help="Fișiere IEEE (CSV sau text) ori Wireshark manuf")
+    parser.add_argument('--output', default=DEFAULT_INDEX)
+    parser.add_argument('--bundle', action='store_true',
+                        help="Combină registrele în utils/oui_registry.csv în loc de index")
+    args = parser.parse_args()
+    sources = [BUNDLED_REGISTRY] + (args.registries or sorted(glob.glob(os.path.join(DEFAULT_REGISTRY_DIR, '*'))))
+    if args.bundle:
+        print(f"{write_registry(sources)} prefixe scrise în {BUNDLED_REGISTRY}")
+    else:
+        print(f"{build_index(sources, args.output)} prefixe scrise în {args.output}")
@@ -0,0 +1,309 @@
+import ipaddress
+import os
+import socket
+import struct
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.hostname_resolver import MDNS_PORT, read_name
+from utils.metrics import CALLBACK_ERRORS, PARSE_SECONDS
+
+# Filtrul BPF compilat în kernel: doar traficul din care învățăm ceva ajunge în user space
+BPF_FILTER = 'arp or (udp and (port 67 or port 68 or port 5353))'
+
+LINKTYPE_ETHERNET = 1
+LINKTYPE_LINUX_SLL = 113
+
+ETH_P_ARP = 0x0806
+ETH_P_IP = 0x0800
+ETH_P_8021Q = 0x8100
+
+DHCP_MAGIC = b'\x63\x82\x53\x63'
+DHCP_REQUEST, DHCP_ACK = 3, 5
+TYPE_A = 1
+
+PCAP_MAGIC = 0xa1b2c3d4
+PCAP_MAGIC_NS = 0xa1b23c4d
+
+
+def _mac(raw: bytes) -> str:
+    return ':'.join(f'{b:02X}' for b in raw)
+
+
+def _usable(ip: str) -> bool:
+    address = ipaddress.IPv4Address(ip)
+    return not (address.is_unspecified or address.is_multicast or address.is_loopback
+                or ip == '255.255.255.255')
+
+
+def _device(ip: str, mac: str, source: str, timestamp: float, hostname: str = 'N/A') -> Dict:
+    return {'ip': ip, 'mac': mac, 'hostname': hostname, 'status': 'up', 'vendor': 'N/A',
+            'source': source, 'last_seen': timestamp}
+
+
+def parse_arp(payload: bytes, timestamp: float) -> List[Dict]:
+    """Expeditorul unui pachet ARP (cerere sau răspuns, inclusiv ARP gratuit)"""
+    if len(payload) < 28:
+        return []
+    sender_mac = payload[8:14]
+    sender_ip = socket.inet_ntoa(payload[14:18])
+    if not _usable(sender_ip):
+        # Sondele ARP (RFC 5227) au expeditorul 0.0.0.0
+        return []
+    return [_device(sender_ip, _mac(sender_mac), 'arp', timestamp)]
+
+
+def _dhcp_options(data: bytes) -> Dict[int, bytes]:
+    options = {}
+    offset = 0
+    while offset < len(data):
+        code = data[offset]
+        if code == 0:
+            offset += 1
+            continue
+        if code == 255 or offset + 1 >= len(data):
+            break
+        length = data[offset + 1]
+        options[code] = data[offset + 2:offset + 2 + length]
+        offset += 2 + length
+    return options
+
+
+def parse_dhcp(payload: bytes, timestamp: float) -> List[Dict]:
+    """Adresa și numele clientului din DHCP REQUEST / ACK (chaddr, opțiunile 50 și 12)"""
+    if len(payload) < 240 or payload[236:240] != DHCP_MAGIC:
+        return []
+    options = _dhcp_options(payload[240:])
+    kind = options.get(53, b'\x00')[0]
+    mac = _mac(payload[28:34])
+    hostname = options.get(12, b'').decode('utf-8', errors='replace').strip('\x00') or 'N/A'
+    if kind == DHCP_ACK:
+        ip = socket.inet_ntoa(payload[16:20])
+    elif kind == DHCP_REQUEST:
+        ip = socket.inet_ntoa(options[50]) if len(options.get(50, b'')) == 4 else socket.inet_ntoa(payload[12:16])
+    else:
+        return []
+    if not _usable(ip):
+        return []
+    return [_device(ip, mac, 'dhcp', timestamp, hostname)]
+
+
+def parse_mdns(payload: bytes, src_ip: str, src_mac: str, timestamp: float) -> List[Dict]:
+    """Înregistrările A din răspunsurile mDNS (numele .local anunțate de dispozitive)"""
+    if len(payload) < 12:
+        return []
+    _ident, flags, questions, answers, authority, additional = struct.unpack('!HHHHHH', payload[:12])
+    if not flags & 0x8000:
+        return []
+    offset = 12
+    try:
+        for _ in range(questions):
+            _name, offset = read_name(payload, offset)
+            offset += 4
+        devices = {}
+        for _ in range(answers + authority + additional):
+            name, offset = read_name(payload, offset)
+            rtype, _rclass, _ttl, length = struct.unpack('!HHIH', payload[offset:offset + 10])
+            offset += 10
+            if rtype == TYPE_A and length == 4:
+                ip = socket.inet_ntoa(payload[offset:offset + 4])
+                hostname = name[:-6] if name.endswith('.local') else name
+                if _usable(ip) and ip not in devices:
+                    # MAC-ul cadrului aparține doar expeditorului
+                    mac = src_mac if ip == src_ip else 'N/A'
+                    devices[ip] = _device(ip, mac, 'mdns', timestamp, hostname or 'N/A')
+            offset += length
+    except (IndexError, struct.error):
+        return []
+    return list(devices.values())
+
+
+def parse_frame(frame: bytes, timestamp: float, linktype: int = LINKTYPE_ETHERNET) -> List[Dict]:
+    """Dispozitivele care pot fi deduse dintr-un cadru capturat"""
+    if linktype == LINKTYPE_LINUX_SLL:
+        if len(frame) < 16:
+            return []
+        src_mac = _mac(frame[6:12]) if frame[4:6] == b'\x00\x06' else 'N/A'
+        ethertype = struct.unpack('!H', frame[14:16])[0]
+        offset = 16
+    else:
+        if len(frame) < 14:
+            return []
+        src_mac = _mac(frame[6:12])
+        ethertype = struct.unpack('!H', frame[12:14])[0]
+        offset = 14
+        if ethertype == ETH_P_8021Q and len(frame) >= 18:
+            ethertype = struct.unpack('!H', frame[16:18])[0]
+            offset = 18
+
+    if ethertype == ETH_P_ARP:
+        return parse_arp(frame[offset:], timestamp)
+    if ethertype != ETH_P_IP or len(frame) < offset + 28:
+        return []
+    header_length = (frame[offset] & 0x0f) * 4
+    if frame[offset + 9] != socket.IPPROTO_UDP:
+        return []
+    src_ip = socket.inet_ntoa(frame[offset + 12:offset + 16])
+    udp = offset + header_length
+    src_port, dst_port = struct.unpack('!HH', frame[udp:udp + 4])
+    payload = frame[udp + 8:]
+    if {src_port, dst_port} & {67, 68}:
+        return parse_dhcp(payload, timestamp)
+    if MDNS_PORT in (src_port, dst_port):
+        return parse_mdns(payload, src_ip, src_mac, timestamp)
+    return []
+
+
+def read_pcap(path: str) -> Iterator[Tuple[float, bytes, int]]:
+    """Cadrele unui fișier pcap clasic: (timestamp, cadru, linktype)"""
+    with open(path, 'rb') as f:
+        header = f.read(24)
+        if len(header) < 24:
+            return
+        for endian in ('<', '>'):
+            magic = struct.unpack(endian + 'I', header[:4])[0]
+            if magic in (PCAP_MAGIC, PCAP_MAGIC_NS):
+                break
+        else:
+            raise ValueError(f"{path} nu este un fișier pcap (pcapng nu este suportat)")
+        divisor = 1e9 if magic == PCAP_MAGIC_NS else 1e6
+        linktype = struct.unpack(endian + 'I', header[20:24])[0]
+        record = struct.Struct(endian + 'IIII')
+        while True:
+            chunk = f.read(record.size)
+            if len(chunk) < record.size:
+                return
+            seconds, fraction, captured, _original = record.unpack(chunk)
+            frame = f.read(captured)
+            if len(frame) < captured:
+                return
+            yield seconds + fraction / divisor, frame, linktype
+
+
+def write_pcap(path: str, frames: Iterator[Tuple[float, bytes]], linktype: int = LINKTYPE_ETHERNET):
+    """Scrie cadre Ethernet într-un fișier pcap (pentru teste și capturi simulate)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<IHHiIII', PCAP_MAGIC, 2, 4, 0, 0, 65535, linktype))
+        for timestamp, frame in frames:
+            seconds = int(timestamp)
+            f.write(struct.pack('<IIII', seconds, int((timestamp - seconds) * 1e6), len(frame), len(frame)))
+            f.write(frame)
+
+
+class PassiveDiscovery:
+    """Ascultă ARP/DHCP/mDNS și raportează dispozitivele noi sau schimbate, fără trafic activ"""
+
+    def __init__(self, on_device: Callable[[Dict], None], iface: Optional[str] = None,
+                 refresh_interval: float = 30.0):
+        self.on_device = on_device
+        self.iface = iface
+        # Același dispozitiv este raportat din nou doar dacă s-a schimbat sau după acest interval
+        self.refresh_interval = refresh_interval
+        self.known: Dict[str, Tuple[str, str, float]] = {}
+        self.frames = 0
+        self._names: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._sniffer = None
+
+    @staticmethod
+    def is_supported() -> bool:
+        """Captura live necesită scapy și privilegii de root"""
+        try:
+            import scapy.all  # noqa: F401
+        except ImportError:
+            return False
+        return hasattr(os, 'geteuid') and os.geteuid() == 0
+
+    def feed(self, frame: bytes, timestamp: Optional[float] = None, linktype: int = LINKTYPE_ETHERNET) -> int:
+        """Procesează un cadru brut; returnează câte dispozitive au fost raportate"""
+        timestamp = time.time() if timestamp is None else timestamp
+        started = time.perf_counter()
+        try:
+            devices = parse_frame(frame, timestamp, linktype)
+        except (ValueError, struct.error, OSError):
+            devices = []
+        PARSE_SECONDS.labels('passive').observe(time.perf_counter() - started)
+        reported = 0
+        with self._lock:
+            self.frames += 1
+            updates = []
+            for device in devices:
+                mac = device['mac']
+                if device['hostname'] != 'N/A' and mac != 'N/A':
+                    # Numele vine din DHCP/mDNS; cadrele ARP ulterioare ale aceluiași MAC îl moștenesc
+                    self._names[mac] = device['hostname']
+                elif mac in self._names:
+                    device['hostname'] = self._names[mac]
+                previous = self.known.get(device['ip'])
+                if (previous and previous[0] == mac and previous[1] == device['hostname']
+                        and timestamp - previous[2] < self.refresh_interval):
+                    continue
+                self.known[device['ip']] = (mac, device['hostname'], timestamp)
+                updates.append(device)
+        for device in updates:
+            try:
+                self.on_device(device)
+                reported += 1
+            except Exception as e:
+                CALLBACK_ERRORS.labels('passive_discovery').inc()
+                print(f"Passive discovery callback error for {device['ip']}: {e}")
+        return reported
+
+    def replay_pcap(self, path: str) -> Dict:
+        """Trece o captură pcap prin același parser (teste, depanare)"""
+        started = time.perf_counter()
+        frames = reported = 0
+        for timestamp, frame, linktype in read_pcap(path):
+            frames += 1
+            reported += self.feed(frame, timestamp, linktype)
+        elapsed = time.perf_counter() - started
+        return {'frames': frames, 'devices': reported, 'elapsed': elapsed,
+                'frames_per_s': frames / elapsed if elapsed else 0.0}
+
+    def start(self):
+        """Pornește captura live (scapy AsyncSniffer cu filtru BPF în kernel)"""
+        from scapy.all import AsyncSniffer, Ether
+        from scapy.layers.l2 import CookedLinux
+
+        def on_packet(packet):
+            linktype = LINKTYPE_LINUX_SLL if CookedLinux in packet and Ether not in packet else LINKTYPE_ETHERNET
+            self.feed(bytes(packet), float(packet.time), linktype)
+
+        self._sniffer = AsyncSniffer(iface=self.iface, filter=BPF_FILTER, store=False, prn=on_packet)
+        self._sniffer.start()
+
+    def stop(self):
+        """Oprește captura"""
+        if self._sniffer is not None:
+            try:
+                self._sniffer.stop()
+            except Exception:
+                pass
+            self._sniffer = None
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Descoperire pasivă din captură sau trafic live")
+    parser.add_argument('pcap', nargs='?', help="Fișier pcap de analizat (lipsă = captură live)")
+    parser.add_argument('--iface', help="Interfața pentru captura live")
+    args = parser.parse_args()
+
+    def show(device):
+        print(f" - {device['ip']:<15} {device['mac']:<17} {device['hostname']:<30} ({device['source']})")
+
+    discovery = PassiveDiscovery(show, iface=args.iface)
+    if args.pcap:
+        stats = discovery.replay_pcap(args.pcap)
+        print(f"{stats['frames']} cadre, {stats['devices']} actualizări în {stats['elapsed']:.2f}s")
+    else:
+        discovery.start()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            discovery.stop()
@@ -0,0 +1,261 @@
+import threading
+import time
+import warnings
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Codificare compactă a statusului (int8 în loc de string per eșantion)
+STATUS_NAMES = ['unknown', 'excellent', 'good', 'fair', 'slow', 'down']
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
+
+class PingHistoryStore:
+    """Istoric ping columnar: ring buffer NumPy într-o matrice host × timp"""
+
+    def __init__(self, max_history: int = 100, initial_hosts: int = 16, initial_columns: int = 256):
+        self.max_history = max_history
+        self.host_index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        rows = max(1, initial_hosts)
+        cols = max(1, min(initial_columns, max_history))
+        self.timestamps = np.zeros((rows, cols), dtype=np.float64)
+        self.rtt = np.full((rows, cols), np.nan, dtype=np.float32)
+        self.status = np.zeros((rows, cols), dtype=np.int8)
+        self.loss = np.zeros((rows, cols), dtype=np.bool_)
+        self.head = np.zeros(rows, dtype=np.int64)
+        self.count = np.zeros(rows, dtype=np.int64)
+
+    @property
+    def columns(self) -> int:
+        return self.timestamps.shape[1]
+
+    def memory_usage(self) -> int:
+        """Octeți ocupați de coloanele de date"""
+        return sum(a.nbytes for a in (self.timestamps, self.rtt, self.status,
+                                      self.loss, self.head, self.count))
+
+    def add_host(self, host: str) -> int:
+        """Alocă un rând pentru host (matricea crește prin dublare)"""
+        with self._lock:
+            return self._row(host)
+
+    def _row(self, host: str) -> int:
+        row = self.host_index.get(host)
+        if row is not None:
+            return row
+        row = len(self.host_index)
+        if row >= self.timestamps.shape[0]:
+            self._resize(self.timestamps.shape[0] * 2, self.columns)
+        self.host_index[host] = row
+        return row
+
+    def _resize(self, rows: int, cols: int):
+        old_rows, old_cols = self.timestamps.shape
+        if cols > old_cols:
+            # Rândurile pline au făcut deja wrap: se liniarizează în [0, count) înainte de extindere
+            start = (self.head - self.count) % old_cols
+            idx = (start[:, None] + np.arange(old_cols)[None, :]) % old_cols
+            for name in ('timestamps', 'rtt', 'status', 'loss'):
+                setattr(self, name, np.take_along_axis(getattr(self, name), idx, axis=1))
+            self.head = self.count.copy()
+
+        def grown(array, fill):
+            new = np.full((rows, cols), fill, dtype=array.dtype)
+            new[:old_rows, :old_cols] = array
+            return new
+
+        self.timestamps = grown(self.timestamps, 0)
+        self.rtt = grown(self.rtt, np.nan)
+        self.status = grown(self.status, 0)
+        self.loss = grown(self.loss, False)
+        if rows > old_rows:
+            self.head = np.concatenate([self.head, np.zeros(rows - old_rows, dtype=np.int64)])
+            self.count = np.concatenate([self.count, np.zeros(rows - old_rows, dtype=np.int64)])
+
+    def append(self, host: str, timestamp: float, response_time: Optional[float],
+               status: str, packet_loss: bool):
+        """Adaugă un eșantion în ring buffer-ul host-ului"""
+        with self._lock:
+            row = self._row(host)
+            cols = self.columns
+            if self.count[row] == cols and cols < self.max_history:
+                # Coloanele se alocă treptat până la max_history
+                cols = min(cols * 2, self.max_history)
+                self._resize(self.timestamps.shape[0], cols)
+            pos = self.head[row]
+            self.timestamps[row, pos] = timestamp
+            self.rtt[row, pos] = np.nan if response_time is None else response_time
+            self.status[row, pos] = STATUS_CODES.get(status, 0)
+            self.loss[row, pos] = packet_loss
+            self.head[row] = (pos + 1) % cols
+            if self.count[row] < cols:
+                self.count[row] += 1
+
+    def __len__(self):
+        return len(self.host_index)
+
+    def length(self, host: str) -> int:
+        row = self.host_index.get(host)
+        return 0 if row is None else int(self.count[row])
+
+    def _record(self, row: int, pos: int) -> Dict:
+        rtt = self.rtt[row, pos]
+        return {
+            'timestamp': float(self.timestamps[row, pos]),
+            'response_time': None if np.isnan(rtt) else round(float(rtt), 3),
+            'status': STATUS_NAMES[self.status[row, pos]],
+            'packet_loss': bool(self.loss[row, pos])
+        }
+
+    def get(self, host: str, index: int) -> Dict:
+        """Eșantionul de la indexul logic dat (0 = cel mai vechi, -1 = cel mai recent)"""
+        with self._lock:
+            row = self.host_index.get(host)
+            count = 0 if row is None else int(self.count[row])
+            if index < 0:
+                index += count
+            if not 0 <= index < count:
+                raise IndexError("history index out of range")
+            start = (self.head[row] - count) % self.columns
+            return self._record(row, (start + index) % self.columns)
+
+    def latest(self, host: str) -> Optional[Dict]:
+        """Cel mai recent eșantion al host-ului sau None"""
+        try:
+            return self.get(host, -1)
+        except IndexError:
+            return None
+
+    def records(self, host: str, last: Optional[int] = None) -> List[Dict]:
+        """Eșantioanele host-ului ca dict-uri, în ordine cronologică"""
+        with self._lock:
+            row = self.host_index.get(host)
+            if row is None:
+                return []
+            count = int(self.count[row])
+            n = count if last is None else min(last, count)
+            start = (self.head[row] - n) % self.columns
+            return [self._record(row, (start + i) % self.columns) for i in range(n)]
+
+    def series(self, host: str, last: Optional[int] = None):
+        """(timestamps, rtt) ca array-uri NumPy cronologice, fără conversie la dict-uri"""
+        with self._lock:
+            row = self.host_index.get(host)
+            if row is None:
+                return np.empty(0), np.empty(0, dtype=np.float32)
+            count = int(self.count[row])
+            n = count if last is None else min(last, count)
+            idx = (self.head[row] - n + np.arange(n)) % self.columns
+            return self.timestamps[row, idx], self.rtt[row, idx]
+
+    def series_matrix(self, hosts: List[str], last: int):
+        """Ultimele `last` eșantioane ale fiecărui host ca matrice (NaN unde lipsesc date)"""
+        with self._lock:
+            rows = np.array([self.host_index.get(h, -1) for h in hosts], dtype=np.int64)
+            known = rows >= 0
+            safe_rows = np.where(known, rows, 0)
+            n = min(last, self.columns)
+            idx = (self.head[safe_rows][:, None] - n + np.arange(n)[None, :]) % self.columns
+            timestamps = np.take_along_axis(self.timestamps[safe_rows], idx, axis=1)
+            rtt = np.take_along_axis(self.rtt[safe_rows], idx, axis=1).astype(np.float64)
+            count = np.where(known, self.count[safe_rows], 0)
+        missing = np.arange(n)[None, :] < (n - count)[:, None]
+        timestamps = np.where(missing, np.nan, timestamps)
+        rtt[missing] = np.nan
+        return timestamps, rtt
+
+    def _ordered(self, rows: np.ndarray, window: Optional[float], now: Optional[float]):
+        """Coloanele rândurilor în ordine cronologică plus masca eșantioanelor valide"""
+        cols = self.columns
+        count = self.count[rows]
+        start = (self.head[rows] - count) % cols
+        idx = (start[:, None] + np.arange(cols)[None, :]) % cols
+        mask = np.arange(cols)[None, :] < count[:, None]
+
+        ts = np.take_along_axis(self.timestamps[rows], idx, axis=1)
+        rtt = np.take_along_axis(self.rtt[rows], idx, axis=1)
+        loss = np.take_along_axis(self.loss[rows], idx, axis=1)
+        if window is not None:
+            cutoff = (time.time() if now is None else now) - window
+            mask &= ts >= cutoff
+        return rtt, loss, mask
+
+    def fleet_stats(self, window: Optional[float] = None, now: Optional[float] = None,
+                    hosts: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Statistici vectorizate pentru toate host-urile pe fereastra dată (secunde)"""
+        with self._lock:
+            names = list(self.host_index) if hosts is None else [h for h in hosts if h in self.host_index]
+            if not names:
+                return {}
+            rows = np.array([self.host_index[h] for h in names], dtype=np.int64)
+            rtt, loss, mask = self._ordered(rows, window, now)
+
+        samples = mask.sum(axis=1)
+        lost = (loss & mask).sum(axis=1)
+        rtt = np.where(mask, rtt, np.nan).astype(np.float64)
+        # Jitter = media diferențelor absolute între RTT-uri consecutive
+        diffs = np.abs(np.diff(rtt, axis=1))
+
+        # Rândurile fără eșantioane produc NaN (și avertismente inutile)
+        with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            rtt_min = np.nanmin(rtt, axis=1)
+            rtt_avg = np.nanmean(rtt, axis=1)
+            p50, p95, p99 = np.nanpercentile(rtt, [50, 95, 99], axis=1)
+            jitter = np.nanmean(diffs, axis=1) if diffs.shape[1] else np.full(len(rows), np.nan)
+            loss_rate = np.where(samples > 0, lost / np.maximum(samples, 1), np.nan)
+
+        def value(array, i):
+            v = array[i]
+            return None if np.isnan(v) else round(float(v), 3)
+
+        stats = {}
+        for i, host in enumerate(names):
+            stats[host] = {
+                'samples': int(samples[i]),
+                'min': value(rtt_min, i),
+                'avg': value(rtt_avg, i),
+                'p50': value(p50, i),
+                'p95': value(p95, i),
+                'p99': value(p99, i),
+                'jitter': value(jitter, i),
+                'loss_rate': value(loss_rate, i),
+                'uptime': None if samples[i] == 0 else round(float(1 - loss_rate[i]) * 100, 3)
+            }
+        return stats
+
+    def stats(self, host: str, window: Optional[float] = None, now: Optional[float] = None) -> Optional[Dict]:
+        """Statistici pentru un singur host"""
+        return self.fleet_stats(window, now, hosts=[host]).get(host)
+
+    def history(self, host: str) -> 'HistoryView':
+        return HistoryView(self, host)
+
+
+class HistoryView:
+    """Vedere compatibilă cu deque peste istoricul unui host din PingHistoryStore"""
+
+    def __init__(self, store: PingHistoryStore, host: str):
+        self.store = store
+        self.host = host
+        store.add_host(host)
+
+    def append(self, sample: Dict):
+        self.store.append(self.host, sample['timestamp'], sample['response_time'],
+                          sample['status'], sample['packet_loss'])
+
+    def latest(self) -> Optional[Dict]:
+        return self.store.latest(self.host)
+
+    def __len__(self):
+        return self.store.length(self.host)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, index: int) -> Dict:
+        return self.store.get(self.host, index)
+
+    def __iter__(self):
+        return iter(self.store.records(self.host))
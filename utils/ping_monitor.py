@@ -1,80 +1,214 @@
 import subprocess
 import re
 import time
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 import threading
-from collections import deque
 import platform
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.icmp_engine import IcmpProbeEngine
+from utils.metrics import CALLBACK_ERRORS, PARSE_SECONDS, PING_COMMAND_SECONDS, PROBE_LAG_SECONDS
+from utils.ping_history import PingHistoryStore
+from utils.probe_scheduler import ProbeScheduler
+from utils.sla import SlaAggregator
 
 class PingMonitor:
-    def __init__(self, max_history=100):
+    def __init__(self, max_history=100, interval=2.0, use_icmp_engine=True, store=None,
+                 sock_factory=None, jitter=0.1, max_pps=None, backoff=True, max_workers=32, sla=None):
         self.ping_data = {}
         self.max_history = max_history
+        self.interval = interval
+        self.use_icmp_engine = use_icmp_engine
         self.is_monitoring = False
         self.threads = []
-        
-    def ping_host(self, host: str, hostname: str):
-        """Monitorizează un host cu ping continuu"""
-        history = deque(maxlen=self.max_history)
+        self.engine = None
+        # Parametrii planificatorului comun pentru motorul ICMP și fallback-ul prin subprocess
+        self.jitter = jitter
+        self.max_pps = max_pps
+        self.backoff = backoff
+        self.max_workers = max_workers
+        self.scheduler = None
+        self.history_store = PingHistoryStore(max_history)
+        self.listeners = []
+        self.store = store
+        # Socket alternativ pentru motorul ICMP (ex. rețeaua simulată din benchmark)
+        self.sock_factory = sock_factory
+        if store is not None:
+            self.add_listener(store.record_ping)
+        # Uptime, p95, pierderi și MTTR pe 1h/1d/30d, actualizate incremental din fiecare probă
+        self.sla = sla if sla is not None else SlaAggregator()
+        self.add_listener(self.sla)
+
+    def add_listener(self, callback: Callable):
+        """Înregistrează un callback(host, timestamp, response_time, status, packet_loss)"""
+        self.listeners.append(callback)
+
+    def _init_host(self, host: str, hostname: str):
+        """Creează intrarea din ping_data pentru un host"""
+        history = self.history_store.history(host)
+        if self.store is not None and not history:
+            # Reîncarcă istoricul salvat înainte de ultimul restart
+            for sample in self.store.recent_ping(host, limit=self.max_history):
+                response_time = sample['response_time']
+                status = 'down' if response_time is None else self.determine_speed_status(response_time)
+                self.history_store.append(host, sample['timestamp'], response_time,
+                                          status, sample['packet_loss'])
+        latest = history.latest()
         self.ping_data[host] = {
             'history': history,
             'hostname': hostname,
-            'status': 'unknown'
+            'status': latest['status'] if latest else 'unknown'
         }
-        
-        while self.is_monitoring:
+
+    def record_result(self, host: str, response_time: Optional[float], timestamp: Optional[float] = None):
+        """Înregistrează rezultatul unei probe (None = pachet pierdut); timestamp-ul implicit este acum"""
+        data = self.ping_data.get(host)
+        if data is None:
+            return
+
+        if timestamp is None:
+            timestamp = time.time()
+        if response_time is not None:
+            response_time = round(response_time, 3)
+            status = self.determine_speed_status(response_time)
+            data['status'] = status
+            data['history'].append({
+                'timestamp': timestamp,
+                'response_time': response_time,
+                'status': status,
+                'packet_loss': False
+            })
+        else:
+            # Ping failed - packet loss
+            status = 'down'
+            data['status'] = status
+            data['history'].append({
+                'timestamp': timestamp,
+                'response_time': None,
+                'status': status,
+                'packet_loss': True
+            })
+
+        for listener in self.listeners:
             try:
-                # Parametrii ping în funcție de OS
-                param = '-n' if platform.system().lower() == 'windows' else '-c'
-                count_param = '1'
-                
-                # Execută ping
-                process = subprocess.Popen(
-                    ['ping', param, count_param, host],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                stdout, stderr = process.communicate()
-                
-                if process.returncode == 0:
-                    # Extrage timpul de răspuns
-                    time_match = re.search(r'time=([\d.]+)\s*ms', stdout)
-                    if time_match:
-                        response_time = float(time_match.group(1))
-                        status = self.determine_speed_status(response_time)
-                    else:
-                        response_time = 1.0
-                        status = 'slow'
-                    
-                    self.ping_data[host]['status'] = status
-                    history.append({
-                        'timestamp': time.time(),
-                        'response_time': response_time,
-                        'status': status,
-                        'packet_loss': False
-                    })
-                else:
-                    # Ping failed - packet loss
-                    self.ping_data[host]['status'] = 'down'
-                    history.append({
-                        'timestamp': time.time(),
-                        'response_time': None,
-                        'status': 'down',
-                        'packet_loss': True
-                    })
-                    
+                listener(host, timestamp, response_time, status, response_time is None)
             except Exception as e:
-                print(f"Ping error for {host}: {e}")
-                history.append({
-                    'timestamp': time.time(),
-                    'response_time': None,
-                    'status': 'down',
-                    'packet_loss': True
-                })
-            
-            time.sleep(2)  # Ping la fiecare 2 secunde
-    
+                CALLBACK_ERRORS.labels('ping_listener').inc()
+                print(f"Ping listener error for {host}: {e}")
+
+    def ping_once(self, host: str) -> Optional[float]:
+        """Execută un singur ping prin subprocess; returnează timpul în ms sau None"""
+        # Parametrii ping în funcție de OS
+        param = '-n' if platform.system().lower() == 'windows' else '-c'
+        count_param = '1'
+
+        # Execută ping
+        with PING_COMMAND_SECONDS.time():
+            process = subprocess.Popen(
+                ['ping', param, count_param, host],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+            stdout, stderr = process.communicate()
+
+        if process.returncode != 0:
+            return None
+
+        # Extrage timpul de răspuns
+        with PARSE_SECONDS.labels('ping').time():
+            time_match = re.search(r'time=([\d.]+)\s*ms', stdout)
+        if time_match:
+            return float(time_match.group(1))
+        # Răspuns fără timp parsabil - raportat ca 'slow'
+        return 1000.0
+
+    def _probe(self, host: str, in_flight: set):
+        """O probă prin subprocess, executată în pool (fallback fără socket ICMP)"""
+        try:
+            response_time = self.ping_once(host)
+        except Exception as e:
+            print(f"Ping error for {host}: {e}")
+            response_time = None
+        finally:
+            in_flight.discard(host)
+        scheduler = self.scheduler
+        if scheduler is not None:
+            scheduler.record(host, response_time is not None)
+        self.record_result(host, response_time)
+
+    def _dispatch(self, scheduler: ProbeScheduler):
+        """Pornește probele scadente pe un pool limitat în loc de un thread cu sleep per host"""
+        in_flight = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ping') as pool:
+            while self.is_monitoring and self.scheduler is scheduler:
+                now = time.monotonic()
+                for host, due in scheduler.pop_due(now):
+                    # Un ping încă în desfășurare nu este dublat
+                    if host in in_flight:
+                        continue
+                    in_flight.add(host)
+                    PROBE_LAG_SECONDS.observe(now - due)
+                    pool.submit(self._probe, host, in_flight)
+                wakeup = scheduler.next_wakeup(time.monotonic())
+                time.sleep(max(0.001, min(0.05, 0.05 if wakeup is None else wakeup)))
+
+    def _make_scheduler(self) -> ProbeScheduler:
+        return ProbeScheduler(self.interval, jitter=self.jitter, max_pps=self.max_pps, backoff=self.backoff)
+
+    def add_host(self, host: str, hostname: str = 'N/A'):
+        """Adaugă un host în monitorizarea curentă, fără a reporni probele celorlalte"""
+        if not self.is_monitoring or host in self.ping_data:
+            return
+        self._init_host(host, hostname)
+        if self.engine:
+            self.engine.add_host(host)
+        elif self.scheduler is not None:
+            self.scheduler.add(host, time.monotonic())
+
+    def remove_host(self, host: str):
+        """Oprește probele unui host; istoricul rămâne în PingHistoryStore"""
+        if self.engine:
+            self.engine.remove_host(host)
+        elif self.scheduler is not None:
+            self.scheduler.remove(host)
+        self.ping_data.pop(host, None)
+
+    def sync_hosts(self, devices: List[Dict]):
+        """Adaugă host-urile noi din listă (plasă de siguranță pe lângă fluxul de evenimente)"""
+        for device in devices:
+            if device['ip'] and device['ip'] not in self.ping_data:
+                self.add_host(device['ip'], device['hostname'])
+
+    def apply_inventory_events(self, events: List[Dict]):
+        """Aplică fluxul de modificări al inventarului (DeviceInventory.subscribe)"""
+        if not self.is_monitoring:
+            return
+        for event in events:
+            kind = event['type']
+            if kind == 'joined':
+                self.add_host(event['ip'], event.get('hostname', 'N/A'))
+            elif kind == 'ip_changed':
+                self.remove_host(event['old_ip'])
+                self.add_host(event['ip'], event.get('hostname', 'N/A'))
+            elif kind == 'removed':
+                self.remove_host(event['ip'])
+            elif kind == 'updated' and 'hostname' in event['changes'] and event['ip'] in self.ping_data:
+                self.ping_data[event['ip']]['hostname'] = event['changes']['hostname']
+
+    def set_host_interval(self, host: str, interval: float):
+        """Interval de sondare propriu pentru un host (ex. mai des pentru gateway)"""
+        if self.scheduler is not None:
+            self.scheduler.set_interval(host, interval)
+
+    def get_latest(self, host: str) -> Optional[Dict]:
+        """Returnează cel mai recent eșantion al unui host"""
+        return self.history_store.latest(host)
+
+    def get_stats(self, window: Optional[float] = None) -> Dict[str, Dict]:
+        """Statistici (min/avg/p50/p95/p99, jitter, pierderi, uptime) pentru toate host-urile"""
+        return self.history_store.fleet_stats(window)
+
     def determine_speed_status(self, response_time: float) -> str:
         """Determină statusul vitezei bazat pe timpul de răspuns"""
         if response_time < 10:
@@ -85,25 +219,40 @@ class PingMonitor:
             return 'fair'       # 10 Mbps
         else:
             return 'slow'       # Probleme
-    
+
     def start_monitoring(self, devices: List[Dict]):
         """Pornește monitorizarea pentru toate dispozitivele"""
         self.stop_monitoring()
         self.is_monitoring = True
-        
+        self.scheduler = self._make_scheduler()
+
+        if self.use_icmp_engine and (self.sock_factory or IcmpProbeEngine.is_supported()):
+            # Un singur thread și un singur socket pentru toate host-urile
+            self.engine = IcmpProbeEngine(self.record_result, interval=self.interval,
+                                          sock_factory=self.sock_factory, scheduler=self.scheduler)
+            for device in devices:
+                if device['ip']:
+                    self._init_host(device['ip'], device['hostname'])
+                    self.engine.add_host(device['ip'])
+            self.engine.start()
+            return
+
+        now = time.monotonic()
         for device in devices:
             if device['ip']:
-                thread = threading.Thread(
-                    target=self.ping_host,
-                    args=(device['ip'], device['hostname'])
-                )
-                thread.daemon = True
-                thread.start()
-                self.threads.append(thread)
-    
+                self._init_host(device['ip'], device['hostname'])
+                self.scheduler.add(device['ip'], now)
+        thread = threading.Thread(target=self._dispatch, args=(self.scheduler,), daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
     def stop_monitoring(self):
         """Oprește monitorizarea"""
         self.is_monitoring = False
+        self.scheduler = None
+        if self.engine:
+            self.engine.stop()
+            self.engine = None
         for thread in self.threads:
             thread.join(timeout=1)
         self.threads = []
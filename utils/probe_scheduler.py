@@ -0,0 +1,162 @@
+import heapq
+import random
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Secvența cu discrepanță mică: fazele host-urilor se distribuie uniform pe interval, oricâte ar fi
+GOLDEN_RATIO = 0.6180339887498949
+
+
+class _HostSchedule:
+    __slots__ = ('interval', 'anchor', 'probed_at', 'generation', 'failures', 'history', 'observed')
+
+    def __init__(self, interval: float, anchor: float):
+        self.interval = interval
+        self.anchor = anchor
+        self.probed_at = anchor
+        self.generation = 0
+        self.failures = 0
+        # Ultimele rezultate ca biți (1 = răspuns), pentru detectarea oscilațiilor
+        self.history = 0
+        self.observed = 0
+
+
+class ProbeScheduler:
+    """Planificator central de probe: cadență fixă cu jitter, intervale per host, backoff și limită globală pps"""
+
+    def __init__(self, interval: float = 2.0, jitter: float = 0.1, max_pps: Optional[float] = None,
+                 backoff: bool = True, down_after: int = 3, max_interval: float = 60.0,
+                 flap_window: int = 10, flap_threshold: int = 4, flap_speedup: float = 2.0,
+                 min_interval: float = 0.5, seed: Optional[int] = None):
+        self.interval = interval
+        self.jitter = jitter
+        self.max_pps = max_pps
+        self.backoff = backoff
+        self.down_after = down_after
+        self.max_interval = max_interval
+        self.flap_window = flap_window
+        self.flap_threshold = flap_threshold
+        self.flap_speedup = flap_speedup
+        self.min_interval = min_interval
+        self._hosts: Dict[str, _HostSchedule] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._added = 0
+        self._rng = random.Random(seed)
+        # Token bucket pentru limita globală; rafala permisă acoperă ~10 ms
+        self._burst = max(1.0, (max_pps or 0) / 100)
+        self._tokens = self._burst
+        self._refilled_at = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._hosts)
+
+    def __contains__(self, host: str) -> bool:
+        return host in self._hosts
+
+    def add(self, host: str, now: float, interval: Optional[float] = None):
+        """Adaugă un host cu o fază proprie în interval (fără rafale la pornire)"""
+        with self._lock:
+            if host in self._hosts:
+                return
+            interval = interval or self.interval
+            phase = (self._added * GOLDEN_RATIO) % 1.0
+            self._added += 1
+            schedule = _HostSchedule(interval, now + phase * interval)
+            self._hosts[host] = schedule
+            heapq.heappush(self._heap, (schedule.anchor, schedule.generation, host))
+
+    def remove(self, host: str):
+        """Scoate host-ul; intrarea din heap este ignorată la extragere"""
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def set_interval(self, host: str, interval: float):
+        """Schimbă intervalul de bază al unui host (aplicat de la următoarea probă)"""
+        with self._lock:
+            schedule = self._hosts.get(host)
+            if schedule is not None:
+                schedule.interval = interval
+
+    def effective_interval(self, host: str) -> Optional[float]:
+        """Intervalul curent, după backoff sau accelerarea pentru host-uri instabile"""
+        with self._lock:
+            schedule = self._hosts.get(host)
+            return self._effective(schedule) if schedule else None
+
+    def _flapping(self, schedule: _HostSchedule) -> bool:
+        window = min(schedule.observed, self.flap_window)
+        if window < 2:
+            return False
+        mask = (1 << (window - 1)) - 1
+        transitions = bin((schedule.history ^ (schedule.history >> 1)) & mask).count('1')
+        return transitions >= self.flap_threshold
+
+    def _effective(self, schedule: _HostSchedule) -> float:
+        if self.backoff and schedule.failures >= self.down_after:
+            # Host căzut: intervalul se dublează la fiecare eșec, până la max_interval
+            steps = min(schedule.failures - self.down_after + 1, 16)
+            return max(schedule.interval, min(schedule.interval * 2 ** steps, self.max_interval))
+        if self._flapping(schedule):
+            return max(self.min_interval, schedule.interval / self.flap_speedup)
+        return schedule.interval
+
+    def record(self, host: str, ok: bool):
+        """Rezultatul unei probe: alimentează backoff-ul și detectarea oscilațiilor"""
+        with self._lock:
+            schedule = self._hosts.get(host)
+            if schedule is None:
+                return
+            recovered = ok and schedule.failures >= self.down_after
+            schedule.failures = 0 if ok else schedule.failures + 1
+            schedule.history = ((schedule.history << 1) | ok) & ((1 << self.flap_window) - 1)
+            schedule.observed += 1
+            if recovered:
+                # Host revenit: nu mai așteaptă restul intervalului de backoff
+                schedule.anchor = schedule.probed_at + schedule.interval
+                schedule.generation += 1
+                heapq.heappush(self._heap, (schedule.anchor, schedule.generation, host))
+
+    def _refill(self, now: float):
+        if not self.max_pps:
+            return
+        if self._refilled_at is not None:
+            self._tokens = min(self._burst, self._tokens + (now - self._refilled_at) * self.max_pps)
+        self._refilled_at = now
+
+    def pop_due(self, now: float) -> List[Tuple[str, float]]:
+        """Host-urile scadente (host, momentul programat), în limita bugetului de pachete"""
+        due = []
+        with self._lock:
+            self._refill(now)
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                if self.max_pps and self._tokens < 1:
+                    break
+                at, generation, host = heapq.heappop(heap)
+                schedule = self._hosts.get(host)
+                if schedule is None or schedule.generation != generation:
+                    continue
+                # Ancora avansează cu intervalul întreg; jitter-ul nu se acumulează
+                interval = self._effective(schedule)
+                schedule.probed_at = now
+                schedule.anchor += interval
+                if schedule.anchor <= now:
+                    schedule.anchor = now + interval
+                schedule.generation += 1
+                offset = self._rng.uniform(-self.jitter, self.jitter) * interval if self.jitter else 0.0
+                heapq.heappush(heap, (schedule.anchor + offset, schedule.generation, host))
+                if self.max_pps:
+                    self._tokens -= 1
+                due.append((host, at))
+        return due
+
+    def next_wakeup(self, now: float) -> Optional[float]:
+        """Secunde până la următoarea probă posibilă (None dacă nu există host-uri)"""
+        with self._lock:
+            if not self._heap:
+                return None
+            wait = self._heap[0][0] - now
+            if self.max_pps and self._tokens < 1:
+                wait = max(wait, (1 - self._tokens) / self.max_pps)
+            return max(0.0, wait)
@@ -0,0 +1,174 @@
+import asyncio
+import queue
+import socket
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+# Seturi de porturi predefinite
+PORT_SETS = {
+    'common': [21, 22, 23, 25, 53, 80, 110, 135, 139, 143, 443, 445, 548, 631, 993, 995,
+               1883, 3306, 3389, 5000, 5432, 5900, 8000, 8080, 8443, 9100],
+    'web': [80, 443, 8000, 8008, 8080, 8443, 8888],
+    'legacy': list(range(21, 444)),
+}
+
+SERVICE_NAMES = {
+    21: 'ftp', 22: 'ssh', 23: 'telnet', 25: 'smtp', 53: 'domain', 80: 'http', 110: 'pop3',
+    135: 'msrpc', 139: 'netbios-ssn', 143: 'imap', 443: 'https', 445: 'microsoft-ds',
+    548: 'afp', 631: 'ipp', 993: 'imaps', 995: 'pop3s', 1883: 'mqtt', 3306: 'mysql',
+    3389: 'ms-wbt-server', 5000: 'upnp', 5432: 'postgresql', 5900: 'vnc', 8000: 'http-alt',
+    8008: 'http', 8080: 'http-proxy', 8443: 'https-alt', 8888: 'http-alt', 9100: 'jetdirect',
+}
+
+# Porturi unde serverul nu vorbește primul: trimitem o cerere minimă pentru banner
+HTTP_PORTS = {80, 8000, 8008, 8080, 8888}
+
+
+def parse_ports(spec: Union[str, Iterable[int]]) -> List[int]:
+    """Porturi dintr-un set predefinit ('common'), o listă sau un șir '21-25,80,8080'"""
+    if not isinstance(spec, str):
+        return sorted(set(int(p) for p in spec))
+    if spec in PORT_SETS:
+        return list(PORT_SETS[spec])
+    ports = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        ports.update(range(int(start), int(end or start) + 1))
+    return sorted(ports)
+
+
+def service_name(port: int) -> str:
+    """Numele serviciului obișnuit pe un port"""
+    name = SERVICE_NAMES.get(port)
+    if name:
+        return name
+    try:
+        return socket.getservbyport(port, 'tcp')
+    except OSError:
+        return 'unknown'
+
+
+class _HostLimiter:
+    """Limitele unui host: conexiuni simultane și rata de conexiuni noi"""
+
+    def __init__(self, concurrency: int, rate: Optional[float]):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_at = 0.0
+
+    async def wait_turn(self):
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self.next_at)
+        self.next_at = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class ServiceScanner:
+    """Scanare TCP connect asincronă pentru tot inventarul, cu limite globale și per host"""
+
+    def __init__(self, ports: Union[str, Iterable[int]] = 'common', concurrency: int = 512,
+                 per_host: int = 32, per_host_rate: Optional[float] = None, timeout: float = 1.0,
+                 grab_banners: bool = False, banner_bytes: int = 256, banner_timeout: float = 1.0):
+        self.ports = parse_ports(ports)
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.per_host_rate = per_host_rate
+        self.timeout = timeout
+        self.grab_banners = grab_banners
+        self.banner_bytes = banner_bytes
+        self.banner_timeout = banner_timeout
+
+    async def _probe(self, ip: str, port: int, limiter: _HostLimiter,
+                     semaphore: asyncio.Semaphore) -> Optional[Dict]:
+        # Întâi limita host-ului, apoi cea globală: un host lent nu blochează sloturile globale
+        async with limiter.semaphore:
+            await limiter.wait_turn()
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(ip, port), self.timeout)
+                except (OSError, asyncio.TimeoutError):
+                    return None
+                rtt = (time.perf_counter() - started) * 1000
+                banner = None
+                try:
+                    if self.grab_banners:
+                        banner = await self._grab_banner(ip, port, reader, writer)
+                finally:
+                    writer.close()
+                    try:
+                        await writer.wait_closed()
+                    except OSError:
+                        pass
+        return {'port': port, 'service': service_name(port), 'rtt': round(rtt, 2), 'banner': banner}
+
+    async def _grab_banner(self, ip: str, port: int, reader: asyncio.StreamReader,
+                           writer: asyncio.StreamWriter) -> Optional[str]:
+        if port in HTTP_PORTS:
+            writer.write(f"HEAD / HTTP/1.0\r\nHost: {ip}\r\n\r\n".encode())
+        try:
+            data = await asyncio.wait_for(reader.read(self.banner_bytes), self.banner_timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        text = data.decode('latin-1').strip()
+        return text.splitlines()[0] if text else None
+
+    async def scan_host_async(self, ip: str, ports: Optional[Sequence[int]] = None,
+                              semaphore: Optional[asyncio.Semaphore] = None) -> Dict:
+        """Scanează porturile unui host; returnează porturile deschise și durata"""
+        semaphore = semaphore or asyncio.Semaphore(self.concurrency)
+        limiter = _HostLimiter(self.per_host, self.per_host_rate)
+        ports = self.ports if ports is None else ports
+        started = time.perf_counter()
+        found = await asyncio.gather(*(self._probe(ip, port, limiter, semaphore) for port in ports))
+        return {
+            'ip': ip,
+            'open': {r['port']: r for r in found if r is not None},
+            'scanned': len(ports),
+            'elapsed': round(time.perf_counter() - started, 3),
+        }
+
+    async def scan_async(self, ips: Iterable[str],
+                         on_host: Optional[Callable[[Dict], None]] = None) -> Dict[str, Dict]:
+        """Scanează toate host-urile în paralel; callback-ul primește fiecare host când e gata"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = {}
+        for task in asyncio.as_completed([self.scan_host_async(ip, semaphore=semaphore)
+                                          for ip in dict.fromkeys(ips)]):
+            result = await task
+            results[result['ip']] = result
+            if on_host:
+                on_host(result)
+        return results
+
+    def scan(self, ips: Iterable[str], on_host: Optional[Callable[[Dict], None]] = None) -> Dict[str, Dict]:
+        """Variantă sincronă (rulează propria buclă asyncio)"""
+        return asyncio.run(self.scan_async(ips, on_host))
+
+    def stream(self, ips: Iterable[str]) -> Iterator[Dict]:
+        """Generează rezultatele per host pe măsură ce se termină (scanarea rulează într-un thread)"""
+        results = queue.Queue()
+
+        def run():
+            try:
+                self.scan(ips, results.put)
+            finally:
+                results.put(None)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        while True:
+            item = results.get()
+            if item is None:
+                break
+            yield item
+        thread.join()
@@ -0,0 +1,507 @@
+import heapq
+import http.server
+import ipaddress
+import json
+import math
+import random
+import selectors
+import socket
+import struct
+import threading
+import time
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.arp_sweep import ScriptedResponder
+from utils.hostname_resolver import TYPE_PTR, read_name
+from utils.icmp_engine import ICMP_ECHO_REPLY, icmp_checksum
+from utils.passive_discovery import DHCP_MAGIC, DHCP_REQUEST, ETH_P_ARP, ETH_P_IP, TYPE_A
+
+
+def _mac_bytes(mac: str) -> bytes:
+    return bytes(int(part, 16) for part in mac.split(':'))
+
+
+def _ethernet(src_mac: str, dst_mac: str, ethertype: int, payload: bytes) -> bytes:
+    return _mac_bytes(dst_mac) + _mac_bytes(src_mac) + struct.pack('!H', ethertype) + payload
+
+
+def _udp_frame(src_mac: str, dst_mac: str, src_ip: str, dst_ip: str,
+               src_port: int, dst_port: int, payload: bytes) -> bytes:
+    udp = struct.pack('!HHHH', src_port, dst_port, 8 + len(payload), 0) + payload
+    header = struct.pack('!BBHHHBBH4s4s', 0x45, 0, 20 + len(udp), 0, 0, 64, socket.IPPROTO_UDP, 0,
+                         socket.inet_aton(src_ip), socket.inet_aton(dst_ip))
+    header = header[:10] + struct.pack('!H', icmp_checksum(header)) + header[12:]
+    return _ethernet(src_mac, dst_mac, ETH_P_IP, header + udp)
+
+
+def arp_frame(ip: str, mac: str, target_ip: str) -> bytes:
+    """Cerere ARP broadcast trimisă de host-ul (ip, mac)"""
+    payload = struct.pack('!HHBBH6s4s6s4s', 1, ETH_P_IP, 6, 4, 1, _mac_bytes(mac), socket.inet_aton(ip),
+                          b'\x00' * 6, socket.inet_aton(target_ip))
+    return _ethernet(mac, 'FF:FF:FF:FF:FF:FF', ETH_P_ARP, payload)
+
+
+def dhcp_request_frame(ip: str, mac: str, hostname: str) -> bytes:
+    """DHCP REQUEST cu adresa cerută (opțiunea 50) și numele host-ului (opțiunea 12)"""
+    name = hostname.encode()
+    bootp = struct.pack('!BBBBIHH4s4s4s4s16s64s128s', 1, 1, 6, 0, 0x1234, 0, 0x8000, b'\x00' * 4,
+                        b'\x00' * 4, b'\x00' * 4, b'\x00' * 4, _mac_bytes(mac), b'', b'')
+    options = (DHCP_MAGIC + bytes([53, 1, DHCP_REQUEST, 50, 4]) + socket.inet_aton(ip) +
+               bytes([12, len(name)]) + name + b'\xff')
+    return _udp_frame(mac, 'FF:FF:FF:FF:FF:FF', '0.0.0.0', '255.255.255.255', 68, 67, bootp + options)
+
+
+def mdns_frame(ip: str, mac: str, hostname: str) -> bytes:
+    """Anunț mDNS nesolicitat cu înregistrarea A <hostname>.local"""
+    name = b''.join(bytes([len(label)]) + label.encode() for label in f"{hostname}.local".split('.')) + b'\x00'
+    answer = name + struct.pack('!HHIH', TYPE_A, 0x8001, 120, 4) + socket.inet_aton(ip)
+    payload = struct.pack('!HHHHHH', 0, 0x8400, 0, 1, 0, 0) + answer
+    return _udp_frame(mac, '01:00:5E:00:00:FB', ip, '224.0.0.251', 5353, 5353, payload)
+
+
+class RttModel:
+    """Distribuția RTT a unui host simulat: medie, jitter, pierderi"""
+
+    def __init__(self, mean: float = 5.0, jitter: float = 1.0, loss: float = 0.0,
+                 distribution: str = 'lognormal', rng: Optional[random.Random] = None):
+        self.mean = mean
+        self.jitter = jitter
+        self.loss = loss
+        self.distribution = distribution
+        self.rng = rng or random.Random()
+
+    def sample(self) -> Optional[float]:
+        """Un RTT în ms sau None pentru un pachet pierdut"""
+        if self.rng.random() < self.loss:
+            return None
+        if self.distribution == 'constant' or not self.jitter:
+            return self.mean
+        if self.distribution == 'uniform':
+            return max(0.0, self.rng.uniform(self.mean - self.jitter, self.mean + self.jitter))
+        if self.distribution == 'normal':
+            return max(0.0, self.rng.gauss(self.mean, self.jitter))
+        # Lognormal: coada lungă tipică rețelelor reale, cu media și deviația cerute
+        variance = self.jitter ** 2
+        sigma2 = math.log(1 + variance / self.mean ** 2)
+        mu = math.log(self.mean) - sigma2 / 2
+        return self.rng.lognormvariate(mu, sigma2 ** 0.5)
+
+
+class SimulatedNetwork:
+    """Rețea sintetică: fiecare host are propriul model RTT și o adresă MAC"""
+
+    def __init__(self, hosts: Dict[str, RttModel], seed: Optional[int] = None):
+        self.hosts = hosts
+        self.rng = random.Random(seed)
+        self.macs = {ip: ':'.join(f'{self.rng.getrandbits(8):02X}' for _ in range(6)) for ip in hosts}
+
+    @classmethod
+    def generate(cls, count: int, network: str = '10.0.0.0/8', mean: float = 5.0,
+                 jitter: float = 2.0, loss: float = 0.01, down_ratio: float = 0.02,
+                 distribution: str = 'lognormal', seed: Optional[int] = None) -> 'SimulatedNetwork':
+        """Generează `count` host-uri cu RTT-uri variate și o fracțiune de host-uri căzute"""
+        rng = random.Random(seed)
+        addresses = ipaddress.ip_network(network, strict=False).hosts()
+        hosts = {}
+        for _ in range(count):
+            ip = str(next(addresses))
+            host_loss = 1.0 if rng.random() < down_ratio else loss
+            hosts[ip] = RttModel(mean=mean * rng.uniform(0.5, 3.0), jitter=jitter, loss=host_loss,
+                                 distribution=distribution, rng=random.Random(rng.getrandbits(32)))
+        return cls(hosts, seed)
+
+    def network_range(self) -> str:
+        """Cea mai mică subrețea care acoperă toate host-urile simulate"""
+        addresses = sorted(int(ipaddress.ip_address(ip)) for ip in self.hosts)
+        span = (addresses[0] ^ addresses[-1]).bit_length()
+        return str(ipaddress.ip_network((addresses[0], 32 - span), strict=False))
+
+    def sock_factory(self) -> Tuple['SimulatedIcmpSocket', bool]:
+        """Factory compatibil cu IcmpProbeEngine(sock_factory=...)"""
+        return SimulatedIcmpSocket(self), False
+
+    def capture_frames(self, duration: float = 60.0, dhcp_ratio: float = 0.1, mdns_ratio: float = 0.2,
+                       start: Optional[float] = None) -> List[Tuple[float, bytes]]:
+        """Trafic pasiv simulat: fiecare host trimite ARP, unele și DHCP REQUEST / anunțuri mDNS"""
+        start = time.time() if start is None else start
+        frames = []
+        gateway = next(iter(self.hosts))
+        for ip, mac in self.macs.items():
+            hostname = f"host-{ip.replace('.', '-')}"
+            at = start + self.rng.uniform(0, duration)
+            if self.rng.random() < dhcp_ratio:
+                frames.append((at, dhcp_request_frame(ip, mac, hostname)))
+                at += 0.01
+            frames.append((at, arp_frame(ip, mac, gateway)))
+            if self.rng.random() < mdns_ratio:
+                frames.append((at + 0.01, mdns_frame(ip, mac, hostname)))
+        frames.sort(key=lambda f: f[0])
+        return frames
+
+    def write_nmap_xml(self, stream: BinaryIO, open_ports: Sequence[int] = (), hostnames: bool = True):
+        """Ieșire `nmap -oX` sintetică pentru host-urile simulate (host-urile căzute apar ca 'down')"""
+        stream.write(b'<?xml version="1.0" encoding="UTF-8"?>\n'
+                     b'<nmaprun scanner="nmap" args="nmap -sn -oX -" version="7.94" xmloutputversion="1.05">\n')
+        for ip, mac in self.macs.items():
+            state = 'down' if self.hosts[ip].loss >= 1.0 else 'up'
+            parts = [f'<host><status state="{state}" reason="arp-response"/>',
+                     f'<address addr="{ip}" addrtype="ipv4"/>',
+                     f'<address addr="{mac}" addrtype="mac" vendor="Simulated"/>']
+            if hostnames:
+                parts.append(f'<hostnames><hostname name="host-{ip.replace(".", "-")}" type="PTR"/></hostnames>')
+            if open_ports:
+                parts.append('<ports>' + ''.join(
+                    f'<port protocol="tcp" portid="{port}"><state state="open" reason="syn-ack"/>'
+                    f'<service name="svc{port}" method="table"/></port>' for port in open_ports) + '</ports>')
+            parts.append('</host>\n')
+            stream.write(''.join(parts).encode())
+        stream.write(f'<runstats><hosts up="{len(self.hosts)}" total="{len(self.hosts)}"/></runstats></nmaprun>\n'.encode())
+
+    def arp_transport(self, delay: float = 0.001, jitter: float = 0.002) -> ScriptedResponder:
+        """Transport ARP simulat pentru ArpSweeper"""
+        return ScriptedResponder(self.macs, delay=delay, jitter=jitter, seed=self.rng.getrandbits(32))
+
+
+class SimulatedIcmpSocket:
+    """Socket ICMP fals: răspunsurile sunt livrate prin socketpair, deci merge cu selectors"""
+
+    IDENT = 4242
+
+    def __init__(self, network: SimulatedNetwork):
+        self.network = network
+        self._rx, self._tx = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._rx.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self._pending: List[Tuple[float, int, bytes]] = []
+        self._counter = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        # Momentele de trimitere per host, pentru măsurarea întârzierii planificatorului
+        self.sent_at: Dict[str, List[float]] = {}
+        self._thread = threading.Thread(target=self._deliver, daemon=True)
+        self._thread.start()
+
+    def fileno(self) -> int:
+        return self._rx.fileno()
+
+    def setblocking(self, flag: bool):
+        self._rx.setblocking(flag)
+
+    def getsockname(self):
+        return ('0.0.0.0', self.IDENT)
+
+    def sendto(self, packet: bytes, address: Tuple[str, int]) -> int:
+        ip = address[0]
+        now = time.monotonic()
+        self.sent_at.setdefault(ip, []).append(now)
+        model = self.network.hosts.get(ip)
+        rtt = model.sample() if model else None
+        if rtt is None:
+            return len(packet)
+        _type, _code, _checksum, ident, seq = struct.unpack('!BBHHH', packet[:8])
+        reply = struct.pack('!BBHHH', ICMP_ECHO_REPLY, 0, 0, ident, seq) + packet[8:]
+        with self._cond:
+            self._counter += 1
+            heapq.heappush(self._pending, (now + rtt / 1000, self._counter,
+                                           socket.inet_aton(ip) + reply))
+            self._cond.notify()
+        return len(packet)
+
+    def recvfrom(self, size: int):
+        data = self._rx.recv(size + 4)
+        return data[4:], (socket.inet_ntoa(data[:4]), 0)
+
+    def _deliver(self):
+        while True:
+            with self._cond:
+                while not self._closed and (not self._pending or self._pending[0][0] > time.monotonic()):
+                    timeout = self._pending[0][0] - time.monotonic() if self._pending else None
+                    self._cond.wait(timeout)
+                if self._closed:
+                    return
+                due = []
+                now = time.monotonic()
+                while self._pending and self._pending[0][0] <= now:
+                    due.append(heapq.heappop(self._pending)[2])
+            for data in due:
+                try:
+                    self._tx.send(data)
+                except OSError:
+                    pass
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=1)
+        self._rx.close()
+        self._tx.close()
+
+
+class StubDnsServer:
+    """Server DNS local pentru teste: răspunde la PTR din tabela ip -> nume, NXDOMAIN altfel"""
+
+    def __init__(self, records: Dict[str, str], silent: Sequence[str] = (), host: str = '127.0.0.1',
+                 port: int = 0, ttl: int = 300):
+        self.records = {ipaddress.ip_address(ip).reverse_pointer: name for ip, name in records.items()}
+        # Adresele din `silent` nu primesc niciun răspuns (simulează un timeout)
+        self.silent = {ipaddress.ip_address(ip).reverse_pointer for ip in silent}
+        self.ttl = ttl
+        self.queries: List[str] = []
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((host, port))
+        self._sock.settimeout(0.1)
+        self._closed = False
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._sock.getsockname()
+
+    def start(self) -> 'StubDnsServer':
+        self._thread.start()
+        return self
+
+    def answer(self, query: bytes) -> Optional[bytes]:
+        """Răspunsul pentru o cerere (None = fără răspuns)"""
+        ident, _flags, qdcount = struct.unpack_from('!HHH', query)
+        if qdcount != 1:
+            return None
+        name, end = read_name(query, 12)
+        qtype, _qclass = struct.unpack_from('!HH', query, end)
+        self.queries.append(name)
+        if name in self.silent:
+            return None
+        question = query[12:end + 4]
+        target = self.records.get(name) if qtype == TYPE_PTR else None
+        if target is None:
+            # NXDOMAIN (rcode 3), fără răspunsuri
+            return struct.pack('!HHHHHH', ident, 0x8183, 1, 0, 0, 0) + question
+        rdata = b''.join(bytes([len(part)]) + part.encode('ascii') for part in target.split('.') if part) + b'\0'
+        record = struct.pack('!HHHIH', 0xc00c, TYPE_PTR, 1, self.ttl, len(rdata)) + rdata
+        return struct.pack('!HHHHHH', ident, 0x8180, 1, 1, 0, 0) + question + record
+
+    def _serve(self):
+        while not self._closed:
+            try:
+                query, address = self._sock.recvfrom(512)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            try:
+                response = self.answer(query)
+            except (struct.error, IndexError):
+                continue
+            if response is not None:
+                self._sock.sendto(response, address)
+
+    def close(self):
+        self._closed = True
+        self._thread.join(timeout=1)
+        self._sock.close()
+
+
+class StubSpeedServer:
+    """Server HTTP local pentru teste: lista de servere speedtest (JSON) și `latency.txt` per server"""
+
+    def __init__(self, delays: Dict[str, Optional[float]], host: str = '127.0.0.1', port: int = 0):
+        # id server -> întârzierea răspunsului la latency.txt (None = server indisponibil)
+        self.delays = dict(delays)
+        self.requests: List[str] = []
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                stub.requests.append(path)
+                if path == '/servers.json':
+                    body = json.dumps(stub.servers()).encode('utf-8')
+                    self._reply(200, body, 'application/json')
+                    return
+                parts = path.strip('/').split('/')
+                delay = stub.delays.get(parts[0]) if len(parts) == 2 and parts[1] == 'latency.txt' else None
+                if delay is None:
+                    self._reply(404, b'', 'text/plain')
+                    return
+                time.sleep(delay)
+                self._reply(200, b'test=test', 'text/plain')
+
+            def _reply(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address
+
+    @property
+    def servers_url(self) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}/servers.json"
+
+    def servers(self) -> List[Dict]:
+        """Lista de servere în formatul /api/js/servers"""
+        host, port = self.address
+        return [{'id': server_id, 'name': f"Stub {server_id}", 'url': f"http://{host}:{port}/{server_id}/upload.php"}
+                for server_id in self.delays]
+
+    def count(self, path: str) -> int:
+        """De câte ori a fost cerută o cale"""
+        return sum(1 for requested in self.requests if requested == path)
+
+    def start(self) -> 'StubSpeedServer':
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=1)
+
+
+class LoopbackServices:
+    """Listeneri TCP pe loopback: cei cu banner îl trimit la conectare, ceilalți închid imediat"""
+
+    def __init__(self, banners: Sequence[Optional[str]], closed: int = 0, host: str = '127.0.0.1'):
+        self.host = host
+        self.banners: Dict[int, Optional[str]] = {}
+        self._selector = selectors.DefaultSelector()
+        for banner in banners:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind((host, 0))
+            sock.listen(64)
+            sock.setblocking(False)
+            port = sock.getsockname()[1]
+            self.banners[port] = banner
+            self._selector.register(sock, selectors.EVENT_READ, banner)
+        # Porturi libere pe care nu ascultă nimeni (conexiunea este refuzată)
+        self.closed_ports: List[int] = []
+        while len(self.closed_ports) < closed:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.bind((host, 0))
+                port = sock.getsockname()[1]
+            if port not in self.banners:
+                self.closed_ports.append(port)
+        self._closed = False
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    @property
+    def open_ports(self) -> List[int]:
+        return sorted(self.banners)
+
+    def start(self) -> 'LoopbackServices':
+        self._thread.start()
+        return self
+
+    def _serve(self):
+        while not self._closed:
+            for key, _mask in self._selector.select(0.1):
+                try:
+                    conn, _address = key.fileobj.accept()
+                except OSError:
+                    continue
+                with conn:
+                    if key.data is not None:
+                        try:
+                            conn.sendall(key.data.encode() + b'\r\n')
+                        except OSError:
+                            pass
+
+    def close(self):
+        self._closed = True
+        self._thread.join(timeout=1)
+        for key in list(self._selector.get_map().values()):
+            key.fileobj.close()
+        self._selector.close()
+
+
+class TraceRecorder:
+    """Listener PingMonitor care scrie fiecare probă într-un fișier JSON Lines"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a', buffering=1 << 16)
+        self._lock = threading.Lock()
+
+    def __call__(self, host: str, timestamp: float, response_time: Optional[float],
+                 status: str, packet_loss: bool):
+        line = json.dumps({'host': host, 'ts': timestamp, 'rtt': response_time}) + '\n'
+        with self._lock:
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class TraceReplayer:
+    """Redă o urmă de probe (fișier sau istoric din TimeSeriesStore) cu viteză accelerată"""
+
+    def __init__(self, samples: List[Tuple[float, str, Optional[float]]], speed: float = 10.0):
+        self.samples = sorted(samples, key=lambda s: s[0])
+        self.speed = speed
+
+    @classmethod
+    def from_file(cls, path: str, speed: float = 10.0) -> 'TraceReplayer':
+        """Încarcă o urmă scrisă de TraceRecorder"""
+        samples = []
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    samples.append((record['ts'], record['host'], record['rtt']))
+        return cls(samples, speed)
+
+    @classmethod
+    def from_store(cls, store, start: float, end: Optional[float] = None,
+                   speed: float = 10.0) -> 'TraceReplayer':
+        """Folosește eșantioanele brute deja salvate de colector ca urmă de producție"""
+        samples = []
+        for host, points in store.query_ping(start, end, resolution='ping_raw').items():
+            samples.extend((p['timestamp'], host, p['avg']) for p in points)
+        return cls(samples, speed)
+
+    @property
+    def hosts(self) -> List[str]:
+        return sorted({host for _ts, host, _rtt in self.samples})
+
+    def events(self) -> Iterator[Tuple[float, str, Optional[float]]]:
+        """(întârziere față de start, host, rtt) cu timpul comprimat de `speed`"""
+        if not self.samples:
+            return
+        origin = self.samples[0][0]
+        for ts, host, rtt in self.samples:
+            yield (ts - origin) / self.speed, host, rtt
+
+    def replay(self, on_result: Callable[[str, Optional[float]], None],
+               stop: Optional[threading.Event] = None) -> Dict:
+        """Livrează probele către `on_result` (ex. PingMonitor.record_result) la momentele scalate"""
+        stop = stop or threading.Event()
+        started = time.perf_counter()
+        lags = []
+        delivered = 0
+        for offset, host, rtt in self.events():
+            delay = started + offset - time.perf_counter()
+            if delay > 0 and stop.wait(delay):
+                break
+            lags.append(max(0.0, time.perf_counter() - started - offset))
+            on_result(host, rtt)
+            delivered += 1
+        elapsed = time.perf_counter() - started
+        lags.sort()
+        return {
+            'samples': delivered,
+            'elapsed': elapsed,
+            'rate': delivered / elapsed if elapsed else 0.0,
+            'lag_p99_ms': lags[int(len(lags) * 0.99) - 1] * 1000 if lags else 0.0,
+        }
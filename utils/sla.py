@@ -0,0 +1,451 @@
+import csv
+import io
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+# Ferestrele raportate implicit: nume -> durată (secunde)
+SLA_WINDOWS = {'1h': 3600, '1d': 86400, '30d': 30 * 86400}
+
+# Niveluri de bucket-uri: (dimensiunea bucket-ului în secunde, numărul de sloturi din ring)
+# Fiecare fereastră folosește cel mai fin nivel care o acoperă; bucket-ul cel mai vechi se ia proporțional
+TIERS = ((300, 14), (3600, 26), (86400, 32))
+
+# Contoarele per bucket: eșantioane, pierderi, secunde observate, secunde căzut, pene închise,
+# secunde până la revenire (pentru MTTR), suma RTT-urilor
+FIELDS = ('samples', 'lost', 'observed', 'down', 'outages', 'repair', 'rtt_sum')
+SAMPLES, LOST, OBSERVED, DOWN, OUTAGES, REPAIR, RTT_SUM = range(len(FIELDS))
+
+# Histograma RTT: limite logaritmice (x1.5) de la 0.25 ms la ~1.9 s; histogramele se pot aduna
+HIST_EDGES = 0.25 * 1.5 ** np.arange(23)
+HIST_BINS = len(HIST_EDGES) + 1
+
+# Coloanele exportului (CSV/Parquet)
+EXPORT_COLUMNS = ('window', 'host', 'samples', 'uptime', 'loss_rate', 'avg', 'p95', 'outages', 'mttr', 'down_since')
+
+
+def window_seconds(window: Union[str, float]) -> float:
+    """Durata ferestrei: un nume din SLA_WINDOWS sau un număr de secunde"""
+    if isinstance(window, str):
+        if window not in SLA_WINDOWS:
+            raise ValueError(f"Fereastră necunoscută: {window} (disponibile: {', '.join(SLA_WINDOWS)})")
+        return SLA_WINDOWS[window]
+    return float(window)
+
+
+def histogram_quantile(hist: np.ndarray, q: float) -> np.ndarray:
+    """Cuantila q din histograme (un rând per host), interpolată geometric în bin; NaN fără eșantioane"""
+    hist = np.atleast_2d(hist)
+    total = hist.sum(axis=1)
+    cum = np.cumsum(hist, axis=1)
+    target = q * total
+    idx = np.argmax(cum >= target[:, None] - 1e-9, axis=1)
+    rows = np.arange(len(hist))
+    inside = hist[rows, idx]
+    below = cum[rows, idx] - inside
+    frac = np.clip(np.where(inside > 0, (target - below) / np.where(inside > 0, inside, 1), 0), 0, 1)
+    lower = np.concatenate([[HIST_EDGES[0] / 1.5], HIST_EDGES])[idx]
+    upper = np.concatenate([HIST_EDGES, [HIST_EDGES[-1]]])[idx]
+    # Primul bin este liniar de la 0, ultimul raportează limita inferioară (RTT > 1.9 s)
+    value = np.where(idx == 0, upper * frac, lower * (upper / lower) ** frac)
+    return np.where(total > 0, value, np.nan)
+
+
+def report_rows(report: Dict) -> List[Dict]:
+    """Rândurile unui raport (flota ca host '*', apoi host-urile), în formatul exportului"""
+    rows = [dict(window=report['window'], host='*', down_since=None, **report['fleet'])]
+    for host, stats in report['hosts'].items():
+        rows.append(dict(window=report['window'], host=host, **stats))
+    return [{column: row.get(column) for column in EXPORT_COLUMNS} for row in rows]
+
+
+def rows_to_csv(rows: Iterable[Dict]) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def write_rows(path: str, rows: List[Dict], fmt: Optional[str] = None):
+    """Scrie rândurile în CSV sau Parquet (după extensie dacă `fmt` lipsește)"""
+    fmt = fmt or ('parquet' if path.endswith('.parquet') else 'csv')
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if fmt == 'parquet':
+        # Parquet necesită pandas și pyarrow (sau fastparquet)
+        import pandas as pd
+        pd.DataFrame(rows, columns=list(EXPORT_COLUMNS)).to_parquet(path, index=False)
+    elif fmt == 'csv':
+        with open(path, 'w', newline='') as f:
+            f.write(rows_to_csv(rows))
+    else:
+        raise ValueError(f"Format necunoscut: {fmt}")
+
+
+class SlaAggregator:
+    """Agregare SLA incrementală (uptime, p95, pierderi, MTTR) pe ferestre lungi, în bucket-uri NumPy
+
+    Listener PingMonitor: eșantioanele se adună într-un lot aplicat vectorizat, iar un raport pentru
+    mii de host-uri însumează doar câteva zeci de bucket-uri per host, indiferent de numărul de probe.
+    """
+
+    def __init__(self, outage_after: int = 3, max_gap: float = 300.0, batch_size: int = 4096,
+                 cache_age: float = 1.0, initial_hosts: int = 16):
+        self.outage_after = outage_after
+        self.max_gap = max_gap
+        self.batch_size = batch_size
+        self.cache_age = cache_age
+        self.host_index: Dict[str, int] = {}
+        self._hosts: List[str] = []
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._cache: Dict[tuple, tuple] = {}
+        self._autosave = None
+        self._stop = threading.Event()
+
+        self._allocate(max(1, initial_hosts))
+
+    def _allocate(self, rows: int):
+        self.buckets = [np.full((rows, slots), -1, dtype=np.int64) for _size, slots in TIERS]
+        self.counters = [np.zeros((rows, slots, len(FIELDS)), dtype=np.float64) for _size, slots in TIERS]
+        # float32: contoare exacte până la 2^24 per bin și bucket, iar însumarea ponderată nu mai convertește
+        self.hist = [np.zeros((rows, slots, HIST_BINS), dtype=np.float32) for _size, slots in TIERS]
+        # RTT minim și maxim per bucket: limitează cuantila estimată din histogramă
+        self.extrema = [np.full((rows, slots, 2), [np.inf, -np.inf]) for _size, slots in TIERS]
+        # Starea per host: ultimul eșantion, eșecuri consecutive, începutul seriei de eșecuri
+        self.last_ts = np.full(rows, np.nan)
+        self.fail_run = np.zeros(rows, dtype=np.int64)
+        self.fail_start = np.zeros(rows, dtype=np.float64)
+        self.fail_down = np.zeros(rows, dtype=np.float64)
+
+    def __call__(self, host: str, timestamp: float, response_time: Optional[float],
+                 status: str, packet_loss: bool):
+        """Semnătura listener-ilor PingMonitor"""
+        with self._pending_lock:
+            self._pending.append((host, timestamp, response_time))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def memory_usage(self) -> int:
+        """Octeți ocupați de bucket-uri și starea per host"""
+        arrays = (self.buckets + self.counters + self.hist + self.extrema
+                  + [self.last_ts, self.fail_run, self.fail_start, self.fail_down])
+        return sum(a.nbytes for a in arrays)
+
+    def _row(self, host: str) -> int:
+        row = self.host_index.get(host)
+        if row is not None:
+            return row
+        row = len(self._hosts)
+        if row >= len(self.last_ts):
+            self._resize(len(self.last_ts) * 2)
+        self.host_index[host] = row
+        self._hosts.append(host)
+        return row
+
+    def _resize(self, rows: int):
+        def grown(array, fill):
+            new = np.full((rows,) + array.shape[1:], fill, dtype=array.dtype)
+            new[:len(array)] = array
+            return new
+
+        self.buckets = [grown(a, -1) for a in self.buckets]
+        self.counters = [grown(a, 0) for a in self.counters]
+        self.hist = [grown(a, 0) for a in self.hist]
+        self.extrema = [grown(a, [np.inf, -np.inf]) for a in self.extrema]
+        self.last_ts = grown(self.last_ts, np.nan)
+        self.fail_run = grown(self.fail_run, 0)
+        self.fail_start = grown(self.fail_start, 0)
+        self.fail_down = grown(self.fail_down, 0)
+
+    def flush(self):
+        """Aplică eșantioanele din lot (apelat automat la batch_size și înainte de fiecare raport)"""
+        # Loturile se aplică în ordinea sosirii (starea penelor depinde de ordinea eșantioanelor)
+        with self._lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, []
+            if pending:
+                self._apply(pending)
+
+    def _apply(self, pending: List[tuple]):
+        rows = np.fromiter((self._row(host) for host, _ts, _rtt in pending), dtype=np.int64, count=len(pending))
+        ts = np.fromiter((t for _host, t, _rtt in pending), dtype=np.float64, count=len(pending))
+        rtt = np.fromiter((np.nan if r is None else r for _host, _ts, r in pending),
+                          dtype=np.float64, count=len(pending))
+        order = np.lexsort((ts, rows))
+        rows, ts, rtt = rows[order], ts[order], rtt[order]
+        lost = np.isnan(rtt)
+
+        # Timpul observat: distanța până la eșantionul anterior al aceluiași host (plafonată la max_gap)
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = rows[1:] != rows[:-1]
+        previous = np.empty_like(ts)
+        previous[1:] = ts[:-1]
+        previous[first] = self.last_ts[rows[first]]
+        gap = np.nan_to_num(np.clip(ts - previous, 0, self.max_gap), nan=0.0)
+        last = np.ones(len(rows), dtype=bool)
+        last[:-1] = rows[1:] != rows[:-1]
+        self.last_ts[rows[last]] = np.fmax(self.last_ts[rows[last]], ts[last])
+
+        down = np.zeros(len(rows))
+        outages = np.zeros(len(rows))
+        repair = np.zeros(len(rows))
+        # Penele se urmăresc secvențial, dar doar pentru host-urile cu pierderi sau deja în eșec
+        involved = np.unique(np.concatenate([rows[lost], rows[first][self.fail_run[rows[first]] > 0]]))
+        if len(involved):
+            for i in np.flatnonzero(np.isin(rows, involved)):
+                row = rows[i]
+                run = self.fail_run[row]
+                if lost[i]:
+                    if run == 0:
+                        self.fail_start[row] = ts[i]
+                        self.fail_down[row] = 0
+                    else:
+                        self.fail_down[row] += gap[i]
+                    run += 1
+                    if run == self.outage_after:
+                        # Host-ul este considerat căzut de la primul eșec al seriei
+                        down[i] = self.fail_down[row]
+                    elif run > self.outage_after:
+                        down[i] = gap[i]
+                else:
+                    if run >= self.outage_after:
+                        down[i] = gap[i]
+                        outages[i] = 1
+                        repair[i] = ts[i] - self.fail_start[row]
+                    run = 0
+                self.fail_run[row] = run
+
+        values = np.zeros((len(rows), len(FIELDS)))
+        values[:, SAMPLES] = 1
+        values[:, LOST] = lost
+        values[:, OBSERVED] = gap
+        values[:, DOWN] = down
+        values[:, OUTAGES] = outages
+        values[:, REPAIR] = repair
+        values[:, RTT_SUM] = np.where(lost, 0, rtt)
+        bins = np.searchsorted(HIST_EDGES, np.where(lost, 0, rtt), side='right')
+
+        for tier, (size, slots) in enumerate(TIERS):
+            bucket = np.floor(ts / size).astype(np.int64)
+            slot = bucket % slots
+            stored = self.buckets[tier]
+            before = stored[rows, slot]
+            # Un slot refolosit pentru un bucket mai nou se golește; eșantioanele mai vechi decât slotul se ignoră
+            np.maximum.at(stored, (rows, slot), bucket)
+            after = stored[rows, slot]
+            reset = after != before
+            if reset.any():
+                self.counters[tier][rows[reset], slot[reset]] = 0
+                self.hist[tier][rows[reset], slot[reset]] = 0
+                self.extrema[tier][rows[reset], slot[reset]] = [np.inf, -np.inf]
+            valid = bucket == after
+            np.add.at(self.counters[tier], (rows[valid], slot[valid]), values[valid])
+            ok = valid & ~lost
+            np.add.at(self.hist[tier], (rows[ok], slot[ok], bins[ok]), 1)
+            np.minimum.at(self.extrema[tier][:, :, 0], (rows[ok], slot[ok]), rtt[ok])
+            np.maximum.at(self.extrema[tier][:, :, 1], (rows[ok], slot[ok]), rtt[ok])
+        self._cache.clear()
+
+    def _tier(self, seconds: float) -> int:
+        for tier, (size, slots) in enumerate(TIERS):
+            if seconds <= size * (slots - 2):
+                return tier
+        longest = TIERS[-1][0] * (TIERS[-1][1] - 2)
+        raise ValueError(f"Fereastra de {seconds:.0f}s depășește istoricul agregat ({longest}s)")
+
+    def report(self, window: Union[str, float] = '1d', now: Optional[float] = None,
+               hosts: Optional[List[str]] = None) -> Dict:
+        """Uptime, pierderi, RTT mediu și p95, număr de pene și MTTR per host și pentru toată flota"""
+        seconds = window_seconds(window)
+        key = (window, None if hosts is None else tuple(hosts))
+        if now is None:
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.cache_age and not self._pending:
+                return cached[1]
+        self.flush()
+        current = time.time() if now is None else now
+        tier = self._tier(seconds)
+        size = TIERS[tier][0]
+        with self._lock:
+            names = list(self._hosts) if hosts is None else [h for h in hosts if h in self.host_index]
+            # Fără filtru, rândurile sunt luate ca vedere (fără copierea bucket-urilor)
+            rows = slice(0, len(names)) if hosts is None else \
+                np.array([self.host_index[h] for h in names], dtype=np.int64)
+            buckets = self.buckets[tier][rows]
+            # Ponderea fiecărui bucket: 1 în fereastră, proporțională pentru cel parțial, 0 în afara ei
+            start = current - seconds
+            weight = np.clip(((buckets + 1) * size - start) / size, 0, 1)
+            weight[(buckets < 0) | (buckets > math.floor(current / size))] = 0
+            totals = np.einsum('rs,rsf->rf', weight, self.counters[tier][rows])
+            hist = np.einsum('rs,rsb->rb', weight.astype(np.float32), self.hist[tier][rows])
+            extrema = self.extrema[tier][rows]
+            included = weight > 0
+            low = np.where(included, extrema[:, :, 0], np.inf).min(axis=1, initial=np.inf)
+            high = np.where(included, extrema[:, :, 1], -np.inf).max(axis=1, initial=-np.inf)
+            in_outage = self.fail_run[rows] >= self.outage_after
+            down_since = self.fail_start[rows]
+
+        result = {
+            'window': window,
+            'seconds': seconds,
+            'generated_at': current,
+            'fleet': self._summarize(totals.sum(axis=0, keepdims=True), hist.sum(axis=0, keepdims=True),
+                                     low.min(initial=np.inf, keepdims=True),
+                                     high.max(initial=-np.inf, keepdims=True))[0],
+            'hosts': {},
+        }
+        result['fleet']['hosts'] = len(names)
+        result['fleet']['hosts_down'] = int(in_outage.sum())
+        for i, stats in enumerate(self._summarize(totals, hist, low, high)):
+            stats['down_since'] = round(float(down_since[i]), 3) if in_outage[i] else None
+            result['hosts'][names[i]] = stats
+        if now is None:
+            self._cache[key] = (time.monotonic(), result)
+        return result
+
+    @staticmethod
+    def _summarize(totals: np.ndarray, hist: np.ndarray, low: np.ndarray, high: np.ndarray) -> List[Dict]:
+        samples = totals[:, SAMPLES]
+        answered = samples - totals[:, LOST]
+        observed = totals[:, OBSERVED]
+        outages = totals[:, OUTAGES]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            uptime = np.where(observed > 0, (1 - totals[:, DOWN] / observed) * 100, np.nan)
+            # Un singur eșantion nu are durată observată: uptime-ul vine din răspunsul lui
+            uptime = np.where((observed <= 0) & (samples > 0), answered / samples * 100, uptime)
+            loss_rate = np.where(samples > 0, totals[:, LOST] / samples, np.nan)
+            avg = np.where(answered > 0, totals[:, RTT_SUM] / answered, np.nan)
+            mttr = np.where(outages > 0, totals[:, REPAIR] / outages, np.nan)
+        with np.errstate(invalid='ignore'):
+            p95 = np.clip(histogram_quantile(hist, 0.95), low, high)
+
+        # Conversia se face pe coloane întregi: un raport are mii de rânduri
+        def column(array, digits=3):
+            return [None if v != v else v for v in np.round(np.clip(array, 0, None), digits).tolist()]
+
+        columns = {
+            'samples': np.rint(samples).astype(np.int64).tolist(),
+            'uptime': column(uptime),
+            'loss_rate': column(loss_rate, 5),
+            'avg': column(avg),
+            'p95': column(p95),
+            'outages': np.round(outages, 2).tolist(),
+            'mttr': column(mttr, 1),
+        }
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    def reports(self, windows: Iterable[Union[str, float]] = tuple(SLA_WINDOWS),
+                now: Optional[float] = None) -> Dict:
+        return {str(window): self.report(window, now) for window in windows}
+
+    def export(self, path: str, windows: Iterable[Union[str, float]] = tuple(SLA_WINDOWS),
+               fmt: Optional[str] = None, now: Optional[float] = None) -> int:
+        """Exportă rapoartele în CSV sau Parquet (un rând per host și fereastră); returnează numărul de rânduri"""
+        rows = [row for window in windows for row in report_rows(self.report(window, now))]
+        write_rows(path, rows, fmt)
+        return len(rows)
+
+    # --- Persistență -----------------------------------------------------
+
+    def save(self, path: str):
+        """Salvează bucket-urile (scriere atomică), ca agregările să supraviețuiască unui restart"""
+        self.flush()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            count = len(self._hosts)
+            arrays = {'hosts': np.array(self._hosts, dtype=str), 'tiers': np.array(TIERS),
+                      'edges': HIST_EDGES, 'last_ts': self.last_ts[:count],
+                      'fail_run': self.fail_run[:count], 'fail_start': self.fail_start[:count],
+                      'fail_down': self.fail_down[:count]}
+            for tier in range(len(TIERS)):
+                arrays[f'buckets{tier}'] = self.buckets[tier][:count]
+                arrays[f'counters{tier}'] = self.counters[tier][:count]
+                arrays[f'hist{tier}'] = self.hist[tier][:count]
+                arrays[f'extrema{tier}'] = self.extrema[tier][:count]
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, path)
+
+    def load(self, path: str) -> bool:
+        """Încarcă starea salvată; False dacă fișierul lipsește sau are alt format de bucket-uri"""
+        try:
+            data = np.load(path)
+        except (OSError, ValueError) as e:
+            if os.path.exists(path):
+                print(f"SLA state load error: {e}")
+            return False
+        with data:
+            if (data['tiers'].tolist() != [list(t) for t in TIERS]
+                    or not np.array_equal(data['edges'], HIST_EDGES)):
+                print("SLA state ignored: different bucket layout")
+                return False
+            hosts = [str(h) for h in data['hosts']]
+            with self._lock:
+                self.host_index, self._hosts = {}, []
+                self._allocate(max(len(hosts), 1))
+                for host in hosts:
+                    self._row(host)
+                count = len(hosts)
+                self.last_ts[:count] = data['last_ts']
+                self.fail_run[:count] = data['fail_run']
+                self.fail_start[:count] = data['fail_start']
+                self.fail_down[:count] = data['fail_down']
+                for tier in range(len(TIERS)):
+                    self.buckets[tier][:count] = data[f'buckets{tier}']
+                    self.counters[tier][:count] = data[f'counters{tier}']
+                    self.hist[tier][:count] = data[f'hist{tier}']
+                    self.extrema[tier][:count] = data[f'extrema{tier}']
+                self._cache.clear()
+        return True
+
+    def start_autosave(self, path: str, interval: float = 300.0):
+        """Salvează periodic în fundal (o singură dată per instanță)"""
+        if self._autosave is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.save(path)
+                except Exception as e:
+                    print(f"SLA autosave error: {e}")
+
+        self._autosave = threading.Thread(target=loop, daemon=True)
+        self._autosave.start()
+
+    def stop_autosave(self):
+        self._stop.set()
+
+
+# Raport din starea salvată: python -m utils.sla data/sla.npz --export sla.parquet
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Raport SLA din starea salvată de colector")
+    parser.add_argument('state', nargs='?', default='data/sla.npz', help="Fișierul de stare (implicit data/sla.npz)")
+    parser.add_argument('--window', action='append', help=f"Ferestrele raportate ({', '.join(SLA_WINDOWS)})")
+    parser.add_argument('--export', help="Scrie rapoartele într-un fișier .csv sau .parquet")
+    args = parser.parse_args()
+
+    aggregator = SlaAggregator()
+    if not aggregator.load(args.state):
+        raise SystemExit(f"Nu există stare SLA în {args.state}")
+    windows = args.window or list(SLA_WINDOWS)
+    for name in windows:
+        fleet = aggregator.report(name)['fleet']
+        print(f"{name:>4}: {fleet['hosts']} host-uri, uptime {fleet['uptime']}%, pierderi {fleet['loss_rate']}, "
+              f"p95 {fleet['p95']} ms, {fleet['outages']:g} pene, MTTR {fleet['mttr']} s")
+    if args.export:
+        print(f"{aggregator.export(args.export, windows)} rânduri scrise în {args.export}")
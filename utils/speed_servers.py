@@ -0,0 +1,149 @@
+import json
+import os
+import time
+import urllib.request
+from typing import Callable, Dict, List, Optional
+
+# Valoarea folosită de speedtest-cli pentru un server care nu răspunde (ms)
+UNREACHABLE_LATENCY = 3600 * 1000
+
+
+def http_latency(server: Dict, samples: int = 3, timeout: float = 5.0) -> float:
+    """Latența unui server speedtest prin `latency.txt`, măsurată la fel ca speedtest-cli (ms)"""
+    base = os.path.dirname(server['url'])
+    total = 0.0
+    for i in range(samples):
+        url = f"{base}/latency.txt?x={int(time.time() * 1000)}.{i}"
+        try:
+            start = time.perf_counter()
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                body = response.read(9)
+                elapsed = time.perf_counter() - start
+            if response.status != 200 or body != b'test=test':
+                return UNREACHABLE_LATENCY
+        except OSError:
+            return UNREACHABLE_LATENCY
+        total += elapsed
+    # speedtest-cli raportează jumătate din RTT-ul mediu
+    return round(total / (samples * 2) * 1000, 3)
+
+
+def json_servers_fetcher(url: str, limit: int = 10, timeout: float = 10.0) -> Callable[[], List[Dict]]:
+    """Fetcher pentru o listă JSON de servere (formatul /api/js/servers sau un stub local)"""
+    def fetch() -> List[Dict]:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            servers = json.loads(response.read().decode('utf-8'))
+        return servers[:limit]
+    return fetch
+
+
+def speedtest_servers_fetcher(tester, limit: int = 10) -> Callable[[], List[Dict]]:
+    """Fetcher care folosește configurația și lista de servere din speedtest-cli"""
+    def fetch() -> List[Dict]:
+        tester.get_servers()
+        tester.closest = []
+        return tester.get_closest_servers(limit)
+    return fetch
+
+
+class ServerIndex:
+    """Index persistent de servere speedtest: candidați, latențe măsurate și ultimul server bun"""
+
+    def __init__(self, path: str = 'data/speed_servers.json',
+                 fetch_servers: Optional[Callable[[], List[Dict]]] = None,
+                 measure_latency: Callable[[Dict], float] = http_latency,
+                 ttl: float = 86400, rank_ttl: float = 3600, degrade_factor: float = 1.5):
+        self.path = path
+        self.fetch_servers = fetch_servers
+        self.measure_latency = measure_latency
+        self.ttl = ttl
+        self.rank_ttl = rank_ttl
+        self.degrade_factor = degrade_factor
+
+        self.candidates: List[Dict] = []
+        self.latencies: Dict[str, Dict] = {}
+        self.best_id: Optional[str] = None
+        self.fetched_at = 0.0
+        self.ranked_at = 0.0
+        self.load()
+
+    def load(self):
+        """Încarcă indexul de pe disc (dacă există)"""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.candidates = data.get('candidates', [])
+        self.latencies = data.get('latencies', {})
+        self.best_id = data.get('best_id')
+        self.fetched_at = data.get('fetched_at', 0.0)
+        self.ranked_at = data.get('ranked_at', 0.0)
+
+    def save(self):
+        """Scrie indexul atomic (fișier temporar + rename)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'candidates': self.candidates,
+                'latencies': self.latencies,
+                'best_id': self.best_id,
+                'fetched_at': self.fetched_at,
+                'ranked_at': self.ranked_at,
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def is_stale(self) -> bool:
+        """Lista de candidați lipsește sau a depășit TTL-ul"""
+        return not self.candidates or time.time() - self.fetched_at > self.ttl
+
+    def refresh(self):
+        """Reîncarcă lista de candidați și îi reordonează după latență"""
+        if self.fetch_servers is None:
+            raise RuntimeError("Nu există un fetcher pentru lista de servere")
+        self.candidates = [dict(server, id=str(server.get('id', server['url'])))
+                           for server in self.fetch_servers()]
+        self.fetched_at = time.time()
+        self.rank()
+
+    def rank(self) -> Optional[Dict]:
+        """Măsoară latența tuturor candidaților și alege cel mai rapid server"""
+        now = time.time()
+        for server in self.candidates:
+            self.latencies[server['id']] = {'latency': self.measure_latency(server), 'measured_at': now}
+        self.ranked_at = now
+        reachable = [s for s in self.candidates
+                     if self.latencies[s['id']]['latency'] < UNREACHABLE_LATENCY]
+        if not reachable:
+            self.best_id = None
+            self.save()
+            return None
+        best = min(reachable, key=lambda s: self.latencies[s['id']]['latency'])
+        self.best_id = best['id']
+        self.save()
+        return self.best_server(fast=True)
+
+    def best_server(self, fast: bool = True) -> Optional[Dict]:
+        """Serverul ales; în modul rapid se reutilizează cel din cache fără re-măsurare"""
+        if self.is_stale():
+            self.refresh()
+        elif not fast or self.best_id is None or time.time() - self.ranked_at > self.rank_ttl:
+            self.rank()
+        for server in self.candidates:
+            if server['id'] == self.best_id:
+                return dict(server, latency=self.latencies.get(server['id'], {}).get('latency'))
+        return None
+
+    def observe(self, server_id: str, latency: float) -> bool:
+        """Înregistrează o latență măsurată în timpul testului; re-ordonează dacă s-a degradat"""
+        baseline = self.latencies.get(server_id, {}).get('latency')
+        if baseline is not None and latency > baseline * self.degrade_factor:
+            self.rank()
+            return True
+        if baseline is None or server_id == self.best_id:
+            self.latencies[server_id] = {'latency': latency, 'measured_at': time.time()}
+            self.save()
+        return False
@@ -1,62 +1,207 @@
-import streamlit as st
 import time
 from collections import deque
+import json
+import os
+import subprocess
+import sys
 import threading
 import random
+from typing import Dict, Optional, Tuple
+
+from utils.metrics import SPEEDTEST_ERRORS, SPEEDTEST_PHASE_SECONDS
+from utils.speed_servers import ServerIndex, json_servers_fetcher, speedtest_servers_fetcher
+from utils.startup import Capabilities, default_capabilities, lazy_import
+from utils.throughput import ThroughputTester
+
+# Worker-ul de test (`python -m utils.speed_tester --worker`) nu are nevoie de Streamlit
+st = lazy_import('streamlit')
+
+
+def make_server_index(tester, path: str, servers_url: Optional[str] = None) -> ServerIndex:
+    """Indexul de servere, alimentat de speedtest-cli sau de un endpoint JSON (ex. stub local)"""
+    fetcher = json_servers_fetcher(servers_url) if servers_url else speedtest_servers_fetcher(tester)
+    return ServerIndex(path, fetch_servers=fetcher)
+
+
+def select_server(tester, index: ServerIndex, fast: bool = True):
+    """Alege serverul din index și îl setează pe tester (o singură măsurătoare de ping)"""
+    server = index.best_server(fast=fast)
+    if server is None:
+        tester.get_best_server()
+    else:
+        tester.get_best_server([server])
+
+
+def observe_ping(tester, index: ServerIndex):
+    """Raportează ping-ul testului către index; acesta re-ordonează serverele dacă s-a degradat"""
+    server_id = tester.results.server.get('id')
+    if server_id is not None:
+        index.observe(str(server_id), tester.results.ping)
+
+
+def _speed_test_worker(index_path: Optional[str] = None, fast: bool = True,
+                       servers_url: Optional[str] = None) -> Dict:
+    """Rulează un test speedtest complet (în procesul worker) și returnează rezultatul"""
+    # Durata fazelor se întoarce în rezultat; metricile sunt în procesul părinte
+    phases = {}
+    try:
+        import speedtest
+        started = time.perf_counter()
+        tester = speedtest.Speedtest()
+        phases['config'] = time.perf_counter() - started
+        started = time.perf_counter()
+        if index_path:
+            index = make_server_index(tester, index_path, servers_url)
+            select_server(tester, index, fast)
+            observe_ping(tester, index)
+        else:
+            tester.get_best_server()
+        phases['server_selection'] = time.perf_counter() - started
+        started = time.perf_counter()
+        download_speed = tester.download() / 1_000_000  # Convert to Mbps
+        phases['download'] = time.perf_counter() - started
+        started = time.perf_counter()
+        upload_speed = tester.upload() / 1_000_000  # Convert to Mbps
+        phases['upload'] = time.perf_counter() - started
+        return {
+            'timestamp': time.time(),
+            'download': round(download_speed, 2),
+            'upload': round(upload_speed, 2),
+            'ping': round(tester.results.ping, 2),
+            'server': tester.results.server.get('name', 'N/A'),
+            'real_test': True,
+            'phases': phases
+        }
+    except Exception as e:
+        return {'error': str(e), 'phases': phases}
+
+
+def _throughput_worker(url: str, streams: int) -> Dict:
+    """Rulează testul multi-stream (în procesul worker) și returnează rezultatul"""
+    try:
+        return ThroughputTester(url, streams=streams).run()
+    except Exception as e:
+        return {'error': str(e)}
+
+
+def read_interface_bytes() -> Optional[Tuple[int, int]]:
+    """Octeții (rx, tx) însumați pe interfețele non-loopback (Linux, /proc/net/dev)"""
+    try:
+        with open('/proc/net/dev') as f:
+            lines = f.readlines()[2:]
+    except OSError:
+        return None
+    rx = tx = 0
+    for line in lines:
+        name, _, data = line.partition(':')
+        if name.strip() == 'lo':
+            continue
+        fields = data.split()
+        rx += int(fields[0])
+        tx += int(fields[8])
+    return rx, tx
+
 
 class InternetSpeedTester:
-    def __init__(self, max_history=10):
+    def __init__(self, max_history=10, store=None, test_timeout=180, max_backoff=3600,
+                 saturation_mbps=None, saturation_ratio=0.25, server_index_path='data/speed_servers.json',
+                 servers_url=None, throughput_url=None, throughput_streams=4, capabilities=None):
         self.speed_data = deque(maxlen=max_history)
         self.is_testing = False
         self.test_thread = None
         self.st = None
+        self.store = store
+
+        # Planificator pentru teste continue (fiecare test rulează într-un proces separat)
+        self.test_timeout = test_timeout
+        self.max_backoff = max_backoff
+        self.saturation_mbps = saturation_mbps
+        self.saturation_ratio = saturation_ratio
+        self.is_continuous = False
+        self.last_error = None
+        self.next_test_at = None
+        self._scheduler_thread = None
+        self._stop_event = threading.Event()
+        self._test_lock = threading.Lock()
+
+        # Indexul persistent de servere (partajat cu procesele worker prin fișier)
+        self.server_index_path = server_index_path
+        self.servers_url = servers_url
+        self.server_index = None
+
+        # Motor nativ multi-stream (ex. serverul local din utils.throughput), în locul speedtest-cli
+        self.throughput_url = throughput_url
+        self.throughput_streams = throughput_streams
+
+        # Reîncarcă ultimele teste salvate pe disc
+        if store is not None:
+            self.speed_data.extend(store.load_speed(limit=max_history))
         
-        # Încearcă să inițializeze speedtest, dar gestionează erorile
-        try:
+        # Speedtest() descarcă configurația (blochează fără internet): clientul se creează la primul test
+        capabilities: Capabilities = capabilities or default_capabilities()
+        self.speedtest_available = bool(capabilities.get('speedtest'))
+        if not self.speedtest_available:
+            st.warning("⚠ Speedtest nu este disponibil: lipsește modulul speedtest-cli")
+
+    def _speedtest(self):
+        """Clientul speedtest-cli, creat la prima utilizare"""
+        if self.st is None:
             import speedtest
-            self.st = speedtest.Speedtest()
-            self.speedtest_available = True
-        except Exception as e:
-            st.warning(f"⚠ Speedtest nu este disponibil: {e}")
-            self.speedtest_available = False
+            with SPEEDTEST_PHASE_SECONDS.labels('config').time():
+                self.st = speedtest.Speedtest()
+            if self.server_index_path:
+                self.server_index = make_server_index(self.st, self.server_index_path, self.servers_url)
+        return self.st
     
-    def run_speed_test(self):
+    def run_speed_test(self, fast=False):
         """Execută test de viteză internet cu fallback la date simulate"""
+        if self.throughput_url:
+            return self._run_throughput_test()
+
         if not self.speedtest_available:
             return self._run_simulated_test()
         
         try:
             self.is_testing = True
+            tester = self._speedtest()
             
             # Obține serverele
             st.info("🔍 Se caută servere optimale...")
-            self.st.get_best_server()
+            with SPEEDTEST_PHASE_SECONDS.labels('server_selection').time():
+                if self.server_index is not None:
+                    select_server(tester, self.server_index, fast)
+                    observe_ping(tester, self.server_index)
+                else:
+                    tester.get_best_server()
             
             # Test download
             st.info("📥 Se măsoară viteza de download...")
-            download_speed = self.st.download() / 1_000_000  # Convert to Mbps
+            with SPEEDTEST_PHASE_SECONDS.labels('download').time():
+                download_speed = tester.download() / 1_000_000  # Convert to Mbps
             
             # Test upload
             st.info("📤 Se măsoară viteza de upload...")
-            upload_speed = self.st.upload() / 1_000_000  # Convert to Mbps
+            with SPEEDTEST_PHASE_SECONDS.labels('upload').time():
+                upload_speed = tester.upload() / 1_000_000  # Convert to Mbps
             
             # Obține ping
-            ping = self.st.results.ping
+            ping = tester.results.ping
             
             result = {
                 'timestamp': time.time(),
                 'download': round(download_speed, 2),
                 'upload': round(upload_speed, 2),
                 'ping': round(ping, 2),
-                'server': self.st.results.server.get('name', 'N/A'),
+                'server': tester.results.server.get('name', 'N/A'),
                 'real_test': True
             }
             
-            self.speed_data.append(result)
+            self._add_result(result)
             self.is_testing = False
             return result
             
         except Exception as e:
+            SPEEDTEST_ERRORS.inc()
             st.error(f"❌ Eroare test viteză: {e}")
             st.info("🔄 Se folosesc date simulate...")
             self.is_testing = False
@@ -86,17 +231,8 @@ class InternetSpeedTester:
         progress_bar.progress(100)
         status_text.text("✅ Test complet!")
         
-        # Generează date simulate realiste
-        result = {
-            'timestamp': time.time(),
-            'download': round(random.uniform(50, 200), 2),  # Mbps
-            'upload': round(random.uniform(10, 50), 2),     # Mbps
-            'ping': round(random.uniform(10, 50), 2),       # ms
-            'server': 'Server Simulat',
-            'real_test': False
-        }
-        
-        self.speed_data.append(result)
+        result = self._simulated_result()
+        self._add_result(result)
         self.is_testing = False
         
         time.sleep(1)
@@ -105,14 +241,175 @@ class InternetSpeedTester:
         
         return result
     
+    def _run_throughput_test(self):
+        """Test cu motorul nativ de throughput, afișat în UI (stream-urile rulează în procesul worker)"""
+        self.is_testing = True
+        st.info(f"📶 Test throughput cu {self.throughput_streams} stream-uri către {self.throughput_url}...")
+        result = self._observe_phases(self._run_worker_process())
+        self.is_testing = False
+        if 'error' in result:
+            st.error(f"❌ Eroare test viteză: {result['error']}")
+            return None
+        self._add_result(result)
+        return result
+
+    @staticmethod
+    def _observe_phases(result: Dict) -> Dict:
+        """Trece duratele fazelor în metrici și le scoate din rezultatul salvat"""
+        for phase, seconds in result.pop('phases', {}).items():
+            SPEEDTEST_PHASE_SECONDS.labels(phase).observe(seconds)
+        if 'error' in result:
+            SPEEDTEST_ERRORS.inc()
+        return result
+
+    def _add_result(self, result):
+        """Adaugă un rezultat în istoric și îl persistă, dacă există stocare"""
+        self.speed_data.append(result)
+        if self.store is not None:
+            self.store.record_speed(result)
+
+    def _simulated_result(self) -> Dict:
+        """Generează date simulate realiste"""
+        return {
+            'timestamp': time.time(),
+            'download': round(random.uniform(50, 200), 2),  # Mbps
+            'upload': round(random.uniform(10, 50), 2),     # Mbps
+            'ping': round(random.uniform(10, 50), 2),       # ms
+            'server': 'Server Simulat',
+            'real_test': False
+        }
+
+    def run_test_in_process(self, fast: bool = True) -> Optional[Dict]:
+        """Rulează un test într-un proces worker; cel mult un test în desfășurare"""
+        if not self._test_lock.acquire(blocking=False):
+            return None
+        try:
+            self.is_testing = True
+            if not self.throughput_url and not self.speedtest_available:
+                result = self._simulated_result()
+            else:
+                # Testele care saturează legătura (speedtest-cli sau throughput) rulează în afara procesului
+                result = self._run_worker_process(fast)
+            result = self._observe_phases(result)
+
+            if 'error' in result:
+                self.last_error = result['error']
+                return None
+            self.last_error = None
+            self._add_result(result)
+            return result
+        finally:
+            self.is_testing = False
+            self._test_lock.release()
+
+    def _run_worker_process(self, fast: bool = True) -> Dict:
+        """Pornește `python -m utils.speed_tester --worker` și citește rezultatul JSON"""
+        # Un interpretor nou (nu fork/spawn) - nu moștenește thread-urile și scriptul Streamlit
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        command = [sys.executable, '-m', 'utils.speed_tester', '--worker']
+        if self.throughput_url:
+            command += ['--throughput-url', self.throughput_url, '--streams', str(self.throughput_streams)]
+        elif self.server_index_path:
+            command += ['--index', os.path.abspath(self.server_index_path)]
+            if self.servers_url:
+                command += ['--servers-url', self.servers_url]
+            if fast:
+                command.append('--fast')
+        process = subprocess.Popen(
+            command,
+            cwd=root,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True
+        )
+        try:
+            stdout, _ = process.communicate(timeout=self.test_timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            return {'error': f"Testul a depășit {self.test_timeout}s"}
+        lines = stdout.strip().splitlines()
+        try:
+            return json.loads(lines[-1])
+        except (IndexError, ValueError):
+            return {'error': f"Procesul de test s-a încheiat cu codul {process.returncode}"}
+
     def run_test_in_thread(self):
-        """Rulează testul într-un thread separat"""
+        """Rulează testul într-un thread separat (măsurătoarea propriu-zisă într-un proces worker)"""
         if self.is_testing:
             return
         
-        self.test_thread = threading.Thread(target=self.run_speed_test)
+        self.test_thread = threading.Thread(target=self.run_test_in_process)
         self.test_thread.daemon = True
         self.test_thread.start()
+
+    def start_continuous_test(self, interval: float = 60, jitter: float = 0.2):
+        """Pornește testarea periodică în fundal, cu intervale aleatorizate"""
+        if self.is_continuous:
+            return
+        self.is_continuous = True
+        self._stop_event.clear()
+        self._scheduler_thread = threading.Thread(
+            target=self._continuous_loop, args=(interval, jitter), daemon=True)
+        self._scheduler_thread.start()
+
+    def stop_continuous_test(self):
+        """Oprește testarea periodică (testul în curs se termină singur)"""
+        self.is_continuous = False
+        self._stop_event.set()
+        if self._scheduler_thread:
+            self._scheduler_thread.join(timeout=1)
+            self._scheduler_thread = None
+        self.next_test_at = None
+
+    def measure_background_mbps(self, duration: float = 1.0) -> Optional[Tuple[float, float]]:
+        """Traficul curent (rx, tx) pe interfețe în Mbps, folosit pentru a evita testele pe o legătură ocupată"""
+        before = read_interface_bytes()
+        if before is None:
+            return None
+        if self._stop_event.wait(duration):
+            return None
+        after = read_interface_bytes()
+        return tuple((a - b) * 8 / duration / 1_000_000 for a, b in zip(after, before))
+
+    def _saturation_thresholds(self) -> Optional[Tuple[float, float]]:
+        """Pragurile (rx, tx) peste care legătura e considerată ocupată
+
+        Euristică: traficul primit se compară cu ultimul download măsurat, iar cel trimis cu ultimul
+        upload, fiecare scalat cu `saturation_ratio` (implicit un sfert din capacitate). Fără o
+        măsurătoare reală capacitatea nu e cunoscută și testul nu se amână; `saturation_mbps`
+        fixează același prag absolut pentru ambele direcții.
+        """
+        if self.saturation_mbps is not None:
+            return self.saturation_mbps, self.saturation_mbps
+        real = [r for r in self.speed_data if r.get('real_test')]
+        if not real:
+            return None
+        return real[-1]['download'] * self.saturation_ratio, real[-1]['upload'] * self.saturation_ratio
+
+    def is_link_busy(self, background: Optional[Tuple[float, float]]) -> bool:
+        thresholds = self._saturation_thresholds()
+        if background is None or thresholds is None:
+            return False
+        return any(rate > limit for rate, limit in zip(background, thresholds))
+
+    def _continuous_loop(self, interval: float, jitter: float):
+        backoff = 0
+        delay = 0.0
+        while not self._stop_event.is_set():
+            self.next_test_at = time.time() + delay
+            if self._stop_event.wait(delay):
+                break
+
+            if self.is_link_busy(self.measure_background_mbps()):
+                # Legătura e ocupată de alt trafic: amână testul cu backoff exponențial
+                backoff += 1
+                delay = min(interval * (2 ** backoff), self.max_backoff)
+                continue
+
+            backoff = 0
+            self.run_test_in_process()
+            delay = interval * random.uniform(1 - jitter, 1 + jitter)
     
     def get_speed_data(self):
         """Returnează datele de viteză"""
@@ -131,3 +428,20 @@ class InternetSpeedTester:
     def is_available(self):
         """Verifică dacă speedtest este disponibil"""
         return self.speedtest_available
+
+# Proces worker pentru testele continue
+if __name__ == "__main__":
+    if '--worker' in sys.argv:
+        import argparse
+        parser = argparse.ArgumentParser()
+        parser.add_argument('--worker', action='store_true')
+        parser.add_argument('--index')
+        parser.add_argument('--servers-url')
+        parser.add_argument('--fast', action='store_true')
+        parser.add_argument('--throughput-url')
+        parser.add_argument('--streams', type=int, default=4)
+        args = parser.parse_args()
+        if args.throughput_url:
+            print(json.dumps(_throughput_worker(args.throughput_url, args.streams)))
+        else:
+            print(json.dumps(_speed_test_worker(args.index, args.fast, args.servers_url)))
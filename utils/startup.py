@@ -0,0 +1,290 @@
+import importlib
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+DEFAULT_CAPABILITIES_PATH = 'data/capabilities.json'
+
+
+class StartupProfile:
+    """Durata importurilor și a inițializărilor de la pornire, pentru raportul de startup"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps: List[Dict] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, kind: str, name: str) -> Iterator[None]:
+        """Măsoară un pas ('import' sau 'init')"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, name, time.perf_counter() - started, started)
+
+    def record(self, kind: str, name: str, seconds: float, started: Optional[float] = None):
+        with self._lock:
+            self.steps.append({
+                'kind': kind,
+                'name': name,
+                'seconds': seconds,
+                'at': (started or time.perf_counter()) - self.started,
+                'thread': threading.current_thread().name,
+            })
+
+    def report(self) -> List[Dict]:
+        """Pașii în ordinea duratei, cei mai scumpi primii"""
+        with self._lock:
+            return sorted(self.steps, key=lambda s: s['seconds'], reverse=True)
+
+    def format(self) -> str:
+        lines = [f"{'kind':<7} {'seconds':>8} {'at':>8}  name"]
+        for step in self.report():
+            lines.append(f"{step['kind']:<7} {step['seconds']:>8.3f} {step['at']:>8.3f}  {step['name']}")
+        return '\n'.join(lines)
+
+
+PROFILE = StartupProfile()
+
+
+class LazyModule:
+    """Modul importat la primul acces la un atribut (durata ajunge în profilul de startup)"""
+
+    def __init__(self, name: str, profile: StartupProfile = PROFILE):
+        self._name = name
+        self._profile = profile
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                already = self._name in sys.modules
+                started = time.perf_counter()
+                module = importlib.import_module(self._name)
+                if not already:
+                    self._profile.record('import', self._name, time.perf_counter() - started, started)
+                self._module = module
+        return self._module
+
+    def __getattr__(self, attr: str) -> Any:
+        module = self._module or self._load()
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Înlocuitor pentru `import name` la nivel de modul, pentru dependențe grele"""
+    return LazyModule(name)
+
+
+def _probe_nmap() -> bool:
+    return shutil.which('nmap') is not None
+
+
+def _probe_scapy_arp() -> bool:
+    from utils.arp_sweep import ScapyArpTransport
+    return ScapyArpTransport.is_supported()
+
+
+def _probe_icmp() -> bool:
+    from utils.icmp_engine import IcmpProbeEngine
+    return IcmpProbeEngine.is_supported()
+
+
+def _probe_speedtest() -> bool:
+    # Doar existența modulului; configurația speedtest.net se descarcă la primul test
+    return importlib.util.find_spec('speedtest') is not None
+
+
+# Ordinea contează: verificările ieftine se termină primele
+DEFAULT_PROBES: Dict[str, Callable[[], Any]] = {
+    'speedtest': _probe_speedtest,
+    'nmap': _probe_nmap,
+    'icmp': _probe_icmp,
+    'scapy_arp': _probe_scapy_arp,
+}
+
+
+class Capabilities:
+    """Verificări de capabilități (nmap, scapy, ICMP, speedtest) rulate în fundal și păstrate pe disc
+
+    La pornire se folosește rezultatul salvat, iar verificarea se reface în fundal
+    (stale-while-revalidate); fără rezultat salvat, primul apel așteaptă verificarea.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_CAPABILITIES_PATH,
+                 probes: Optional[Dict[str, Callable[[], Any]]] = None,
+                 profile: StartupProfile = PROFILE):
+        self.path = path
+        self.probes = dict(DEFAULT_PROBES if probes is None else probes)
+        self.profile = profile
+        self._values: Dict[str, Any] = {}
+        self._running: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _context(self) -> Dict:
+        # Rezultatele depind de interpretor și de privilegii (root vs utilizator)
+        return {'python': sys.executable, 'uid': os.geteuid() if hasattr(os, 'geteuid') else None}
+
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('context') == self._context():
+            self._values = {name: entry['value'] for name, entry in data.get('probes', {}).items()
+                            if name in self.probes}
+
+    def _save(self):
+        if not self.path:
+            return
+        with self._lock:
+            probes = {name: {'value': value} for name, value in self._values.items()}
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp = f"{self.path}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump({'context': self._context(), 'checked_at': time.time(), 'probes': probes}, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Capabilities cache error: {e}")
+
+    def refresh(self, names: Optional[List[str]] = None) -> threading.Thread:
+        """Reface verificările într-un thread de fundal"""
+        names = list(self.probes) if names is None else names
+        events = []
+        with self._lock:
+            for name in names:
+                if name not in self._running:
+                    self._running[name] = threading.Event()
+                    events.append(name)
+        thread = threading.Thread(target=self._run, args=(events,), name='capabilities', daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self, names: List[str]):
+        for name in names:
+            try:
+                with self.profile.step('probe', name):
+                    value = self.probes[name]()
+            except Exception as e:
+                print(f"Capability probe {name} failed: {e}")
+                value = False
+            with self._lock:
+                self._values[name] = value
+                event = self._running.pop(name)
+            # Salvat după fiecare verificare: procesul se poate opri înaintea celor lente
+            self._save()
+            event.set()
+
+    def get(self, name: str, timeout: Optional[float] = 30.0) -> Any:
+        """Valoarea salvată; dacă nu există, așteaptă verificarea (pornită la nevoie)"""
+        with self._lock:
+            if name in self._values:
+                return self._values[name]
+            event = self._running.get(name)
+        if event is None:
+            self.refresh([name])
+            with self._lock:
+                event = self._running.get(name)
+        if event is not None:
+            event.wait(timeout)
+        with self._lock:
+            return self._values.get(name, False)
+
+    def known(self, name: str) -> bool:
+        """True dacă valoarea este deja cunoscută (fără să blocheze)"""
+        with self._lock:
+            return name in self._values
+
+
+_default_capabilities = None
+_default_lock = threading.Lock()
+
+
+def default_capabilities() -> Capabilities:
+    """Instanța partajată, cu verificările pornite în fundal la primul apel"""
+    global _default_capabilities
+    with _default_lock:
+        if _default_capabilities is None:
+            _default_capabilities = Capabilities(
+                os.environ.get('NETWORK_MONITOR_CAPABILITIES', DEFAULT_CAPABILITIES_PATH))
+            _default_capabilities.refresh()
+        return _default_capabilities
+
+
+def profile_startup(modules: List[str], inits: Dict[str, Callable[[], Any]]) -> StartupProfile:
+    """Importă modulele și rulează inițializările pe rând, într-un profil nou"""
+    profile = StartupProfile()
+    for name in modules:
+        if name in sys.modules:
+            continue
+        with profile.step('import', name):
+            importlib.import_module(name)
+    for name, init in inits.items():
+        with profile.step('init', name):
+            init()
+    return profile
+
+
+if __name__ == "__main__":
+    # Raportul de startup: python -m utils.startup (într-un proces nou, importurile sunt reci)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Profilul de pornire al dashboard-ului")
+    parser.add_argument('--cold', action='store_true', help="Ignoră capabilitățile salvate pe disc")
+    parser.add_argument('--json', action='store_true', help="Raportul ca JSON")
+    args = parser.parse_args()
+
+    if args.cold:
+        os.environ['NETWORK_MONITOR_CAPABILITIES'] = ''
+
+    modules = ['numpy', 'plotly.graph_objects', 'streamlit', 'utils.metrics', 'utils.charts',
+               'utils.timeseries_store', 'utils.ping_monitor', 'utils.network_scanner',
+               'utils.speed_tester', 'utils.collector_service', 'utils.alerting', 'pandas',
+               'plotly.subplots']
+
+    def init_scanner():
+        from utils.network_scanner import NetworkScanner
+        return NetworkScanner()
+
+    def init_speed_tester():
+        from utils.speed_tester import InternetSpeedTester
+        return InternetSpeedTester(server_index_path=None)
+
+    def init_ping_monitor():
+        from utils.ping_monitor import PingMonitor
+        return PingMonitor(max_history=1800)
+
+    profile = profile_startup(modules, {
+        'NetworkScanner': init_scanner,
+        'InternetSpeedTester': init_speed_tester,
+        'PingMonitor': init_ping_monitor,
+    })
+    # Verificările de capabilități rulează în fundal; raportul le așteaptă pentru a le include
+    capabilities = default_capabilities()
+    for name in capabilities.probes:
+        capabilities.get(name)
+    steps = profile.report() + [s for s in PROFILE.report() if s['kind'] == 'probe']
+    if args.json:
+        print(json.dumps(steps, indent=2))
+    else:
+        profile.steps = steps
+        print(profile.format())
+        print(f"total (fără verificările din fundal): "
+              f"{sum(s['seconds'] for s in steps if s['kind'] != 'probe'):.3f}s")
@@ -0,0 +1,264 @@
+import http.client
+import http.server
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+CHUNK_SIZE = 64 * 1024
+# Lungimea declarată a unui stream; testul se oprește după durată, nu după volum
+STREAM_BYTES = 1 << 40
+
+
+class _ThroughputHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    _chunk = b'\0' * CHUNK_SIZE
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.endswith('/latency.txt'):
+            self._reply(b'test=test')
+            return
+        if url.path != '/download':
+            self.send_error(404)
+            return
+        size = int(parse_qs(url.query).get('bytes', [STREAM_BYTES])[0])
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(size))
+        self.end_headers()
+        remaining = size
+        try:
+            while remaining > 0:
+                chunk = self._chunk if remaining >= CHUNK_SIZE else self._chunk[:remaining]
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+        except OSError:
+            # Clientul închide conexiunea la finalul testului
+            self.close_connection = True
+
+    def do_POST(self):
+        if urlsplit(self.path).path != '/upload':
+            self.send_error(404)
+            return
+        remaining = int(self.headers.get('Content-Length', 0))
+        received = 0
+        while remaining > 0:
+            data = self.rfile.read1(min(remaining, CHUNK_SIZE))
+            if not data:
+                self.close_connection = True
+                return
+            received += len(data)
+            remaining -= len(data)
+        self._reply(str(received).encode())
+
+    def _reply(self, body: bytes):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class ThroughputServer:
+    """Server HTTP local sink/source: GET /download trimite date, POST /upload le consumă"""
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 8766):
+        self.address = (host, port)
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2] if self._server else self.address
+        if host == '0.0.0.0':
+            host = '127.0.0.1'
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Pornește serverul într-un thread de fundal"""
+        self._server = _ThreadingHTTPServer(self.address, _ThroughputHandler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def serve_forever(self):
+        """Rulează serverul în thread-ul curent"""
+        self._server = _ThreadingHTTPServer(self.address, _ThroughputHandler)
+        self._server.serve_forever()
+
+    def stop(self):
+        """Oprește serverul"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+
+class ThroughputTester:
+    """Măsoară goodput-ul pe N stream-uri HTTP paralele, cu warm-up ignorat și eșantioane pe interval"""
+
+    def __init__(self, url: str, streams: int = 4, duration: float = 10.0, warmup: float = 2.0,
+                 interval: float = 0.5, timeout: float = 5.0):
+        parts = urlsplit(url)
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.https = parts.scheme == 'https'
+        self.base_path = parts.path.rstrip('/')
+        self.streams = streams
+        self.duration = duration
+        self.warmup = warmup
+        self.interval = interval
+        self.timeout = timeout
+
+    def _connection(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def latency(self, samples: int = 3) -> Optional[float]:
+        """RTT-ul minim al unei cereri mici pe o conexiune deschisă (ms)"""
+        conn = self._connection()
+        best = None
+        try:
+            for _ in range(samples):
+                start = time.perf_counter()
+                conn.request('GET', f"{self.base_path}/latency.txt")
+                conn.getresponse().read()
+                elapsed = (time.perf_counter() - start) * 1000
+                best = elapsed if best is None else min(best, elapsed)
+        except (OSError, http.client.HTTPException):
+            return best
+        finally:
+            conn.close()
+        return best
+
+    def _download_stream(self, counters: List[int], index: int, stop: threading.Event):
+        conn = self._connection()
+        try:
+            conn.request('GET', f"{self.base_path}/download?bytes={STREAM_BYTES}")
+            response = conn.getresponse()
+            while not stop.is_set():
+                data = response.read1(CHUNK_SIZE)
+                if not data:
+                    break
+                counters[index] += len(data)
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            conn.close()
+
+    def _upload_stream(self, counters: List[int], index: int, stop: threading.Event):
+        conn = self._connection()
+        chunk = b'\0' * CHUNK_SIZE
+        try:
+            conn.putrequest('POST', f"{self.base_path}/upload")
+            conn.putheader('Content-Type', 'application/octet-stream')
+            conn.putheader('Content-Length', str(STREAM_BYTES))
+            conn.endheaders()
+            while not stop.is_set():
+                conn.send(chunk)
+                counters[index] += len(chunk)
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            conn.close()
+
+    def measure(self, direction: str = 'download') -> Dict:
+        """Rulează stream-urile paralele și returnează goodput-ul (Mbps) și eșantioanele pe interval"""
+        worker = self._download_stream if direction == 'download' else self._upload_stream
+        # Fiecare stream scrie doar în propriul contor; eșantionarea citește suma
+        counters = [0] * self.streams
+        stop = threading.Event()
+        threads = [threading.Thread(target=worker, args=(counters, i, stop), daemon=True)
+                   for i in range(self.streams)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        samples = []
+        measured_from = None
+        last_time, last_bytes = started, 0
+        deadline = started + self.duration
+        while True:
+            now = time.perf_counter()
+            if now >= deadline or not any(t.is_alive() for t in threads):
+                break
+            time.sleep(min(self.interval, deadline - now))
+            now = time.perf_counter()
+            total = sum(counters)
+            mbps = (total - last_bytes) * 8 / (now - last_time) / 1_000_000
+            samples.append({'t': round(now - started, 3), 'mbps': round(mbps, 2),
+                            'warmup': measured_from is None})
+            if measured_from is None and now - started >= self.warmup:
+                # Warm-up încheiat (slow start TCP): goodput-ul se numără de aici
+                measured_from = (now, total)
+            last_time, last_bytes = now, total
+
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=self.timeout)
+
+        if measured_from is None or last_time - measured_from[0] <= 0:
+            measured_from = (started, 0)
+        elapsed = last_time - measured_from[0]
+        goodput = (last_bytes - measured_from[1]) * 8 / elapsed / 1_000_000 if elapsed > 0 else 0.0
+        return {
+            'mbps': round(goodput, 2),
+            'bytes': last_bytes,
+            'streams': self.streams,
+            'samples': samples,
+        }
+
+    def run(self) -> Dict:
+        """Test complet (latență, download, upload) în formatul rezultatelor InternetSpeedTester"""
+        phases = {}
+        started = time.perf_counter()
+        ping = self.latency()
+        phases['latency'] = time.perf_counter() - started
+        if ping is None:
+            return {'error': f"Serverul de throughput {self.url} nu răspunde"}
+        started = time.perf_counter()
+        download = self.measure('download')
+        phases['download'] = time.perf_counter() - started
+        started = time.perf_counter()
+        upload = self.measure('upload')
+        phases['upload'] = time.perf_counter() - started
+        return {
+            'timestamp': time.time(),
+            'download': download['mbps'],
+            'upload': upload['mbps'],
+            'ping': round(ping, 2),
+            'server': f"{self.host}:{self.port}",
+            'real_test': True,
+            'streams': self.streams,
+            'download_samples': download['samples'],
+            'upload_samples': upload['samples'],
+            'phases': phases,
+        }
+
+
+# Server sink/source de sine stătător: python -m utils.throughput --port 8766
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Server local pentru testele de throughput")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8766)
+    args = parser.parse_args()
+    server = ThroughputServer(args.host, args.port)
+    print(f"Server throughput pornit pe {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,340 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from utils.metrics import STORE_BATCH_SECONDS, STORE_QUEUE
+
+# Nivelurile de agregare: nume tabel -> dimensiunea bucket-ului (secunde)
+ROLLUP_TIERS = {'ping_1m': 60, 'ping_1h': 3600, 'ping_1d': 86400}
+
+# Retenție implicită per nivel (secunde)
+DEFAULT_RETENTION = {
+    'ping_raw': 2 * 86400,
+    'ping_1m': 30 * 86400,
+    'ping_1h': 365 * 86400,
+    'ping_1d': 5 * 365 * 86400,
+    'speed_raw': 365 * 86400,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ping_raw (
+    host TEXT NOT NULL,
+    ts REAL NOT NULL,
+    rtt REAL,
+    loss INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ping_raw_host_ts ON ping_raw(host, ts);
+CREATE INDEX IF NOT EXISTS ping_raw_ts ON ping_raw(ts);
+CREATE TABLE IF NOT EXISTS speed_raw (
+    ts REAL NOT NULL,
+    download REAL,
+    upload REAL,
+    ping REAL,
+    server TEXT,
+    real_test INTEGER
+);
+CREATE INDEX IF NOT EXISTS speed_raw_ts ON speed_raw(ts);
+"""
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    host TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    lost INTEGER NOT NULL,
+    rtt_count INTEGER NOT NULL,
+    rtt_sum REAL NOT NULL,
+    rtt_min REAL,
+    rtt_max REAL,
+    PRIMARY KEY (host, bucket)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS {table}_bucket ON {table}(bucket);
+"""
+
+ROLLUP_UPSERT = """
+INSERT INTO {table} (host, bucket, samples, lost, rtt_count, rtt_sum, rtt_min, rtt_max)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(host, bucket) DO UPDATE SET
+    samples = samples + excluded.samples,
+    lost = lost + excluded.lost,
+    rtt_count = rtt_count + excluded.rtt_count,
+    rtt_sum = rtt_sum + excluded.rtt_sum,
+    rtt_min = min(coalesce(rtt_min, excluded.rtt_min), coalesce(excluded.rtt_min, rtt_min)),
+    rtt_max = max(coalesce(rtt_max, excluded.rtt_max), coalesce(excluded.rtt_max, rtt_max))
+"""
+
+class TimeSeriesStore:
+    """Stocare persistentă pe disc (SQLite WAL) cu agregări pe 1 minut, 1 oră și 1 zi"""
+
+    def __init__(self, path: str = 'data/network_monitor.db', flush_interval: float = 1.0,
+                 batch_size: int = 1000, retention: Optional[Dict[str, int]] = None,
+                 prune_interval: float = 600):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.retention = dict(DEFAULT_RETENTION, **(retention or {}))
+        self.prune_interval = prune_interval
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._queue = queue.Queue()
+        STORE_QUEUE.set_function(self._queue.qsize)
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._last_prune = 0.0
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        for table in ROLLUP_TIERS:
+            conn.executescript(ROLLUP_SCHEMA.format(table=table))
+        conn.commit()
+        conn.close()
+
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        # O conexiune de citire per thread; WAL permite citiri concurente cu writer-ul
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    # --- Scriere ---------------------------------------------------------
+
+    def record_ping(self, host: str, timestamp: float, response_time: Optional[float],
+                    status: str, packet_loss: bool):
+        """Pune în coadă un eșantion ping (semnătură compatibilă cu listener-ii PingMonitor)"""
+        self._queue.put(('ping', (host, timestamp, response_time, 1 if packet_loss else 0)))
+
+    def record_speed(self, result: Dict):
+        """Pune în coadă rezultatul unui test de viteză"""
+        self._queue.put(('speed', (result['timestamp'], result['download'], result['upload'],
+                                   result['ping'], result.get('server'),
+                                   1 if result.get('real_test') else 0)))
+
+    def flush(self, timeout: float = 5.0):
+        """Așteaptă până când toate scrierile din coadă au ajuns pe disc"""
+        done = threading.Event()
+        self._queue.put(('flush', done))
+        done.wait(timeout)
+
+    def close(self):
+        """Scrie datele rămase și oprește thread-ul de scriere"""
+        self._stop.set()
+        self._queue.put(('stop', None))
+        self._writer.join(timeout=5)
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                pings, speeds, waiters = [], [], []
+                stop = False
+                deadline = time.monotonic() + self.flush_interval
+                # Colectează un lot până la batch_size sau flush_interval
+                while len(pings) < self.batch_size:
+                    try:
+                        kind, item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if kind == 'ping':
+                        pings.append(item)
+                    elif kind == 'speed':
+                        speeds.append(item)
+                    elif kind == 'flush':
+                        waiters.append(item)
+                        break
+                    elif kind == 'stop':
+                        stop = True
+                        break
+
+                if pings or speeds:
+                    try:
+                        with STORE_BATCH_SECONDS.time():
+                            self._write_batch(conn, pings, speeds)
+                    except sqlite3.Error as e:
+                        print(f"TimeSeriesStore write error: {e}")
+                if time.monotonic() - self._last_prune >= self.prune_interval:
+                    self._last_prune = time.monotonic()
+                    try:
+                        self.prune(conn)
+                    except sqlite3.Error as e:
+                        print(f"TimeSeriesStore prune error: {e}")
+                for waiter in waiters:
+                    waiter.set()
+                if stop or (self._stop.is_set() and self._queue.empty()):
+                    break
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, pings: List[tuple], speeds: List[tuple]):
+        # Pre-agregă lotul în memorie ca fiecare bucket să primească un singur upsert
+        rollups = {table: {} for table in ROLLUP_TIERS}
+        for host, ts, rtt, lost in pings:
+            for table, size in ROLLUP_TIERS.items():
+                key = (host, int(ts // size) * size)
+                agg = rollups[table].get(key)
+                if agg is None:
+                    agg = rollups[table][key] = [0, 0, 0, 0.0, None, None]
+                agg[0] += 1
+                agg[1] += lost
+                if rtt is not None:
+                    agg[2] += 1
+                    agg[3] += rtt
+                    agg[4] = rtt if agg[4] is None else min(agg[4], rtt)
+                    agg[5] = rtt if agg[5] is None else max(agg[5], rtt)
+
+        with conn:
+            conn.executemany('INSERT INTO ping_raw (host, ts, rtt, loss) VALUES (?, ?, ?, ?)', pings)
+            for table, buckets in rollups.items():
+                conn.executemany(ROLLUP_UPSERT.format(table=table),
+                                 [(host, bucket, *agg) for (host, bucket), agg in buckets.items()])
+            if speeds:
+                conn.executemany('INSERT INTO speed_raw (ts, download, upload, ping, server, real_test) '
+                                 'VALUES (?, ?, ?, ?, ?, ?)', speeds)
+
+    def prune(self, conn: Optional[sqlite3.Connection] = None):
+        """Aplică politicile de retenție pe toate nivelurile"""
+        conn = conn or self._reader()
+        now = time.time()
+        with conn:
+            conn.execute('DELETE FROM ping_raw WHERE ts < ?', (now - self.retention['ping_raw'],))
+            conn.execute('DELETE FROM speed_raw WHERE ts < ?', (now - self.retention['speed_raw'],))
+            for table in ROLLUP_TIERS:
+                conn.execute(f'DELETE FROM {table} WHERE bucket < ?', (now - self.retention[table],))
+
+    # --- Citire ----------------------------------------------------------
+
+    def choose_resolution(self, start: float, end: float) -> str:
+        """Alege nivelul potrivit pentru intervalul cerut"""
+        span = end - start
+        if span <= 2 * 3600 and start >= time.time() - self.retention['ping_raw']:
+            return 'ping_raw'
+        if span <= 2 * 86400 and start >= time.time() - self.retention['ping_1m']:
+            return 'ping_1m'
+        return 'ping_1h'
+
+    def query_ping(self, start: float, end: Optional[float] = None, hosts: Optional[List[str]] = None,
+                   resolution: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """Seria de timp per host; nivelul se alege automat dacă nu e specificat"""
+        end = time.time() if end is None else end
+        table = resolution or self.choose_resolution(start, end)
+        host_filter, params = '', [start, end]
+        if hosts:
+            host_filter = f" AND host IN ({','.join('?' * len(hosts))})"
+            params += list(hosts)
+
+        conn = self._reader()
+        series: Dict[str, List[Dict]] = {}
+        if table == 'ping_raw':
+            rows = conn.execute(f'SELECT host, ts, rtt, loss FROM ping_raw '
+                                f'WHERE ts >= ? AND ts <= ?{host_filter} ORDER BY host, ts', params)
+            for row in rows:
+                series.setdefault(row['host'], []).append({
+                    'timestamp': row['ts'],
+                    'avg': row['rtt'], 'min': row['rtt'], 'max': row['rtt'],
+                    'samples': 1,
+                    'loss_rate': float(row['loss'])
+                })
+            return series
+
+        if table not in ROLLUP_TIERS:
+            raise ValueError(f"Rezoluție necunoscută: {table}")
+        rows = conn.execute(f'SELECT host, bucket, samples, lost, rtt_count, rtt_sum, rtt_min, rtt_max '
+                            f'FROM {table} WHERE bucket >= ? AND bucket <= ?{host_filter} '
+                            f'ORDER BY host, bucket', params)
+        for row in rows:
+            series.setdefault(row['host'], []).append({
+                'timestamp': row['bucket'],
+                'avg': row['rtt_sum'] / row['rtt_count'] if row['rtt_count'] else None,
+                'min': row['rtt_min'],
+                'max': row['rtt_max'],
+                'samples': row['samples'],
+                'loss_rate': row['lost'] / row['samples'] if row['samples'] else None
+            })
+        return series
+
+    def _segments(self, start: float, end: float) -> List[tuple]:
+        """Acoperă [start, end) cu bucket-uri întregi, începând cu nivelul cel mai grosier"""
+        tiers = sorted(ROLLUP_TIERS.items(), key=lambda item: -item[1])
+        segments = []
+
+        def cover(lo, hi, level):
+            if hi <= lo:
+                return
+            table, size = tiers[level]
+            if level == len(tiers) - 1:
+                segments.append((table, lo // size * size, hi))
+                return
+            first = -(-lo // size) * size
+            last = hi // size * size
+            if first < last:
+                segments.append((table, first, last))
+                cover(lo, first, level + 1)
+                cover(last, hi, level + 1)
+            else:
+                cover(lo, hi, level + 1)
+
+        cover(int(start), int(end), 0)
+        return segments
+
+    def summary(self, start: float, end: Optional[float] = None) -> Dict[str, Dict]:
+        """Agregat per host (medie, min, max, pierderi) pe interval, calculat în SQLite"""
+        end = time.time() if end is None else end
+        # Zilele întregi din ping_1d, marginile din ping_1h / ping_1m
+        segments = self._segments(start, end)
+        union = ' UNION ALL '.join(
+            f'SELECT host, samples, lost, rtt_count, rtt_sum, rtt_min, rtt_max FROM {table} '
+            f'WHERE bucket >= ? AND bucket < ?' for table, _lo, _hi in segments)
+        params = [value for _table, lo, hi in segments for value in (lo, hi)]
+        if not union:
+            return {}
+        rows = self._reader().execute(
+            f'SELECT host, sum(samples) AS samples, sum(lost) AS lost, sum(rtt_count) AS rtt_count, '
+            f'sum(rtt_sum) AS rtt_sum, min(rtt_min) AS rtt_min, max(rtt_max) AS rtt_max '
+            f'FROM ({union}) GROUP BY host', params)
+        return {
+            row['host']: {
+                'samples': row['samples'],
+                'avg': row['rtt_sum'] / row['rtt_count'] if row['rtt_count'] else None,
+                'min': row['rtt_min'],
+                'max': row['rtt_max'],
+                'loss_rate': row['lost'] / row['samples'] if row['samples'] else None
+            }
+            for row in rows
+        }
+
+    def recent_ping(self, host: str, limit: int = 100) -> List[Dict]:
+        """Ultimele eșantioane brute ale unui host, în ordine cronologică"""
+        rows = self._reader().execute(
+            'SELECT ts, rtt, loss FROM ping_raw WHERE host = ? ORDER BY ts DESC LIMIT ?', (host, limit))
+        return [{'timestamp': row['ts'], 'response_time': row['rtt'], 'packet_loss': bool(row['loss'])}
+                for row in reversed(rows.fetchall())]
+
+    def load_speed(self, limit: int = 10) -> List[Dict]:
+        """Ultimele teste de viteză salvate, în ordine cronologică"""
+        rows = self._reader().execute(
+            'SELECT ts, download, upload, ping, server, real_test FROM speed_raw '
+            'ORDER BY ts DESC LIMIT ?', (limit,))
+        return [{
+            'timestamp': row['ts'],
+            'download': row['download'],
+            'upload': row['upload'],
+            'ping': row['ping'],
+            'server': row['server'],
+            'real_test': bool(row['real_test'])
+        } for row in reversed(rows.fetchall())]